@@ -0,0 +1,73 @@
+"""
+Compares submitting the same orders through Orderbook.submit_batch against
+individual insert_bid/insert_ask calls. The workloads are a market maker
+posting a ladder of levels on both sides and a random session replay.
+
+    python -m benchmarks.batch_bench [num_orders]
+"""
+import gc
+import random
+import sys
+import time
+from discord_exchange import Orderbook, Order
+
+REPEATS = 6
+
+
+def ladder_orders(num_orders, num_levels=20):
+    orders = []
+    while len(orders) < num_orders:
+        for level in range(num_levels // 2):
+            orders.append((Order.TYPE_BID, 0, 99 - level, 1))
+            orders.append((Order.TYPE_ASK, 0, 101 + level, 1))
+    return orders[:num_orders]
+
+
+def session_orders(num_orders, seed=0):
+    rng = random.Random(seed)
+    return [(rng.choice((Order.TYPE_BID, Order.TYPE_ASK)), rng.randrange(50),
+             rng.randint(90, 110), rng.randint(1, 5))
+            for _ in range(num_orders)]
+
+
+def run_individual(orders):
+    ob = Orderbook(position_limit=1_000_000)
+    trades = []
+    start = time.perf_counter()
+    for side, user, price, volume in orders:
+        if side == Order.TYPE_BID:
+            trades.extend(ob.insert_bid(user, price, volume))
+        else:
+            trades.extend(ob.insert_ask(user, price, volume))
+    return time.perf_counter() - start, len(trades)
+
+
+def run_batch(orders):
+    ob = Orderbook(position_limit=1_000_000)
+    start = time.perf_counter()
+    trades = ob.submit_batch(orders)
+    return time.perf_counter() - start, len(trades)
+
+
+def main():
+    num_orders = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f"{'workload':>10} {'mode':>10} {'trades':>8} {'orders/s':>10}")
+    for name, orders in [("ladder", ladder_orders(num_orders)),
+                         ("session", session_orders(num_orders))]:
+        modes = [("individual", run_individual), ("batch", run_batch)]
+        results = {mode: [] for mode, _ in modes}
+        # Best of a few runs, alternating which mode goes first and starting
+        # each from a collected heap, since a run is faster right after the
+        # previous book was freed
+        for repeat in range(REPEATS):
+            for mode, run in modes[::-1] if repeat % 2 else modes:
+                gc.collect()
+                results[mode].append(run(orders))
+        for mode, _ in modes:
+            elapsed, num_trades = min(results[mode])
+            print(f"{name:>10} {mode:>10} {num_trades:>8} "
+                  f"{num_orders / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compares two result files of the benchmark suite, such as those of two
+commits, and exits with status 1 if the second regressed: if throughput
+fell, or p99 latency or peak memory rose, by more than the threshold, or
+if the same workloads produced different trades.
+
+    python -m benchmarks.compare baseline.json results.json [--threshold 0.1]
+"""
+import argparse
+import json
+import sys
+
+# Metric, whether higher is better
+METRICS = (("orders_per_s", True), ("p50_ns", False), ("p99_ns", False),
+           ("p999_ns", False), ("peak_mib", False))
+# Only these count towards a regression, the outer percentiles are too
+# noisy on their own
+CHECKED = ("orders_per_s", "p99_ns", "peak_mib")
+
+
+def report(baseline: dict, results: dict, threshold=0.1) -> bool:
+    """
+    Prints how every run in both results changed and returns whether any
+    of them regressed.
+    """
+    same_input = all(baseline.get(key) == results.get(key)
+                     for key in ("orders", "seed"))
+    print(f"{baseline.get('commit')} -> {results.get('commit')}")
+    print(f"{'run':>28} " + " ".join(f"{metric:>12}"
+                                     for metric, _ in METRICS))
+    regressed = False
+    for run, new in results["results"].items():
+        old = baseline["results"].get(run, None)
+        if old is None:
+            continue
+        cells, problems = [], []
+        for metric, higher_is_better in METRICS:
+            ratio = new[metric] / old[metric] if old[metric] else 1.0
+            cells.append(f"{ratio:>11.2f}x")
+            worse = 1 - ratio if higher_is_better else ratio - 1
+            if metric in CHECKED and worse > threshold:
+                problems.append(metric)
+        if same_input and new["trade_digest"] != old["trade_digest"]:
+            problems.append("trades differ")
+        line = f"{run:>28} " + " ".join(cells)
+        if problems:
+            regressed = True
+            line += "  REGRESSION: " + ", ".join(problems)
+        print(line)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("baseline")
+    parser.add_argument("results")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.results) as file:
+        results = json.load(file)
+    if report(baseline, results, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Runs the same workloads head to head on the default book and on a dense
+book with levels for every price from 0 to 120: the matching benchmark's
+resting, session and sweeping orders, and a binary market priced from 0 to
+100 where orders land anywhere in the range and levels keep emptying and
+refilling.
+
+    python -m benchmarks.dense_bench [num_orders]
+"""
+import gc
+import random
+import sys
+import time
+from discord_exchange import Orderbook, Order
+from benchmarks.matching_bench import (resting_orders, session_orders,
+                                       sweeping_orders)
+
+REPEATS = 9
+# The highest price of the matching benchmark's workloads
+MAX_PRICE = 120
+
+
+def binary_orders(num_orders, seed=0):
+    rng = random.Random(seed)
+    orders = []
+    for _ in range(num_orders):
+        side = rng.choice((Order.TYPE_BID, Order.TYPE_ASK))
+        # Quotes spread around a drifting fair value
+        price = min(max(round(rng.gauss(50, 15)), 0), 100)
+        orders.append((side, rng.randrange(100), price, rng.randint(1, 5)))
+    return orders
+
+
+def run(orders, max_price):
+    ob = Orderbook(position_limit=1_000_000, max_price=max_price)
+    insert_bid, insert_ask = ob.insert_bid, ob.insert_ask
+    # Orders and levels refer to each other, so the book of the previous
+    # run is only freed by a collection, which must not land in this run
+    gc.collect()
+    start = time.perf_counter()
+    for side, user, price, volume in orders:
+        if side == Order.TYPE_BID:
+            insert_bid(user, price, volume)
+        else:
+            insert_ask(user, price, volume)
+    return time.perf_counter() - start
+
+
+def main():
+    num_orders = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f"{num_orders} orders per workload, best of {REPEATS}")
+    print(f"{'workload':>9} {'default':>10} {'dense':>10} {'speedup':>8}")
+    for name, make in (("resting", resting_orders),
+                       ("session", session_orders),
+                       ("sweeping", sweeping_orders),
+                       ("binary", binary_orders)):
+        orders = make(num_orders)
+        times = {None: [], MAX_PRICE: []}
+        # Interleaved so that both books see the same machine conditions
+        for _ in range(REPEATS):
+            for max_price in times:
+                times[max_price].append(run(orders, max_price))
+        default, dense = min(times[None]), min(times[MAX_PRICE])
+        print(f"{name:>9} {num_orders / default:>10.0f} "
+              f"{num_orders / dense:>10.0f} {default / dense:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Measures matching throughput of ShardedExchange as the number of worker
+processes grows, against an in-process Exchange. Every market receives the
+same seeded session in batches, all of which are sent before any reply is
+read.
+
+    python -m benchmarks.exchange_scaling_bench [num_markets] [orders_per_market]
+"""
+import os
+import random
+import sys
+import time
+from discord_exchange import Exchange, ShardedExchange, Order
+
+BATCH_SIZE = 500
+
+
+def market_batches(num_markets, orders_per_market, seed=0):
+    rng = random.Random(seed)
+    batches = []
+    for start in range(0, orders_per_market, BATCH_SIZE):
+        for m in range(num_markets):
+            orders = [(rng.choice((Order.TYPE_BID, Order.TYPE_ASK)),
+                       rng.randrange(50), rng.randint(90, 110), rng.randint(1, 5))
+                      for _ in range(min(BATCH_SIZE, orders_per_market - start))]
+            batches.append((f"market-{m}", orders))
+    return batches
+
+
+def run_in_process(batches):
+    ex = Exchange(position_limit=1_000)
+    start = time.perf_counter()
+    for name, orders in batches:
+        ex.submit_batch(name, orders)
+    return time.perf_counter() - start
+
+
+def run_sharded(batches, num_workers):
+    with ShardedExchange(num_workers, position_limit=1_000) as ex:
+        start = time.perf_counter()
+        request_ids = [ex.send(name, orders) for name, orders in batches]
+        for request_id in request_ids:
+            ex.receive(request_id)
+        return time.perf_counter() - start
+
+
+def main():
+    num_markets = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    orders_per_market = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    batches = market_batches(num_markets, orders_per_market)
+    num_orders = num_markets * orders_per_market
+
+    print(f"{'workers':>10} {'orders/s':>10} {'speedup':>8}")
+    baseline = run_in_process(batches)
+    print(f"{'in-proc':>10} {num_orders / baseline:>10.0f} {1:>8.2f}")
+    num_workers = 1
+    while num_workers <= max(os.cpu_count() or 1, 2):
+        elapsed = run_sharded(batches, num_workers)
+        print(f"{num_workers:>10} {num_orders / elapsed:>10.0f} "
+              f"{baseline / elapsed:>8.2f}")
+        num_workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Measures the per-order cost of journalling under each fsync policy and the
+time it takes to recover a book from a journal of that many orders.
+
+    python -m benchmarks.journal_bench [num_orders]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from discord_exchange import Orderbook
+from discord_exchange.journal import Journal, recover
+
+
+def session(num_orders, seed=0):
+    rng = random.Random(seed)
+    return [(rng.random() < 0.5, rng.randrange(50), rng.randint(90, 110),
+             rng.randint(1, 5)) for _ in range(num_orders)]
+
+
+def run(orders, journal=None):
+    ob = Orderbook(position_limit=1_000, journal=journal)
+    start = time.perf_counter()
+    for is_bid, user, price, volume in orders:
+        if is_bid:
+            ob.insert_bid(user, price, volume)
+        else:
+            ob.insert_ask(user, price, volume)
+    if journal is not None:
+        journal.close()
+    return time.perf_counter() - start
+
+
+def main():
+    num_orders = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    orders = session(num_orders)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.journal")
+        baseline = run(orders)
+        print(f"{'policy':>12} {'us/order':>9} {'overhead':>9}")
+        print(f"{'no journal':>12} {baseline / num_orders * 1e6:>9.2f} {'':>9}")
+        for name, fsync in [("never", Journal.FSYNC_NEVER),
+                            ("group", Journal.FSYNC_GROUP),
+                            ("always", Journal.FSYNC_ALWAYS)]:
+            if os.path.exists(path):
+                os.remove(path)
+            # Forcing every record to disk is slow, so it gets fewer orders
+            n = num_orders if fsync != Journal.FSYNC_ALWAYS else num_orders // 100
+            elapsed = run(orders[:n], Journal(path, position_limit=1_000,
+                                              fsync=fsync))
+            overhead = elapsed / n - baseline / num_orders
+            print(f"{name:>12} {elapsed / n * 1e6:>9.2f} {overhead * 1e6:>9.2f}")
+
+        os.remove(path)
+        run(orders, Journal(path, position_limit=1_000, fsync=Journal.FSYNC_NEVER))
+        start = time.perf_counter()
+        ob, trades = recover(path)
+        elapsed = time.perf_counter() - start
+        ob.journal.close()
+        print(f"recovered {num_orders} orders and {len(trades)} trades "
+              f"({os.path.getsize(path) / 2**20:.1f} MiB) in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
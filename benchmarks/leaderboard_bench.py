@@ -0,0 +1,73 @@
+"""
+Streams trades between many users and posts a leaderboard after every
+round, once from maintained Leaderboards and once by sorting all users.
+
+    python -m benchmarks.leaderboard_bench [num_users] [num_rounds]
+"""
+import random
+import sys
+import time
+from discord_exchange import Orderbook, Trade
+
+METRICS = ("position", "realized_pnl", "traded_volume")
+
+
+def trades(num_users, num_trades, seed=0):
+    rng = random.Random(seed)
+    for i in range(num_trades):
+        buyer, seller = rng.sample(range(num_users), 2)
+        yield Trade(buyer, seller, rng.randint(1, 99), rng.randint(1, 10), i)
+
+
+def register(ob, trade):
+    ob.get_user(trade.buyer).register_trade(trade)
+    ob.get_user(trade.seller).register_trade(trade)
+
+
+def run(num_users, num_rounds, trades_per_round, indexed, k=10):
+    ob = Orderbook()
+    for user in range(num_users):
+        ob.get_user(user)
+    if indexed:
+        for metric in METRICS:
+            ob.leaderboard(metric)
+    stream = trades(num_users, num_rounds * trades_per_round)
+    trading = posting = 0
+    for _ in range(num_rounds):
+        start = time.perf_counter()
+        for _ in range(trades_per_round):
+            register(ob, next(stream))
+        trading += time.perf_counter() - start
+        start = time.perf_counter()
+        for metric in METRICS:
+            if indexed:
+                leaderboard = ob.leaderboard(metric)
+                leaderboard.top(k)
+                leaderboard.rank(0)
+            else:
+                ranking = sorted(ob.users.values(),
+                                 key=lambda user: (-getattr(user, metric),
+                                                   user.identifier))
+                ranking[:k]
+                next(i for i, user in enumerate(ranking)
+                     if user.identifier == 0)
+        posting += time.perf_counter() - start
+    return trading, posting
+
+
+def main():
+    num_users = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    num_rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    trades_per_round = 5_000
+    print(f"{num_users} users, {num_rounds} rounds of {trades_per_round} "
+          f"trades, {len(METRICS)} leaderboards")
+    for name, indexed in (("full sort", False), ("leaderboard", True)):
+        trading, posting = run(num_users, num_rounds, trades_per_round,
+                               indexed)
+        total = num_rounds * trades_per_round
+        print(f"{name:>12} {total / trading:>10.0f} trades/s "
+              f"{posting / num_rounds * 1e3:>10.3f} ms/post")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Replays a random session with the position limit enforced by trimming the
+oldest orders and by refusing orders over the limit. Users quote near
+their limits, so trimming and rejection both happen regularly. A user whose
+order is refused cancels their oldest order on that side instead.
+
+    python -m benchmarks.limit_bench [num_orders] [position_limit]
+"""
+import random
+import sys
+import time
+from discord_exchange import Orderbook, Order
+from discord_exchange.orderbook import LimitExceeded
+
+REPEATS = 3
+
+
+def session_orders(num_orders, seed=0):
+    rng = random.Random(seed)
+    return [(rng.choice((Order.TYPE_BID, Order.TYPE_ASK)), rng.randrange(50),
+             rng.randint(90, 110), rng.randint(1, 5))
+            for _ in range(num_orders)]
+
+
+def run(orders, position_limit, limit_mode):
+    ob = Orderbook(position_limit=position_limit, limit_mode=limit_mode)
+    num_trades = num_rejected = 0
+    start = time.perf_counter()
+    for side, user, price, volume in orders:
+        try:
+            if side == Order.TYPE_BID:
+                num_trades += len(ob.insert_bid(user, price, volume))
+            else:
+                num_trades += len(ob.insert_ask(user, price, volume))
+        except LimitExceeded:
+            num_rejected += 1
+            user_data = ob.get_user(user)
+            resting = user_data.bids if side == Order.TYPE_BID \
+                else user_data.asks
+            if resting:
+                ob.cancel(next(iter(resting)))
+    elapsed = time.perf_counter() - start
+    return elapsed, num_trades, num_rejected, len(ob.orders)
+
+
+def main():
+    num_orders = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    position_limit = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    orders = session_orders(num_orders)
+    print(f"{num_orders} orders from 50 users, position limit {position_limit}")
+    for name, limit_mode in (("trim", Orderbook.LIMIT_TRIM),
+                             ("reject", Orderbook.LIMIT_REJECT),
+                             ("no limit", None)):
+        if limit_mode is None:
+            limit_mode, limit = Orderbook.LIMIT_TRIM, 1_000_000_000
+        else:
+            limit = position_limit
+        results = [run(orders, limit, limit_mode) for _ in range(REPEATS)]
+        elapsed, num_trades, num_rejected, resting = min(results)
+        print(f"{name:>9} {num_orders / elapsed:>10.0f} orders/s "
+              f"{num_trades:>8} trades {num_rejected:>8} rejected "
+              f"{resting:>6} resting")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Measures matching throughput on workloads that stress different parts of
+the matching core: orders that only rest, a random session around a mid
+price, and orders that sweep several levels.
+
+    python -m benchmarks.matching_bench [num_orders]
+"""
+import random
+import sys
+import time
+from discord_exchange import Orderbook, Order
+
+REPEATS = 5
+
+
+def resting_orders(num_orders, seed=0):
+    rng = random.Random(seed)
+    orders = []
+    for _ in range(num_orders):
+        if rng.random() < 0.5:
+            orders.append((Order.TYPE_BID, rng.randrange(100), rng.randint(80, 99),
+                           rng.randint(1, 5)))
+        else:
+            orders.append((Order.TYPE_ASK, rng.randrange(100), rng.randint(101, 120),
+                           rng.randint(1, 5)))
+    return orders
+
+
+def session_orders(num_orders, seed=0):
+    rng = random.Random(seed)
+    return [(rng.choice((Order.TYPE_BID, Order.TYPE_ASK)), rng.randrange(100),
+             rng.randint(90, 110), rng.randint(1, 5))
+            for _ in range(num_orders)]
+
+
+def sweeping_orders(num_orders, seed=0):
+    rng = random.Random(seed)
+    orders = []
+    for i in range(num_orders):
+        if i % 10 < 8:
+            # Makers quote single lots across many levels
+            side = rng.choice((Order.TYPE_BID, Order.TYPE_ASK))
+            price = rng.randint(80, 99) if side == Order.TYPE_BID \
+                else rng.randint(101, 120)
+            orders.append((side, rng.randrange(100), price, 1))
+        else:
+            side = rng.choice((Order.TYPE_BID, Order.TYPE_ASK))
+            price = 120 if side == Order.TYPE_BID else 80
+            orders.append((side, 100 + rng.randrange(10), price, 8))
+    return orders
+
+
+def run(orders):
+    ob = Orderbook(position_limit=1_000_000)
+    insert_bid, insert_ask = ob.insert_bid, ob.insert_ask
+    num_trades = 0
+    start = time.perf_counter()
+    for side, user, price, volume in orders:
+        if side == Order.TYPE_BID:
+            num_trades += len(insert_bid(user, price, volume))
+        else:
+            num_trades += len(insert_ask(user, price, volume))
+    return time.perf_counter() - start, num_trades
+
+
+def main():
+    num_orders = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f"{num_orders} orders per workload, best of {REPEATS}")
+    for name, make in (("resting", resting_orders),
+                       ("session", session_orders),
+                       ("sweeping", sweeping_orders)):
+        orders = make(num_orders)
+        elapsed, num_trades = min(run(orders) for _ in range(REPEATS))
+        print(f"{name:>9} {num_orders / elapsed:>10.0f} orders/s "
+              f"{num_trades:>8} trades")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Runs a long random-walk quoting session, where every user replaces their
+previous quote on a side when quoting it again, and reports, per window of orders,
+the resident set size of the process together with the number of resting
+orders and price levels. With filled orders and empty levels reclaimed, all
+of them should stay bounded however long the session runs.
+
+    python -m benchmarks.memory_bench [num_orders]
+"""
+import os
+import random
+import resource
+import sys
+from discord_exchange import Orderbook
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def rss_mib() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE / 2**20
+
+
+def peak_rss_mib() -> float:
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+
+def run(num_orders=3_000_000, num_users=200, num_windows=10, seed=0):
+    rng = random.Random(seed)
+    ob = Orderbook()
+    mid = 1000
+    window = num_orders // num_windows
+    rows = []
+    for w in range(num_windows):
+        for _ in range(window):
+            mid = max(mid + rng.choice((-1, 0, 1)), 10)
+            user = rng.randrange(num_users)
+            volume = rng.randint(1, 5)
+            user_data = ob.get_user(user)
+            if rng.random() < 0.5:
+                for order_id in list(user_data.bids):
+                    ob.cancel(order_id)
+                ob.insert_bid(user, mid - rng.randint(-1, 5), volume)
+            else:
+                for order_id in list(user_data.asks):
+                    ob.cancel(order_id)
+                ob.insert_ask(user, mid + rng.randint(-1, 5), volume)
+        rows.append(((w + 1) * window, rss_mib(), len(ob.orders),
+                     len(ob.bids) + len(ob.asks), mid))
+    return rows
+
+
+def main():
+    num_orders = int(sys.argv[1]) if len(sys.argv) > 1 else 3_000_000
+    print(f"{'orders':>10} {'rss MiB':>8} {'resting':>8} {'levels':>7} {'mid':>6}")
+    for orders, rss, resting, levels, mid in run(num_orders):
+        print(f"{orders:>10} {rss:>8.1f} {resting:>8} {levels:>7} {mid:>6}")
+    print(f"peak rss: {peak_rss_mib():.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
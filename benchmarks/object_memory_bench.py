@@ -0,0 +1,78 @@
+"""
+Compares the memory footprint and construction throughput of the slotted
+Order and Trade classes and the columnar TradeLog against dict-backed
+classes laid out like the previous Order and Trade.
+
+    python -m benchmarks.object_memory_bench [num_objects]
+"""
+import sys
+import time
+import tracemalloc
+from discord_exchange import Order, Trade
+from discord_exchange.orderbook import TradeLog
+
+
+class DictOrder:
+    def __init__(self, order_type, user, price, volume, order_id=None) -> None:
+        self.id = order_id
+        self.type = order_type
+        self.user_id = user
+        self.price = price
+        self.volume = volume
+        self.level = None
+        self.prev = None
+        self.next = None
+        self.updated_at = 0
+
+
+class DictTrade:
+    def __init__(self, buyer, seller, price, volume, trade_id=None) -> None:
+        self.buyer = buyer
+        self.seller = seller
+        self.price = price
+        self.volume = volume
+        self.id = trade_id
+
+
+def measure(build, n):
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = build(n)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return size / n, n / elapsed
+
+
+def orders(cls):
+    return lambda n: [cls(Order.TYPE_BID, i % 1000, 100.0 + i % 10, 5, i)
+                      for i in range(n)]
+
+
+def trades(cls):
+    return lambda n: [cls(i % 1000, (i + 1) % 1000, 100.0 + i % 10, 5, i)
+                      for i in range(n)]
+
+
+def trade_log(n):
+    log = TradeLog()
+    for i in range(n):
+        log.append(Trade(i % 1000, (i + 1) % 1000, 100.0 + i % 10, 5, i))
+    return log
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f"{'store':>18} {'bytes/object':>13} {'objects/s':>10}")
+    for name, build in [("dict Order", orders(DictOrder)),
+                        ("slotted Order", orders(Order)),
+                        ("dict Trade list", trades(DictTrade)),
+                        ("slotted Trade list", trades(Trade)),
+                        ("TradeLog", trade_log)]:
+        per_object, rate = measure(build, n)
+        print(f"{name:>18} {per_object:>13.1f} {rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
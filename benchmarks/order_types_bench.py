@@ -0,0 +1,74 @@
+"""
+Measures the throughput of each order type against a book that market
+makers keep refilling. Takers send the same random stream of orders as
+resting limit orders, immediate-or-cancel, fill-or-kill and market
+orders, and fill-or-kill orders too large to fill are sent as a last case.
+
+    python -m benchmarks.order_types_bench [num_orders]
+"""
+import random
+import sys
+import time
+from discord_exchange import Orderbook, Order
+
+REPEATS = 3
+MAKERS = 20
+
+
+def taker_orders(num_orders, seed=0):
+    rng = random.Random(seed)
+    return [(rng.choice((Order.TYPE_BID, Order.TYPE_ASK)),
+             MAKERS + rng.randrange(50), rng.randint(95, 105),
+             rng.randint(1, 5))
+            for _ in range(num_orders)]
+
+
+def refill(ob):
+    # Every maker quotes one lot on each of five levels a side
+    for maker in range(MAKERS):
+        for level in range(5):
+            ob.insert_bid(maker, 99 - level, 1)
+            ob.insert_ask(maker, 101 + level, 1)
+
+
+def run(orders, time_in_force, market=False, scale=1):
+    ob = Orderbook(position_limit=10**12)
+    num_trades = 0
+    elapsed = 0
+    for i, (side, user, price, volume) in enumerate(orders):
+        if i % 100 == 0:
+            refill(ob)
+        volume *= scale
+        start = time.perf_counter()
+        if market:
+            if side == Order.TYPE_BID:
+                trades = ob.market_bid(user, volume, time_in_force)
+            else:
+                trades = ob.market_ask(user, volume, time_in_force)
+        elif side == Order.TYPE_BID:
+            trades = ob.insert_bid(user, price, volume, time_in_force)
+        else:
+            trades = ob.insert_ask(user, price, volume, time_in_force)
+        elapsed += time.perf_counter() - start
+        num_trades += len(trades)
+    return elapsed, num_trades, len(ob.orders)
+
+
+def main():
+    num_orders = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    orders = taker_orders(num_orders)
+    cases = (("limit", Order.GOOD_TILL_CANCEL, False, 1),
+             ("ioc", Order.IMMEDIATE_OR_CANCEL, False, 1),
+             ("fok", Order.FILL_OR_KILL, False, 1),
+             ("market", Order.IMMEDIATE_OR_CANCEL, True, 1),
+             ("fok, killed", Order.FILL_OR_KILL, False, 10**6))
+    print(f"{num_orders} taker orders, book refilled every 100")
+    for name, time_in_force, market, scale in cases:
+        elapsed, num_trades, resting = min(
+            run(orders, time_in_force, market, scale) for _ in range(REPEATS))
+        print(f"{name:>12} {num_orders / elapsed:>10.0f} orders/s "
+              f"{num_trades:>8} trades {resting:>7} resting")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Inserts resting orders at a handful of price levels and reports, per window
+of inserts, the number of entries in the price ladders and the mean insert
+latency. Both should stay flat no matter how many orders have been inserted.
+
+    python -m benchmarks.price_ladder_bench [num_orders] [num_levels]
+"""
+import random
+import sys
+import time
+from discord_exchange import Orderbook
+
+
+def run(num_orders=1_000_000, num_levels=10, num_windows=10, seed=0):
+    rng = random.Random(seed)
+    ob = Orderbook()
+    window = num_orders // num_windows
+    rows = []
+    for w in range(num_windows):
+        # Bids and asks never cross so every order rests in the book
+        orders = [(rng.randrange(100), rng.randrange(num_levels), rng.random() < 0.5)
+                  for _ in range(window)]
+        start = time.perf_counter()
+        for user, level, is_bid in orders:
+            if is_bid:
+                ob.insert_bid(user, 100 - num_levels + level, 1)
+            else:
+                ob.insert_ask(user, 101 + level, 1)
+        elapsed = time.perf_counter() - start
+        rows.append(((w + 1) * window, len(ob.bid_prices._keys),
+                     len(ob.ask_prices._keys), elapsed / window * 1e9))
+    return rows
+
+
+def main():
+    num_orders = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    num_levels = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(f"{'inserts':>10} {'bid keys':>9} {'ask keys':>9} {'ns/insert':>10}")
+    for inserts, bid_keys, ask_keys, ns in run(num_orders, num_levels):
+        print(f"{inserts:>10} {bid_keys:>9} {ask_keys:>9} {ns:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
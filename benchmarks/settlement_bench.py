@@ -0,0 +1,71 @@
+"""
+Settles a trade history against one and against many theos with the
+vectorized Settlement and with a loop over Trade.binary_value and
+Trade.true_value.
+
+    python -m benchmarks.settlement_bench [num_trades] [num_theos]
+"""
+import random
+import sys
+import time
+from discord_exchange import Trade
+from discord_exchange.orderbook import TradeLog
+from discord_exchange.settlement import Settlement
+
+
+def trade_log(num_trades, num_users=1_000, seed=0):
+    rng = random.Random(seed)
+    trades = TradeLog()
+    for i in range(num_trades):
+        buyer, seller = rng.sample(range(num_users), 2)
+        trades.append(Trade(buyer, seller, rng.randint(1, 99), rng.randint(1, 10), i))
+    return trades
+
+
+def settle_loop(trades, theo):
+    binary, true = {}, {}
+    for trade in trades:
+        value = trade.binary_value(theo)
+        binary[trade.buyer] = binary.get(trade.buyer, 0) + value
+        binary[trade.seller] = binary.get(trade.seller, 0) - value
+        value = trade.true_value(theo)
+        true[trade.buyer] = true.get(trade.buyer, 0) + value
+        true[trade.seller] = true.get(trade.seller, 0) - value
+    return binary, true
+
+
+def main():
+    num_trades = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    num_theos = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    trades = trade_log(num_trades)
+    # The loop works on Trade objects, so build them outside the timing
+    objects = list(trades)
+    theos = [50 + i for i in range(num_theos)]
+
+    start = time.perf_counter()
+    settle_loop(objects, theos[0])
+    loop_one = time.perf_counter() - start
+
+    start = time.perf_counter()
+    settlement = Settlement(trades)
+    setup = time.perf_counter() - start
+    start = time.perf_counter()
+    settlement.binary_pnl(theos[0])
+    settlement.true_pnl(theos[0])
+    vector_one = time.perf_counter() - start
+    start = time.perf_counter()
+    settlement.binary_pnl(theos)
+    settlement.true_pnl(theos)
+    vector_many = time.perf_counter() - start
+
+    print(f"{num_trades} trades, {len(settlement.users)} users")
+    print(f"{'per-trade loop, 1 theo':>28} {loop_one:>8.3f}s")
+    print(f"{f'per-trade loop, {num_theos} theos':>28} "
+          f"{loop_one * num_theos:>8.3f}s (extrapolated)")
+    print(f"{'settlement setup':>28} {setup:>8.3f}s")
+    print(f"{'vectorized, 1 theo':>28} {vector_one:>8.3f}s")
+    print(f"{f'vectorized, {num_theos} theos':>28} {vector_many:>8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
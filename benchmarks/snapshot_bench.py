@@ -0,0 +1,54 @@
+"""
+Compares restart time from a full journal against restart from the latest
+snapshot plus the journal tail, and reports how long taking the snapshot
+held up matching.
+
+    python -m benchmarks.snapshot_bench [num_orders] [tail_orders]
+"""
+import os
+import sys
+import tempfile
+import time
+from discord_exchange.journal import Journal, recover
+from discord_exchange.snapshot import SnapshotStore
+from benchmarks.journal_bench import session, run
+
+
+def insert(ob, orders):
+    for is_bid, user, price, volume in orders:
+        if is_bid:
+            ob.insert_bid(user, price, volume)
+        else:
+            ob.insert_ask(user, price, volume)
+
+
+def main():
+    num_orders = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    tail_orders = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    orders = session(num_orders + tail_orders)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "full.journal")
+        run(orders, Journal(path, position_limit=1_000, fsync=Journal.FSYNC_NEVER))
+        start = time.perf_counter()
+        ob, _ = recover(path)
+        print(f"full journal replay: {time.perf_counter() - start:.3f}s")
+        ob.journal.close()
+
+        store_directory = os.path.join(directory, "store")
+        with SnapshotStore(store_directory, position_limit=1_000,
+                           fsync=Journal.FSYNC_NEVER) as store:
+            insert(store.orderbook, orders[:num_orders])
+            start = time.perf_counter()
+            store.snapshot()
+            print(f"snapshot pause:      {time.perf_counter() - start:.3f}s "
+                  f"({len(store.orderbook.orders)} resting orders)")
+            insert(store.orderbook, orders[num_orders:])
+
+        start = time.perf_counter()
+        store = SnapshotStore(store_directory)
+        print(f"snapshot + tail:     {time.perf_counter() - start:.3f}s")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
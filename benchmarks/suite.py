@@ -0,0 +1,184 @@
+"""
+Runs every seeded workload against every target and reports throughput,
+per-order latency percentiles and peak memory. Results can be saved as
+JSON and compared with those of another commit.
+
+Targets are the default Orderbook, a dense Orderbook priced from 0 to 100
+and a BinaryExchange, whose trades are also written to its trade log.
+Latency is measured around every single action, so it includes the cost
+of reading the clock. Throughput is the number of actions over the sum of
+their latencies, best of the repeats, and the percentiles are taken over
+the latencies of all repeats. Peak memory is the most memory traced by
+tracemalloc in a separate run, which starts from an empty target.
+
+    python -m benchmarks.suite [--orders N] [--output results.json]
+                               [--compare baseline.json]
+"""
+import argparse
+import gc
+import hashlib
+import json
+import platform
+import struct
+import subprocess
+import sys
+import time
+import tracemalloc
+from discord_exchange import Orderbook, BinaryExchange
+from benchmarks.workloads import WORKLOADS, REQUOTE, CANCEL_OLDEST
+from benchmarks import compare
+
+# buyer, seller, price, volume
+TRADE = struct.Struct("<qqdq")
+
+
+def make_orderbook(position_limit):
+    return Orderbook(position_limit=position_limit), None
+
+
+def make_dense(position_limit):
+    return Orderbook(position_limit=position_limit, max_price=100), None
+
+
+def make_binary(position_limit):
+    exchange = BinaryExchange(limit=position_limit)
+    return exchange.orderbook, exchange.trades
+
+
+TARGETS = {
+    "orderbook": make_orderbook,
+    "dense": make_dense,
+    "binary": make_binary,
+}
+
+
+def run(actions, target, position_limit, latencies=None):
+    """
+    Applies actions to a new target and returns the number of trades and a
+    digest of them, appending the latency of every action in nanoseconds
+    to latencies if given.
+    """
+    ob, trade_log = TARGETS[target](position_limit)
+    clock = time.perf_counter_ns
+    digest = hashlib.sha256()
+    num_trades = 0
+    for action, side, user, price, volume in actions:
+        start = clock()
+        if action == REQUOTE:
+            for order_id in list(ob.get_user(user).resting[side]):
+                ob.cancel(order_id)
+        elif action == CANCEL_OLDEST:
+            resting = ob.get_user(user).resting[side]
+            if resting:
+                ob.cancel(next(iter(resting)))
+        if action != CANCEL_OLDEST:
+            trades = ob.insert(side, user, price, volume)
+            if trade_log is not None:
+                trade_log.extend(trades)
+        else:
+            trades = ()
+        stop = clock()
+        if latencies is not None:
+            latencies.append(stop - start)
+        num_trades += len(trades)
+        for trade in trades:
+            digest.update(TRADE.pack(trade.buyer, trade.seller, trade.price,
+                                     trade.volume))
+    return num_trades, digest.hexdigest()
+
+
+def percentile(ordered, fraction):
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def measure(actions, target, position_limit, repeats) -> dict:
+    latencies = []
+    best = None
+    for _ in range(repeats):
+        samples = []
+        # The previous run's book is freed here rather than mid-run
+        gc.collect()
+        num_trades, digest = run(actions, target, position_limit, samples)
+        elapsed = sum(samples)
+        best = elapsed if best is None else min(best, elapsed)
+        latencies.extend(samples)
+    latencies.sort()
+
+    gc.collect()
+    tracemalloc.start()
+    run(actions, target, position_limit)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "orders_per_s": len(actions) / best * 1e9,
+        "p50_ns": percentile(latencies, 0.5),
+        "p99_ns": percentile(latencies, 0.99),
+        "p999_ns": percentile(latencies, 0.999),
+        "peak_mib": peak / 2**20,
+        "trades": num_trades,
+        "trade_digest": digest,
+    }
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--orders", type=int, default=100_000,
+                        help="actions per workload")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--targets", nargs="+", default=list(TARGETS),
+                        choices=list(TARGETS))
+    parser.add_argument("--workloads", nargs="+", default=list(WORKLOADS),
+                        choices=list(WORKLOADS))
+    parser.add_argument("--output", help="file to save the results to")
+    parser.add_argument("--compare",
+                        help="results of another run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative change that counts as a regression")
+    args = parser.parse_args()
+
+    results = {
+        "commit": commit(),
+        "python": platform.python_version(),
+        "orders": args.orders,
+        "seed": args.seed,
+        "repeats": args.repeats,
+        "results": {},
+    }
+    print(f"{args.orders} actions per workload, seed {args.seed}, "
+          f"best of {args.repeats}")
+    print(f"{'target':>9} {'workload':>18} {'orders/s':>10} {'p50 ns':>8} "
+          f"{'p99 ns':>8} {'p999 ns':>8} {'peak MiB':>9} {'trades':>8}")
+    for name in args.workloads:
+        generate, position_limit = WORKLOADS[name]
+        actions = generate(args.orders, args.seed)
+        for target in args.targets:
+            result = measure(actions, target, position_limit, args.repeats)
+            results["results"][f"{target}/{name}"] = result
+            print(f"{target:>9} {name:>18} {result['orders_per_s']:>10.0f} "
+                  f"{result['p50_ns']:>8} {result['p99_ns']:>8} "
+                  f"{result['p999_ns']:>8} {result['peak_mib']:>9.2f} "
+                  f"{result['trades']:>8}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        print()
+        if compare.report(baseline, results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Measures the cost of tick conversion on a random session around a mid
+price. The same orders are sent with whole prices on the default tick size,
+as cents on a 0.01 tick size, and as cents carrying float noise from the
+arithmetic that produced them, which still meet at the same levels.
+
+    python -m benchmarks.tick_bench [num_orders]
+"""
+import sys
+import time
+from discord_exchange import Orderbook, Order
+from benchmarks.matching_bench import session_orders
+
+REPEATS = 5
+
+
+def run(orders, tick_size):
+    ob = Orderbook(position_limit=1_000_000, tick_size=tick_size)
+    insert_bid, insert_ask = ob.insert_bid, ob.insert_ask
+    num_trades = 0
+    start = time.perf_counter()
+    for side, user, price, volume in orders:
+        if side == Order.TYPE_BID:
+            num_trades += len(insert_bid(user, price, volume))
+        else:
+            num_trades += len(insert_ask(user, price, volume))
+    bids, asks = ob.depth()
+    return time.perf_counter() - start, num_trades, len(bids) + len(asks)
+
+
+def main():
+    num_orders = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f"{num_orders} orders per case, best of {REPEATS}")
+    orders = session_orders(num_orders)
+    cents = [(side, user, price / 100, volume)
+             for side, user, price, volume in orders]
+    # Adding up cents lands next to, not on, the price it stands for
+    sums = {price: sum([0.01] * price) for _, _, price, _ in orders}
+    noisy = [(side, user, sums[price], volume)
+             for side, user, price, volume in orders]
+    for name, case, tick_size in (("whole", orders, 1),
+                                  ("cents", cents, 0.01),
+                                  ("noisy", noisy, 0.01)):
+        elapsed, num_trades, num_levels = min(run(case, tick_size)
+                                              for _ in range(REPEATS))
+        print(f"{name:>6} {num_orders / elapsed:>10.0f} orders/s "
+              f"{num_trades:>8} trades {num_levels:>4} levels")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Appends trades to an in-memory TradeLog and to a TradeHistory that spills
+to disk, and compares append throughput, the memory left allocated and the
+time to read trades back by id range, by user and all at once.
+
+    python -m benchmarks.trade_history_bench [num_trades] [block_size]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from discord_exchange import Trade
+from discord_exchange.orderbook import TradeLog
+from discord_exchange.trade_history import TradeHistory
+
+
+def fill(log, n):
+    for i in range(n):
+        log.append(Trade(i % 1000, (i + 1) % 1000, 100.0 + i % 10, 5, i))
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    block_size = int(sys.argv[2]) if len(sys.argv) > 2 else 65536
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "trades.dat")
+        print(f"{n} trades, blocks of {block_size}")
+        print(f"{'store':>12} {'trades/s':>10} {'MiB held':>9} "
+              f"{'ids ms':>8} {'user ms':>8} {'all ms':>8}")
+        for name, make in (("TradeLog", TradeLog),
+                           ("TradeHistory",
+                            lambda: TradeHistory(path, block_size))):
+            tracemalloc.start()
+            log = make()
+            elapsed, _ = timed(lambda: fill(log, n))
+            held, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            if isinstance(log, TradeHistory):
+                # A thousand trades from the middle of the history
+                ids, _ = timed(lambda: list(log.between_ids(n // 2,
+                                                            n // 2 + 1000)))
+                user, _ = timed(lambda: list(log.of_user(7)))
+            else:
+                ids, _ = timed(lambda: log[n // 2:n // 2 + 1000])
+                user, _ = timed(lambda: [t for t in log
+                                         if 7 in (t.buyer, t.seller)])
+            everything, _ = timed(lambda: sum(1 for _ in log))
+            print(f"{name:>12} {n / elapsed:>10.0f} {held / 2 ** 20:>9.1f} "
+                  f"{ids * 1e3:>8.2f} {user * 1e3:>8.1f} "
+                  f"{everything * 1e3:>8.1f}")
+            if isinstance(log, TradeHistory):
+                log.close()
+
+
+if __name__ == "__main__":
+    main()
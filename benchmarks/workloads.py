@@ -0,0 +1,117 @@
+"""
+Seeded workload generators for the benchmark suite. Every workload is a
+list of actions, so generating it is never timed, and the same seed always
+gives the same actions and, matching being deterministic, the same trades.
+
+An action is an (action, side, user, price, volume) tuple. Prices stay
+within 1 to 99 so that every workload also runs on binary markets.
+"""
+import random
+from discord_exchange import Order
+
+# Inserts an order
+INSERT = 0
+# Cancels the user's resting orders on the side, then inserts an order
+REQUOTE = 1
+# Cancels the user's oldest resting order on the side, if there is one
+CANCEL_OLDEST = 2
+
+BID, ASK = Order.TYPE_BID, Order.TYPE_ASK
+
+
+def random_walk(num_actions, seed=0):
+    """
+    Users requote one side at a time around a mid price that moves one
+    tick at a time, so quotes overlap and occasionally trade.
+    """
+    rng = random.Random(seed)
+    mid = 50
+    actions = []
+    for _ in range(num_actions):
+        mid = min(max(mid + rng.choice((-1, 0, 1)), 10), 90)
+        side = rng.choice((BID, ASK))
+        offset = rng.randint(-1, 5)
+        price = mid - offset if side == BID else mid + offset
+        actions.append((REQUOTE, side, rng.randrange(200), price,
+                        rng.randint(1, 5)))
+    return actions
+
+
+def crossing(num_actions, seed=0):
+    """
+    Bids and asks are priced through each other, so most orders trade on
+    arrival and the book stays thin.
+    """
+    rng = random.Random(seed)
+    actions = []
+    for _ in range(num_actions):
+        side = rng.choice((BID, ASK))
+        offset = rng.randint(-1, 3)
+        price = 50 + offset if side == BID else 50 - offset
+        actions.append((INSERT, side, rng.randrange(50), price,
+                        rng.randint(1, 5)))
+    return actions
+
+
+def deep_sweeps(num_actions, seed=0):
+    """
+    Makers quote single lots over twenty levels a side, and every tenth
+    order takes forty lots through the whole side.
+    """
+    rng = random.Random(seed)
+    actions = []
+    for i in range(num_actions):
+        side = rng.choice((BID, ASK))
+        if i % 10 < 9:
+            price = rng.randint(30, 49) if side == BID else rng.randint(51, 70)
+            actions.append((INSERT, side, rng.randrange(100), price, 1))
+        else:
+            price = 99 if side == BID else 1
+            actions.append((INSERT, side, 100 + rng.randrange(10), price, 40))
+    return actions
+
+
+def at_limit(num_actions, seed=0):
+    """
+    Users trade in sizes close to a position limit of 5, so incoming orders
+    are capped and resting orders keep being trimmed.
+    """
+    rng = random.Random(seed)
+    actions = []
+    for _ in range(num_actions):
+        side = rng.choice((BID, ASK))
+        offset = rng.randint(-2, 2)
+        price = 50 + offset if side == BID else 50 - offset
+        actions.append((INSERT, side, rng.randrange(100), price,
+                        rng.randint(2, 8)))
+    return actions
+
+
+def single_price_churn(num_actions, seed=0):
+    """
+    Every order is at one price. Asks queue up there, are cancelled from
+    anywhere in the queue and are taken from its front by small bids.
+    """
+    rng = random.Random(seed)
+    actions = []
+    for _ in range(num_actions):
+        action = rng.random()
+        user = rng.randrange(500)
+        if action < 0.45:
+            actions.append((INSERT, ASK, user, 50, 1))
+        elif action < 0.8:
+            actions.append((CANCEL_OLDEST, ASK, user, 50, 0))
+        else:
+            actions.append((INSERT, BID, 500 + rng.randrange(10), 50,
+                            rng.randint(1, 3)))
+    return actions
+
+
+# Generator and position limit of every workload by name
+WORKLOADS = {
+    "random_walk": (random_walk, 1_000_000),
+    "crossing": (crossing, 1_000_000),
+    "deep_sweeps": (deep_sweeps, 1_000_000),
+    "at_limit": (at_limit, 5),
+    "single_price_churn": (single_price_churn, 1_000_000),
+}
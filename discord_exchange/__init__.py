@@ -2,6 +2,9 @@ from discord_exchange.orderbook import Orderbook
 from discord_exchange.orderbook import Trade
 from discord_exchange.orderbook import Order
 from discord_exchange.binary_exchange import BinaryExchange
+from discord_exchange.exchange import Exchange, ShardedExchange
+from discord_exchange.gateway import OrderGateway
+from discord_exchange.load_client import LoadClient
 
 __version__ = "0.0.1"
 __author__ = "Franz Miltz"
\ No newline at end of file
@@ -1,6 +1,83 @@
-from . import Orderbook
+"""
+Trades a few orders and prints the book, or with --profile runs a seeded
+random session under cProfile and writes the busiest functions and the
+book's instrumentation to a file.
 
-if __name__ == "__main__":
+    python -m discord_exchange [--profile] [--orders N] [--output FILE]
+"""
+import argparse
+import cProfile
+import io
+import pstats
+import random
+from . import Orderbook, Order
+from .instrumentation import Instrumentation
+
+
+def session(num_orders, seed=0):
+    """
+    Yields a random session of 50 users quoting around 100 near their
+    limits, who now and then cancel or amend their oldest order.
+    """
+    rng = random.Random(seed)
+    for _ in range(num_orders):
+        roll = rng.random()
+        user = rng.randrange(50)
+        if roll < 0.1:
+            yield "cancel", user, None, None
+        elif roll < 0.2:
+            yield "amend", user, rng.randint(90, 110), rng.randint(1, 5)
+        else:
+            yield rng.choice((Order.TYPE_BID, Order.TYPE_ASK)), user, \
+                rng.randint(90, 110), rng.randint(1, 5)
+
+
+def replay(ob, actions):
+    for action, user, price, volume in actions:
+        if action == "cancel" or action == "amend":
+            resting = ob.get_user(user).resting
+            side = Order.TYPE_BID if resting[Order.TYPE_BID] \
+                else Order.TYPE_ASK
+            if not resting[side]:
+                continue
+            order_id = next(iter(resting[side]))
+            if action == "cancel":
+                ob.cancel(order_id)
+            else:
+                ob.amend(order_id, price, volume)
+        else:
+            ob.insert(action, user, price, volume)
+
+
+def profile(num_orders, output):
+    actions = list(session(num_orders))
+    profiler = cProfile.Profile()
+    profiler.runcall(replay, Orderbook(), actions)
+    summary = io.StringIO()
+    stats = pstats.Stats(profiler, stream=summary)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(30)
+
+    # Instrumentation is measured separately, so that neither skews the other
+    ob = Orderbook()
+    instrumentation = Instrumentation(ob)
+    replay(ob, actions)
+    metrics = instrumentation.as_dict()
+    summary.write(f"{'operation':>10} {'calls':>9} {'total ms':>9} "
+                  f"{'p50 ns':>8} {'p99 ns':>8}\n")
+    for name, operation in metrics["operations"].items():
+        summary.write(f"{name:>10} {operation['count']:>9} "
+                      f"{operation['sum_ns'] / 1e6:>9.1f} "
+                      f"{operation['p50_ns']:>8} {operation['p99_ns']:>8}\n")
+    summary.write("\n")
+    for name, value in metrics["counters"].items():
+        summary.write(f"{name:>15} {value:>9}\n")
+
+    with open(output, "w") as file:
+        file.write(summary.getvalue())
+    print(f"{num_orders} actions profiled, summary written to {output}")
+
+
+def demo():
     ob = Orderbook()
     trades = []
     trades.extend(ob.insert_bid(0, 100, 2))
@@ -13,3 +90,15 @@ if __name__ == "__main__":
     print(ob)
     for trade in trades:
         print("TRADE:", trade)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--output", default="profile.txt")
+    args = parser.parse_args()
+    if args.profile:
+        profile(args.orders, args.output)
+    else:
+        demo()
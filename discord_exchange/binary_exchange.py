@@ -1,9 +1,35 @@
-from discord_exchange.orderbook import Orderbook
+from discord_exchange.orderbook import Orderbook, TradeLog
+from discord_exchange.settlement import Settlement
+from discord_exchange.trade_history import TradeHistory
 
 
 class BinaryExchange:
-    def __init__(self, limit=5) -> None:
-        self.orderbook = Orderbook()
-        self.trades = []
-        self.positions = dict()
-        self.position_limit = limit
\ No newline at end of file
+    # Binary markets are priced from 0 to 100 in whole ticks
+    MAX_PRICE = 100
+
+    def __init__(self, limit=5,
+                 self_trade_mode=Orderbook.SELF_TRADE_CANCEL_NEWEST,
+                 history_path=None) -> None:
+        # Trades of users with themselves would only inflate the trade log
+        self.orderbook = Orderbook(position_limit=limit,
+                                   max_price=BinaryExchange.MAX_PRICE,
+                                   self_trade_mode=self_trade_mode)
+        # Markets given a path keep their full trade history on disk
+        self.trades = TradeLog() if history_path is None \
+            else TradeHistory(history_path)
+
+    def settlement(self) -> Settlement:
+        return Settlement(self.trades)
+
+    def close(self) -> None:
+        """
+        Writes out the trades of a history kept on disk.
+        """
+        if isinstance(self.trades, TradeHistory):
+            self.trades.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,156 @@
+import multiprocessing
+import zlib
+from discord_exchange.orderbook import Orderbook, Order, Trade, LimitExceeded
+
+
+class Exchange:
+    """
+    Many independent markets, each with its own order book, keyed by name.
+    """
+
+    def __init__(self, position_limit=10, tick_size=1, max_price=None,
+                 self_trade_mode=Orderbook.SELF_TRADE_ALLOW,
+                 limit_mode=Orderbook.LIMIT_TRIM) -> None:
+        self.markets = dict()
+        self.position_limit = position_limit
+        self.tick_size = tick_size
+        self.max_price = max_price
+        self.self_trade_mode = self_trade_mode
+        self.limit_mode = limit_mode
+
+    def market(self, name: str) -> Orderbook:
+        orderbook = self.markets.get(name, None)
+        if orderbook is None:
+            orderbook = Orderbook(position_limit=self.position_limit,
+                                  tick_size=self.tick_size,
+                                  max_price=self.max_price,
+                                  self_trade_mode=self.self_trade_mode,
+                                  limit_mode=self.limit_mode)
+            self.markets[name] = orderbook
+        return orderbook
+
+    def insert_bid(self, name: str, buyer_id: int, price: float, volume: int,
+                   time_in_force=Order.GOOD_TILL_CANCEL) -> list[Trade]:
+        return self.market(name).insert_bid(buyer_id, price, volume,
+                                            time_in_force)
+
+    def insert_ask(self, name: str, seller: int, price: float, volume: int,
+                   time_in_force=Order.GOOD_TILL_CANCEL) -> list[Trade]:
+        return self.market(name).insert_ask(seller, price, volume,
+                                            time_in_force)
+
+    def submit_batch(self, name: str, orders) -> list[Trade]:
+        return self.market(name).submit_batch(orders)
+
+
+def _run_worker(inbox, outbox, settings) -> None:
+    exchange = Exchange(**settings)
+    while (message := inbox.get()) is not None:
+        request_id, name, orders, time_in_force = message
+        try:
+            if time_in_force == Order.GOOD_TILL_CANCEL:
+                trades = exchange.submit_batch(name, orders)
+            else:
+                orderbook = exchange.market(name)
+                trades = []
+                for index, (side, user, price, volume) in enumerate(orders):
+                    try:
+                        trades += orderbook.insert(side, user, price, volume,
+                                                   time_in_force)
+                    except LimitExceeded as error:
+                        # As from submit_batch
+                        error.trades = trades
+                        error.index = index
+                        raise
+            outbox.put((request_id, trades))
+        except Exception as error:
+            # Trades a LimitExceeded holds are sent back with it
+            outbox.put((request_id, error))
+
+
+class ShardedExchange:
+    """
+    Runs markets in a pool of worker processes. Every market is owned by
+    exactly one worker, picked from a stable hash of its name, and each
+    worker handles its messages first in, first out, so orders within a
+    market are matched strictly in the order they were sent.
+
+    Markets are set up with the same settings as those of an Exchange.
+    """
+
+    def __init__(self, num_workers: int, position_limit=10, context=None,
+                 tick_size=1, max_price=None,
+                 self_trade_mode=Orderbook.SELF_TRADE_ALLOW,
+                 limit_mode=Orderbook.LIMIT_TRIM) -> None:
+        assert num_workers > 0
+        context = context or multiprocessing.get_context()
+        settings = dict(position_limit=position_limit, tick_size=tick_size,
+                        max_price=max_price, self_trade_mode=self_trade_mode,
+                        limit_mode=limit_mode)
+        self.outbox = context.Queue()
+        self.inboxes = [context.Queue() for _ in range(num_workers)]
+        self.workers = [
+            context.Process(target=_run_worker,
+                            args=(inbox, self.outbox, settings),
+                            daemon=True)
+            for inbox in self.inboxes]
+        self.num_requests = 0
+        # Replies that arrived while waiting for a different request
+        self.replies = dict()
+        for worker in self.workers:
+            worker.start()
+
+    def worker_of(self, name: str) -> int:
+        # hash() of a str differs between processes so it cannot be used
+        return zlib.crc32(name.encode()) % len(self.workers)
+
+    def send(self, name: str, orders,
+             time_in_force=Order.GOOD_TILL_CANCEL) -> int:
+        """
+        Queues (side, user, price, volume) orders for a market, all with
+        the same time in force, without waiting for them to be matched and
+        returns the request id.
+        """
+        request_id = self.num_requests
+        self.num_requests += 1
+        self.inboxes[self.worker_of(name)].put(
+            (request_id, name, list(orders), time_in_force))
+        return request_id
+
+    def receive(self, request_id: int) -> list[Trade]:
+        """
+        Waits for the trades of a request sent earlier.
+        """
+        while request_id not in self.replies:
+            reply_id, result = self.outbox.get()
+            self.replies[reply_id] = result
+        result = self.replies.pop(request_id)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def submit_batch(self, name: str, orders,
+                     time_in_force=Order.GOOD_TILL_CANCEL) -> list[Trade]:
+        return self.receive(self.send(name, orders, time_in_force))
+
+    def insert_bid(self, name: str, buyer_id: int, price: float, volume: int,
+                   time_in_force=Order.GOOD_TILL_CANCEL) -> list[Trade]:
+        return self.submit_batch(
+            name, [(Order.TYPE_BID, buyer_id, price, volume)], time_in_force)
+
+    def insert_ask(self, name: str, seller: int, price: float, volume: int,
+                   time_in_force=Order.GOOD_TILL_CANCEL) -> list[Trade]:
+        return self.submit_batch(
+            name, [(Order.TYPE_ASK, seller, price, volume)], time_in_force)
+
+    def close(self) -> None:
+        for inbox in self.inboxes:
+            inbox.put(None)
+        for worker in self.workers:
+            worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,145 @@
+import asyncio
+import math
+from discord_exchange.exchange import Exchange
+from discord_exchange.orderbook import Orderbook, Order, Trade
+
+
+def _match_batch(orderbook: Orderbook, orders: list[tuple]) -> list:
+    results = []
+    for side, user, price, volume, time_in_force in orders:
+        # Released between orders, so readers wait for one order at most
+        with orderbook.lock:
+            try:
+                results.append(orderbook.insert(side, user, price, volume,
+                                                time_in_force))
+            except Exception as error:
+                results.append(error)
+    return results
+
+
+class OrderGateway:
+    """
+    Asyncio front end to an Exchange. Every market has a bounded queue and
+    a single task that matches its orders, so a market's orders are matched
+    one at a time in arrival order.
+
+    Orders that are queued by the time the matching task runs are matched
+    together as one batch. When a market's queue is full, submit waits for
+    room.
+
+    Batches are matched in the loop's default executor, so a large sweep
+    does not stall the loop, and every order is matched holding its book's
+    lock. Reads that take the lock, such as the book's depth, its
+    leaderboards and RenderCache, see the book between orders. Without
+    offload, batches are matched on the loop itself.
+    """
+
+    def __init__(self, exchange=None, max_queue_size=1024, max_batch_size=256,
+                 offload=True) -> None:
+        self.exchange = exchange or Exchange()
+        self.max_queue_size = max_queue_size
+        self.max_batch_size = max_batch_size
+        self.offload = offload
+        self.queues = dict()
+        self.tasks = dict()
+        # Fills of every order submitted and not yet resolved
+        self.fills = set()
+
+    async def submit(self, market: str, side: int, user: int, price: float,
+                     volume: int,
+                     time_in_force=Order.GOOD_TILL_CANCEL) -> list[Trade]:
+        """
+        Queues an order and waits until it has been matched, returning the
+        trades it caused.
+        """
+        fill = asyncio.get_running_loop().create_future()
+        self.fills.add(fill)
+        try:
+            await self._queue(market).put(
+                ((side, user, price, volume, time_in_force), fill))
+            return await fill
+        finally:
+            self.fills.discard(fill)
+
+    async def insert_bid(self, market: str, buyer_id: int, price: float,
+                         volume: int) -> list[Trade]:
+        return await self.submit(market, Order.TYPE_BID, buyer_id, price, volume)
+
+    async def insert_ask(self, market: str, seller: int, price: float,
+                         volume: int) -> list[Trade]:
+        return await self.submit(market, Order.TYPE_ASK, seller, price, volume)
+
+    async def market_bid(self, market: str, buyer_id: int, volume: int,
+                         time_in_force=Order.IMMEDIATE_OR_CANCEL) -> list[Trade]:
+        return await self.submit(market, Order.TYPE_BID, buyer_id, math.inf,
+                                 volume, time_in_force)
+
+    async def market_ask(self, market: str, seller: int, volume: int,
+                         time_in_force=Order.IMMEDIATE_OR_CANCEL) -> list[Trade]:
+        return await self.submit(market, Order.TYPE_ASK, seller, 0, volume,
+                                 time_in_force)
+
+    def _queue(self, market: str) -> asyncio.Queue:
+        queue = self.queues.get(market, None)
+        if queue is None:
+            queue = asyncio.Queue(self.max_queue_size)
+            self.queues[market] = queue
+            self.tasks[market] = asyncio.create_task(self._match(market, queue))
+        return queue
+
+    async def _match(self, market: str, queue: asyncio.Queue) -> None:
+        orderbook = self.exchange.market(market)
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.max_batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            orders = [order for order, _ in batch]
+            if self.offload:
+                results = await loop.run_in_executor(
+                    None, _match_batch, orderbook, orders)
+            else:
+                results = _match_batch(orderbook, orders)
+            for (_, fill), result in zip(batch, results):
+                # The submitter may have given up waiting
+                if fill.done():
+                    continue
+                if isinstance(result, Exception):
+                    fill.set_exception(result)
+                else:
+                    fill.set_result(result)
+            for _ in batch:
+                queue.task_done()
+
+    async def drain(self) -> None:
+        """
+        Waits until every order queued so far has been matched.
+        """
+        await asyncio.gather(*(queue.join() for queue in self.queues.values()))
+
+    async def close(self) -> None:
+        """
+        Stops matching. Orders that were not matched yet, including those
+        waiting for room in a queue, are cancelled.
+        """
+        for task in self.tasks.values():
+            task.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        while self.fills:
+            for fill in self.fills:
+                fill.cancel()
+            # Taking orders off a full queue lets a waiting submitter put
+            # its own, which then sees its fill cancelled
+            for queue in self.queues.values():
+                while not queue.empty():
+                    queue.get_nowait()
+                    queue.task_done()
+            await asyncio.sleep(0)
+        self.tasks.clear()
+        self.queues.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
@@ -0,0 +1,168 @@
+import time
+from discord_exchange.orderbook import Orderbook
+
+# Operations timed by Instrumentation, as (name, method of Orderbook)
+OPERATIONS = (
+    ("insert", "insert"),
+    ("cancel", "cancel"),
+    ("amend", "amend"),
+    ("match", "_match"),
+    ("rest", "_rest"),
+    ("trim", "_trim_excess"),
+    ("discard", "_discard_order"),
+    ("new_level", "_new_level"),
+    ("get_user", "get_user"),
+    ("best_bid", "best_bid"),
+    ("best_ask", "best_ask"),
+)
+COUNTERS = ("trades", "levels_created", "levels_removed", "volume_trimmed",
+            "users_created")
+# What a call did is read off the book before and after it, as (counter,
+# measure of the book and the call's arguments) by operation
+MEASURES = {
+    "match": ("trades", lambda book, args: len(args[2])),
+    "new_level": ("levels_created",
+                  lambda book, args: len(book.levels[args[0]])),
+    "discard": ("levels_removed",
+                lambda book, args: -len(book.levels[args[0].type])),
+    "trim": ("volume_trimmed",
+             lambda book, args: -book.total_volumes[args[1]]),
+    "get_user": ("users_created", lambda book, args: len(book.users)),
+}
+
+
+class Histogram:
+    """
+    Counts durations in nanoseconds in buckets of powers of two: bucket i
+    holds durations below 2 ** i that are not in a lower bucket.
+    """
+
+    NUM_BUCKETS = 64
+
+    def __init__(self) -> None:
+        self.buckets = [0] * Histogram.NUM_BUCKETS
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, ns: int) -> None:
+        self.buckets[ns.bit_length()] += 1
+        self.count += 1
+        self.sum += ns
+
+    def quantile(self, q: float) -> int:
+        """
+        Returns an upper bound of the q-quantile, the bound of the bucket it
+        falls in.
+        """
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return 2 ** i
+        return 2 ** (Histogram.NUM_BUCKETS - 1)
+
+
+class Instrumentation:
+    """
+    Counts what an order book does and how long it takes, per operation.
+
+    The book is not changed: instrumentation replaces the methods it times
+    with timed wrappers on the book instance, and detach removes them again.
+    Books without instrumentation therefore run exactly the same code as
+    before, at no cost. Operations nest, so the time of an insert includes
+    that of its matching and resting.
+
+    Besides the operations, it counts trades, price levels created and
+    removed, volume trimmed off orders over the position limit and users
+    created by get_user.
+    """
+
+    def __init__(self, orderbook: Orderbook,
+                 clock=time.perf_counter_ns) -> None:
+        assert "insert" not in vars(orderbook), "book is already instrumented"
+        self.orderbook = orderbook
+        self.clock = clock
+        self.histograms = {name: Histogram() for name, _ in OPERATIONS}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        for name, method in OPERATIONS:
+            setattr(orderbook, method,
+                    self._timed(name, getattr(orderbook, method)))
+
+    def _timed(self, name: str, method):
+        histogram = self.histograms[name]
+        clock = self.clock
+        counters = self.counters
+        book = self.orderbook
+        if name not in MEASURES:
+            def timed(*args, **kwargs):
+                start = clock()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    histogram.observe(clock() - start)
+            return timed
+        counter, measure = MEASURES[name]
+
+        def timed(*args, **kwargs):
+            before = measure(book, args)
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                histogram.observe(clock() - start)
+                counters[counter] += measure(book, args) - before
+        return timed
+
+    def detach(self) -> None:
+        """
+        Puts the book's own methods back. The counts are kept.
+        """
+        for _, method in OPERATIONS:
+            vars(self.orderbook).pop(method, None)
+
+    def as_dict(self) -> dict:
+        """
+        Returns the counters and, for every operation, the number of calls,
+        the time spent and upper bounds of the median and 99th percentile in
+        nanoseconds.
+        """
+        operations = dict()
+        for name, histogram in self.histograms.items():
+            operations[name] = {
+                "count": histogram.count,
+                "sum_ns": histogram.sum,
+                "p50_ns": histogram.quantile(0.5),
+                "p99_ns": histogram.quantile(0.99),
+            }
+        return {"counters": dict(self.counters), "operations": operations}
+
+    def prometheus(self, prefix="orderbook") -> str:
+        """
+        Returns the counters and histograms in the Prometheus text format,
+        with durations in seconds.
+        """
+        metric = f"{prefix}_operation_seconds"
+        lines = [f"# HELP {metric} Time spent in order book operations.",
+                 f"# TYPE {metric} histogram"]
+        for name, histogram in self.histograms.items():
+            # Buckets above the longest duration add nothing
+            last = max((i for i, count in enumerate(histogram.buckets)
+                        if count), default=0)
+            cumulative = 0
+            for i in range(last + 1):
+                cumulative += histogram.buckets[i]
+                lines.append(f'{metric}_bucket{{operation="{name}",'
+                             f'le="{2 ** i / 1e9:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{operation="{name}",le="+Inf"}} '
+                         f'{histogram.count}')
+            lines.append(f'{metric}_sum{{operation="{name}"}} '
+                         f'{histogram.sum / 1e9:g}')
+            lines.append(f'{metric}_count{{operation="{name}"}} '
+                         f'{histogram.count}')
+        for name, value in self.counters.items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,198 @@
+import math
+import os
+import struct
+from discord_exchange.orderbook import Orderbook, Order, TradeLog
+
+
+def whole(value: float):
+    """
+    Returns a float read back from a file as the int it was written from,
+    if it is whole.
+    """
+    return int(value) if value.is_integer() else value
+
+
+class Journal:
+    """
+    Append-only log of everything that changes an Orderbook, written ahead
+    of the change so the book can be rebuilt by replaying it.
+
+    The file starts with a header holding the book's position limit, limit
+    mode, tick size, price range and self-trade mode and continues with
+    fixed-width records. Records are buffered and, depending on the fsync
+    policy, forced to disk after every record, after every group of
+    group_size records, or left to the operating system.
+    """
+
+    MAGIC = b"DXJ1"
+    VERSION = 5
+    # magic, version, self-trade mode, limit mode, position limit, tick size,
+    # max price or NaN for none
+    HEADER = struct.Struct("<4sHBBqdd")
+    # kind, side, time in force, id, user, counterparty, price, volume
+    RECORD = struct.Struct("<BBBxxxxxqqqdq")
+
+    KIND_ORDER = 0
+    KIND_CANCEL = 1
+    KIND_AMEND = 2
+    KIND_TRADE = 3
+
+    FSYNC_ALWAYS = 0
+    FSYNC_GROUP = 1
+    FSYNC_NEVER = 2
+
+    def __init__(self, path, position_limit=10, fsync=FSYNC_GROUP,
+                 group_size=256, tick_size=1, max_price=None,
+                 self_trade_mode=Orderbook.SELF_TRADE_ALLOW,
+                 limit_mode=Orderbook.LIMIT_TRIM) -> None:
+        self.path = path
+        self.fsync = fsync
+        self.group_size = group_size
+        self.pending = 0
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            (self.position_limit, self.tick_size, self.max_price,
+             self.self_trade_mode, self.limit_mode) = \
+                Journal.read_header(path)
+            # Drop a record cut short by a crash so new records stay aligned
+            size = os.path.getsize(path) - Journal.HEADER.size
+            os.truncate(path, Journal.HEADER.size
+                        + size - size % Journal.RECORD.size)
+        else:
+            self.position_limit = position_limit
+            self.tick_size = tick_size
+            self.max_price = max_price
+            self.self_trade_mode = self_trade_mode
+            self.limit_mode = limit_mode
+        self.file = open(path, "ab")
+        if not exists:
+            self.file.write(Journal.HEADER.pack(
+                Journal.MAGIC, Journal.VERSION, self_trade_mode, limit_mode,
+                position_limit, tick_size,
+                math.nan if max_price is None else max_price))
+            self._commit()
+
+    @staticmethod
+    def read_header(path) -> tuple[int, float, float, int, int]:
+        """
+        Returns the position limit, tick size, max price, self-trade mode and
+        limit mode of the journalled book.
+        """
+        with open(path, "rb") as file:
+            (magic, version, self_trade_mode, limit_mode, position_limit,
+             tick_size, max_price) = Journal.HEADER.unpack(
+                file.read(Journal.HEADER.size))
+        assert magic == Journal.MAGIC and version == Journal.VERSION
+        return position_limit, whole(tick_size), \
+            None if math.isnan(max_price) else whole(max_price), \
+            self_trade_mode, limit_mode
+
+    def matches(self, orderbook: Orderbook) -> bool:
+        """
+        Returns whether the journal was written for a book with the same
+        settings as orderbook, so that replaying it rebuilds that book.
+        """
+        return (self.position_limit, self.tick_size, self.max_price,
+                self.self_trade_mode, self.limit_mode) == \
+            (orderbook.position_limit, orderbook.tick_size,
+             orderbook.max_price, orderbook.self_trade_mode,
+             orderbook.limit_mode)
+
+    def _append(self, *fields) -> None:
+        self.file.write(Journal.RECORD.pack(*fields))
+        self.pending += 1
+        if self.fsync == Journal.FSYNC_ALWAYS or \
+                (self.fsync == Journal.FSYNC_GROUP and
+                 self.pending >= self.group_size):
+            self._commit()
+
+    def log_order(self, order: Order,
+                  time_in_force=Order.GOOD_TILL_CANCEL) -> None:
+        self._append(Journal.KIND_ORDER, order.type, time_in_force, order.id,
+                     order.user_id, 0, order.price, order.volume)
+
+    def log_cancel(self, order_id: int) -> None:
+        self._append(Journal.KIND_CANCEL, 0, 0, order_id, 0, 0, 0, 0)
+
+    def log_amend(self, order_id: int, price: float, volume: int) -> None:
+        self._append(Journal.KIND_AMEND, 0, 0, order_id, 0, 0, price, volume)
+
+    def log_trades(self, trades) -> None:
+        for trade in trades:
+            self._append(Journal.KIND_TRADE, 0, 0, trade.id, trade.buyer,
+                         trade.seller, trade.price, trade.volume)
+
+    def _commit(self) -> None:
+        self.file.flush()
+        if self.fsync != Journal.FSYNC_NEVER:
+            os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def flush(self) -> None:
+        self._commit()
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self._commit()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @staticmethod
+    def records(path, offset=None):
+        """
+        Iterates over the records of a journal, starting after the header
+        or at the given byte offset. A record cut short by a crash while it
+        was being written ends the journal.
+        """
+        with open(path, "rb") as file:
+            file.seek(Journal.HEADER.size if offset is None else offset)
+            while len(data := file.read(Journal.RECORD.size)) == \
+                    Journal.RECORD.size:
+                yield Journal.RECORD.unpack(data)
+
+    @staticmethod
+    def replay(path, orderbook: Orderbook, trades=None, offset=None) -> None:
+        """
+        Applies the orders, cancels and amendments in a journal to an order
+        book and appends the trades they cause to trades, if given.
+
+        Matching is deterministic, so the trades are those that were
+        journalled. They are taken from the replay rather than from the
+        trade records, which a crash may have cut off.
+        """
+        if trades is None:
+            trades = []
+        for kind, side, time_in_force, record_id, user, _, price, volume in \
+                Journal.records(path, offset):
+            if kind == Journal.KIND_ORDER:
+                # Ids are handed out by the book so replaying in order
+                # reproduces them
+                assert orderbook.order_ids.value == record_id
+                trades.extend(orderbook.insert(side, user, price, volume,
+                                               time_in_force))
+            elif kind == Journal.KIND_CANCEL:
+                orderbook.cancel(record_id)
+            elif kind == Journal.KIND_AMEND:
+                trades.extend(orderbook.amend(record_id, price, volume))
+
+
+def recover(path, fsync=Journal.FSYNC_GROUP) -> tuple[Orderbook, TradeLog]:
+    """
+    Rebuilds an order book and its trade history from a journal and
+    attaches a journal to the book so that it continues where it left off.
+    """
+    position_limit, tick_size, max_price, self_trade_mode, limit_mode = \
+        Journal.read_header(path)
+    orderbook = Orderbook(position_limit=position_limit, tick_size=tick_size,
+                          max_price=max_price,
+                          self_trade_mode=self_trade_mode,
+                          limit_mode=limit_mode)
+    trades = TradeLog()
+    Journal.replay(path, orderbook, trades)
+    orderbook.journal = Journal(path, fsync=fsync)
+    return orderbook, trades
@@ -0,0 +1,64 @@
+import asyncio
+import random
+import time
+from discord_exchange.orderbook import Order
+
+
+class LoadClient:
+    """
+    Stands in for the Discord bot when exercising an OrderGateway: a number
+    of simulated users concurrently submit seeded random orders to a set of
+    markets, each waiting for its fills before sending its next order.
+    """
+
+    def __init__(self, gateway, markets=("market",), num_users=50,
+                 mid_price=100, spread=10, max_volume=5, seed=0) -> None:
+        self.gateway = gateway
+        self.markets = list(markets)
+        self.num_users = num_users
+        self.mid_price = mid_price
+        self.spread = spread
+        self.max_volume = max_volume
+        self.rng = random.Random(seed)
+        self.num_orders = 0
+        self.num_trades = 0
+        self.latencies = []
+
+    def random_order(self) -> tuple:
+        rng = self.rng
+        return (rng.choice(self.markets),
+                rng.choice((Order.TYPE_BID, Order.TYPE_ASK)),
+                rng.randrange(self.num_users),
+                self.mid_price + rng.randint(-self.spread, self.spread),
+                rng.randint(1, self.max_volume))
+
+    async def _user_session(self, orders: list[tuple]) -> None:
+        for market, side, user, price, volume in orders:
+            start = time.perf_counter()
+            trades = await self.gateway.submit(market, side, user, price, volume)
+            self.latencies.append(time.perf_counter() - start)
+            self.num_orders += 1
+            self.num_trades += len(trades)
+
+    async def run(self, num_orders: int, concurrency=10) -> dict:
+        """
+        Submits num_orders orders from concurrency simultaneous sessions and
+        returns throughput and latency figures.
+        """
+        # Orders are drawn up front so that the workload does not depend on
+        # how the sessions happen to be scheduled
+        sessions = [[] for _ in range(concurrency)]
+        for i in range(num_orders):
+            sessions[i % concurrency].append(self.random_order())
+        start = time.perf_counter()
+        await asyncio.gather(*map(self._user_session, sessions))
+        elapsed = time.perf_counter() - start
+        latencies = sorted(self.latencies)
+        return {
+            "orders": self.num_orders,
+            "trades": self.num_trades,
+            "seconds": elapsed,
+            "orders_per_second": self.num_orders / elapsed if elapsed else 0,
+            "p50_latency": latencies[len(latencies) // 2] if latencies else 0,
+            "max_latency": latencies[-1] if latencies else 0,
+        }
@@ -0,0 +1,258 @@
+import asyncio
+import threading
+from collections import deque
+from discord_exchange.orderbook import Orderbook, Order, Trade, Sequence
+
+
+class LevelUpdate:
+    """
+    The new state of one price level. A volume of 0 means that the level is
+    gone.
+    """
+    __slots__ = ("sequence", "side", "price", "volume", "num_orders")
+
+    def __init__(self, sequence, side, price, volume, num_orders) -> None:
+        self.sequence = sequence
+        self.side = side
+        self.price = price
+        self.volume = volume
+        self.num_orders = num_orders
+
+    def __repr__(self) -> str:
+        side = "BID" if self.side == Order.TYPE_BID else "ASK"
+        return f"LevelUpdate(#{self.sequence} {side} {self.volume}@{self.price})"
+
+
+class TradeUpdate:
+    __slots__ = ("sequence", "trade")
+
+    def __init__(self, sequence, trade: Trade) -> None:
+        self.sequence = sequence
+        self.trade = trade
+
+    def __repr__(self) -> str:
+        return f"TradeUpdate(#{self.sequence} {self.trade})"
+
+
+class OrderAck:
+    """
+    Confirms that the book accepted an order, a cancel or an amendment,
+    with the volume the order traded and the volume it left resting.
+    """
+    __slots__ = ("sequence", "status", "order_id", "user", "side", "price",
+                 "filled", "resting")
+
+    NEW = 0
+    CANCELLED = 1
+    AMENDED = 2
+
+    def __init__(self, sequence, status, order_id, user, side, price, filled,
+                 resting) -> None:
+        self.sequence = sequence
+        self.status = status
+        self.order_id = order_id
+        self.user = user
+        self.side = side
+        self.price = price
+        self.filled = filled
+        self.resting = resting
+
+    def __repr__(self) -> str:
+        return f"OrderAck(#{self.sequence} status {self.status} order " \
+            f"{self.order_id} filled {self.filled} resting {self.resting})"
+
+
+class MarketDataFeed:
+    """
+    Publishes every change to an order book as a stream of events, so that
+    subscribers can mirror the book from deltas alone.
+
+    After every insert, cancel or amendment, subscribers get one list: the
+    OrderAck, a TradeUpdate per trade and a LevelUpdate for every level
+    whose volume or number of orders changed. Events are numbered in the
+    order they were published. A subscriber is any callable taking such a
+    list. It is called while the book is being changed, so it must not block.
+    Subscription buffers and conflates events for consumers that may fall
+    behind.
+    """
+
+    def __init__(self, orderbook: Orderbook) -> None:
+        self.orderbook = orderbook
+        self.sequence = Sequence()
+        self.subscribers = []
+        # Levels the book touched since the last publication, as (side,
+        # ticks), filled in by the book
+        self.changed = set()
+        # (volume, number of orders) of every level last published, by side
+        self.levels = (dict(), dict())
+        orderbook.feed = self
+        # Levels already in the book are published to every new subscriber
+        for side in (Order.TYPE_BID, Order.TYPE_ASK):
+            self.changed.update((side, ticks)
+                                for ticks in orderbook.levels[side])
+        self._level_updates()
+
+    def subscribe(self, subscriber) -> None:
+        """
+        Adds a subscriber and passes it the current levels as LevelUpdates,
+        so that it starts from the same state as the book. They carry the
+        number of the last event published.
+        """
+        events = []
+        for side in (Order.TYPE_BID, Order.TYPE_ASK):
+            for ticks, (volume, num_orders) in self.levels[side].items():
+                events.append(LevelUpdate(self.sequence.value - 1, side,
+                                          self.orderbook.to_price(ticks),
+                                          volume, num_orders))
+        if events:
+            subscriber(events)
+        self.subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber) -> None:
+        self.subscribers.remove(subscriber)
+
+    def _level_updates(self) -> list[LevelUpdate]:
+        updates = []
+        book = self.orderbook
+        for side, ticks in sorted(self.changed):
+            level = book.levels[side].get(ticks, None)
+            state = (0, 0) if level is None else (level.volume,
+                                                   level.num_orders)
+            published = self.levels[side]
+            if published.get(ticks, (0, 0)) == state:
+                continue
+            if level is None:
+                del published[ticks]
+            else:
+                published[ticks] = state
+            updates.append(LevelUpdate(self.sequence.next(), side,
+                                       book.to_price(ticks), *state))
+        self.changed.clear()
+        return updates
+
+    def order_inserted(self, order: Order, trades) -> None:
+        self._publish(OrderAck.NEW, order, trades)
+
+    def order_cancelled(self, order: Order) -> None:
+        self._publish(OrderAck.CANCELLED, order, ())
+
+    def order_amended(self, order: Order, trades) -> None:
+        self._publish(OrderAck.AMENDED, order, trades)
+
+    def _publish(self, status: int, order: Order, trades) -> None:
+        resting = order.volume if self.orderbook.orders.get(order.id, None) \
+            is order else 0
+        events = [OrderAck(self.sequence.next(), status, order.id,
+                           order.user_id, order.type, order.price,
+                           sum(trade.volume for trade in trades), resting)]
+        events.extend(TradeUpdate(self.sequence.next(), trade)
+                      for trade in trades)
+        events.extend(self._level_updates())
+        for subscriber in self.subscribers:
+            subscriber(events)
+
+
+class Subscription:
+    """
+    A bounded buffer of events for a consumer that reads at its own pace,
+    either by polling or as an async iterator of event lists. Publishing
+    never blocks.
+
+    Level updates are conflated: only the latest update of every level is
+    kept, which is all a mirror needs. Trades and acks are kept in a ring
+    buffer of capacity events, the oldest being dropped and counted once it
+    is full. Events may be published from any thread.
+    """
+
+    def __init__(self, capacity=1024, loop=None) -> None:
+        self.capacity = capacity
+        self.events = deque(maxlen=capacity)
+        # Latest pending update by (side, price)
+        self.levels = dict()
+        self.dropped = 0
+        self.conflated = 0
+        self.lock = threading.Lock()
+        self.loop = loop
+        # Made by the first wait, on the loop, since the subscription may be
+        # made before the loop runs
+        self.ready = None
+
+    def __call__(self, events) -> None:
+        with self.lock:
+            for event in events:
+                if isinstance(event, LevelUpdate):
+                    key = (event.side, event.price)
+                    if key in self.levels:
+                        self.conflated += 1
+                    self.levels[key] = event
+                else:
+                    if len(self.events) == self.capacity:
+                        self.dropped += 1
+                    self.events.append(event)
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self) -> None:
+        if self.ready is not None:
+            self.ready.set()
+
+    def poll(self) -> list:
+        """
+        Returns and removes every pending event, trades and acks first.
+        """
+        with self.lock:
+            events = list(self.events)
+            events.extend(self.levels.values())
+            self.events.clear()
+            self.levels.clear()
+            if self.ready is not None:
+                self.ready.clear()
+        return events
+
+    def __aiter__(self):
+        assert self.loop is not None, "async iteration needs a loop"
+        return self
+
+    async def __anext__(self) -> list:
+        while True:
+            # Events published before the first wait set no event
+            events = self.poll()
+            if events:
+                return events
+            if self.ready is None:
+                self.ready = asyncio.Event()
+            await self.ready.wait()
+
+
+class BookMirror:
+    """
+    A local copy of the levels of a book, kept up to date from the events
+    of its feed.
+    """
+
+    def __init__(self) -> None:
+        # (volume, number of orders) by price, by side
+        self.levels = (dict(), dict())
+        self.trades = []
+
+    def __call__(self, events) -> None:
+        for event in events:
+            if isinstance(event, LevelUpdate):
+                levels = self.levels[event.side]
+                if event.volume:
+                    levels[event.price] = (event.volume, event.num_orders)
+                else:
+                    levels.pop(event.price, None)
+            elif isinstance(event, TradeUpdate):
+                self.trades.append(event.trade)
+
+    def depth(self, n=None) -> tuple[list[tuple], list[tuple]]:
+        """
+        Returns levels like Orderbook.depth.
+        """
+        bids = sorted(self.levels[Order.TYPE_BID].items(), reverse=True)
+        asks = sorted(self.levels[Order.TYPE_ASK].items())
+        return ([(price, volume, num_orders)
+                 for price, (volume, num_orders) in bids[:n]],
+                [(price, volume, num_orders)
+                 for price, (volume, num_orders) in asks[:n]])
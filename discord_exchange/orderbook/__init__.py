@@ -1,4 +1,10 @@
-from discord_exchange.orderbook.orderbook import Orderbook
+from discord_exchange.orderbook.orderbook import Orderbook, LimitExceeded
 from discord_exchange.orderbook.user_data import UserData
 from discord_exchange.orderbook.order import Order
-from discord_exchange.orderbook.trade import Trade
\ No newline at end of file
+from discord_exchange.orderbook.trade import Trade
+from discord_exchange.orderbook.price_ladder import PriceLadder
+from discord_exchange.orderbook.price_bitmap import PriceBitmap
+from discord_exchange.orderbook.price_level import PriceLevel
+from discord_exchange.orderbook.trade_log import TradeLog
+from discord_exchange.orderbook.sequence import Sequence
+from discord_exchange.orderbook.leaderboard import Leaderboard
\ No newline at end of file
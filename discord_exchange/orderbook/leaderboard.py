@@ -0,0 +1,158 @@
+import threading
+from bisect import bisect_left, insort
+
+
+class Leaderboard:
+    """
+    Users ranked by one of their UserData attributes, highest first with
+    ties broken by user id, kept sorted as the users change.
+
+    Entries are held in sorted buckets of at most 2 * LOAD entries, found by
+    bisecting the largest entry of every bucket, with a Fenwick tree over
+    the bucket sizes. Updating a user, finding a user's rank and finding the
+    entry at a rank are O(log n) plus a bounded shift within one bucket, and
+    the top k entries O(log n + k).
+
+    Ranks are read under lock, which a book shares with its leaderboards,
+    so they are not read while a trade is updating them.
+    """
+
+    LOAD = 512
+
+    def __init__(self, metric: str, users=(), lock=None) -> None:
+        self.metric = metric
+        self.lock = threading.RLock() if lock is None else lock
+        # Current key of every ranked user
+        self.keys = dict()
+        for user in users:
+            self.keys[user.identifier] = self._key(user)
+        entries = sorted(self.keys.values())
+        self.buckets = [entries[i:i + Leaderboard.LOAD]
+                        for i in range(0, len(entries), Leaderboard.LOAD)]
+        self.maxes = [bucket[-1] for bucket in self.buckets]
+        self._index()
+
+    def _key(self, user) -> tuple:
+        return (-getattr(user, self.metric), user.identifier)
+
+    def _index(self) -> None:
+        tree = [len(bucket) for bucket in self.buckets]
+        for i in range(len(tree)):
+            parent = i | (i + 1)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self.tree = tree
+
+    def _add(self, i: int, delta: int) -> None:
+        tree = self.tree
+        while i < len(tree):
+            tree[i] += delta
+            i |= i + 1
+
+    def _count_before(self, i: int) -> int:
+        """
+        Returns the number of entries in the buckets before bucket i.
+        """
+        count = 0
+        tree = self.tree
+        while i > 0:
+            count += tree[i - 1]
+            i &= i - 1
+        return count
+
+    def update(self, user) -> None:
+        """
+        Ranks a user by the current value of the metric.
+        """
+        key = self._key(user)
+        old = self.keys.get(user.identifier, None)
+        if old == key:
+            return
+        if old is not None:
+            self._remove(old)
+        self._insert(key)
+        self.keys[user.identifier] = key
+
+    def _insert(self, key) -> None:
+        if not self.buckets:
+            self.buckets.append([key])
+            self.maxes.append(key)
+            self._index()
+            return
+        i = min(bisect_left(self.maxes, key), len(self.buckets) - 1)
+        bucket = self.buckets[i]
+        insort(bucket, key)
+        self.maxes[i] = bucket[-1]
+        if len(bucket) > 2 * Leaderboard.LOAD:
+            self.buckets[i:i + 1] = [bucket[:Leaderboard.LOAD],
+                                     bucket[Leaderboard.LOAD:]]
+            self.maxes.insert(i, bucket[Leaderboard.LOAD - 1])
+            self._index()
+        else:
+            self._add(i, 1)
+
+    def _remove(self, key) -> None:
+        i = bisect_left(self.maxes, key)
+        bucket = self.buckets[i]
+        j = bisect_left(bucket, key)
+        assert bucket[j] == key
+        del bucket[j]
+        if bucket:
+            self.maxes[i] = bucket[-1]
+            self._add(i, -1)
+        else:
+            del self.buckets[i]
+            del self.maxes[i]
+            self._index()
+
+    def _locate(self, rank: int) -> tuple[int, int]:
+        """
+        Returns the bucket holding the entry at a rank and its offset there.
+        """
+        assert 0 <= rank < len(self)
+        tree = self.tree
+        i = 0
+        step = 1 << len(tree).bit_length() - 1
+        while step:
+            if i + step <= len(tree) and tree[i + step - 1] <= rank:
+                i += step
+                rank -= tree[i - 1]
+            step >>= 1
+        return i, rank
+
+    def rank(self, user_id: int) -> int:
+        """
+        Returns the 0-based rank of a user, who must have been ranked.
+        """
+        with self.lock:
+            key = self.keys[user_id]
+            i = bisect_left(self.maxes, key)
+            return self._count_before(i) + bisect_left(self.buckets[i], key)
+
+    def at(self, rank: int) -> tuple:
+        """
+        Returns the (user id, value) at a 0-based rank.
+        """
+        with self.lock:
+            i, j = self._locate(rank)
+            value, user_id = self.buckets[i][j]
+        return user_id, -value
+
+    def top(self, k: int) -> list[tuple]:
+        """
+        Returns the (user id, value) of the k highest ranked users.
+        """
+        entries = []
+        with self.lock:
+            for bucket in self.buckets:
+                if len(entries) >= k:
+                    break
+                entries.extend((user_id, -value)
+                               for value, user_id in bucket[:k - len(entries)])
+        return entries
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self.keys
@@ -1,29 +1,44 @@
 class Order:
-
-    # Each order has a sequence number
-    num_order_updates = 0
+    __slots__ = ("id", "type", "user_id", "price", "ticks", "volume",
+                 "updated_at", "level", "prev", "next")
 
     # We may add more order types in the future
     TYPE_BID = 0
     TYPE_ASK = 1
+    # Change in position per unit traded, by type
+    SIGNS = (1, -1)
+
+    # Time in force: what happens to volume that does not trade right away.
+    # It rests in the book, is cancelled, or the whole order is cancelled
+    # unless it can be filled completely.
+    GOOD_TILL_CANCEL = 0
+    IMMEDIATE_OR_CANCEL = 1
+    FILL_OR_KILL = 2
 
-    def __init__(self, order_type, user, price, volume) -> None:
+    def __init__(self, order_type, user, price, volume,
+                 order_id=None, updated_at=0, ticks=None) -> None:
+        self.id = order_id
         self.type = order_type
         self.user_id = user
         self.price = price
+        # The price as a whole number of the book's ticks, which the book
+        # compares and keys its levels by
+        self.ticks = price if ticks is None else ticks
         self.volume = volume
-        self._register_update()
+        # The price level this order is resting in and its neighbours there
+        self.level = None
+        self.prev = None
+        self.next = None
+        # The number of the book's latest update to this order, which the
+        # book sets from its own sequence
+        self.updated_at = updated_at
 
     def update_volume(self, new_volume) -> None:
         assert 0 <= new_volume < self.volume
-        self.volume = new_volume
-        self._register_update()
+        self.reduce_volume(self.volume - new_volume)
 
     def reduce_volume(self, volume_delta) -> None:
         assert 0 < volume_delta <= self.volume
         self.volume -= volume_delta
-        self._register_update()
-
-    def _register_update(self) -> None:
-        self.updated_at = Order.num_order_updates
-        Order.num_order_updates += 1
+        if self.level is not None:
+            self.level.reduce_volume(self, volume_delta)
@@ -1,175 +1,613 @@
+import math
+import threading
 from discord_exchange.orderbook.user_data import UserData
-from queue import PriorityQueue
-from collections import deque
-from typing import Deque
+from discord_exchange.orderbook.leaderboard import Leaderboard
+from discord_exchange.orderbook.price_ladder import PriceLadder
+from discord_exchange.orderbook.price_bitmap import PriceBitmap
+from discord_exchange.orderbook.price_level import PriceLevel
+from discord_exchange.orderbook.sequence import Sequence
 from discord_exchange.orderbook.trade import Trade
 from discord_exchange.orderbook.order import Order
 
 
+class LimitExceeded(Exception):
+    """
+    Raised for an order refused because it could take its user over the
+    position limit. Raised from a batch, it holds the trades of the orders
+    before the refused one and the refused order's index in the batch.
+    """
+
+    trades = ()
+    index = 0
+
+
 class Orderbook:
-    def __init__(self, position_limit=10) -> None:
-        self.bid_prices = PriorityQueue()
-        self.ask_prices = PriorityQueue()
+    """
+    Matches bids and asks in price then time priority, trading at the price
+    of the resting order.
+
+    Books given a max_price only take prices from 0 to max_price. They keep
+    a level for every tick of that range in an array and find the best
+    prices from bitmaps of the occupied levels, which suits small bounded
+    markets such as binary markets priced from 0 to 100.
+
+    By default users may trade with themselves. With self-trade prevention,
+    an order that reaches a resting order of its own user has the rest of
+    its volume cancelled, cancels the resting order and carries on, or has
+    both reduced by the smaller of their volumes without trading.
+    """
+
+    # Orders over a user's limit trim the user's oldest orders on that side
+    LIMIT_TRIM = 0
+    # Orders that could take a user over the limit are refused
+    LIMIT_REJECT = 1
+
+    # Self-trade prevention modes
+    SELF_TRADE_ALLOW = 0
+    SELF_TRADE_CANCEL_NEWEST = 1
+    SELF_TRADE_CANCEL_OLDEST = 2
+    SELF_TRADE_DECREMENT_BOTH = 3
+
+    def __init__(self, position_limit=10, journal=None,
+                 limit_mode=LIMIT_TRIM, tick_size=1, max_price=None,
+                 self_trade_mode=SELF_TRADE_ALLOW) -> None:
+        # Prices are multiples of the tick size and are held as whole
+        # numbers of ticks, so equal prices always meet at the same level
+        self.tick_size = tick_size
+        inverse = 1 / tick_size
+        # Dividing by a whole number of ticks per unit gives the closest
+        # float to a price, multiplying by a fractional tick size may not
+        self.ticks_per_unit = round(inverse) \
+            if tick_size < 1 and abs(inverse - round(inverse)) < 1e-9 else None
+        self.max_price = max_price
+        if max_price is None:
+            self.num_ticks = None
+            self.dense_levels = None
+            self.bid_prices = PriceLadder(descending=True)
+            self.ask_prices = PriceLadder()
+        else:
+            self.num_ticks = self.to_ticks(max_price) + 1
+            # Levels are made once and reused whenever their price is
+            # occupied again
+            self.dense_levels = tuple([PriceLevel()
+                                       for _ in range(self.num_ticks)]
+                                      for _ in range(2))
+            self.bid_prices = PriceBitmap(self.num_ticks, descending=True)
+            self.ask_prices = PriceBitmap(self.num_ticks)
+        # Occupied levels by price in ticks
         self.bids = dict()
         self.asks = dict()
-        self.total_bid_volume = 0
-        self.total_ask_volume = 0
+        # Both sides indexed by order type, so matching is written once
+        self.ladders = (self.bid_prices, self.ask_prices)
+        self.levels = (self.bids, self.asks)
+        self.total_volumes = [0, 0]
         self.users = dict()
         self.position_limit = position_limit
+        self.limit_mode = limit_mode
+        self.self_trade_mode = self_trade_mode
+        # Rankings of users by UserData attribute, kept up to date by trades
+        self.leaderboards = dict()
+        # Resting orders by id
+        self.orders = dict()
+        # Ids and update numbers are only unique within a single book
+        self.order_ids = Sequence()
+        self.order_updates = Sequence()
+        self.trade_ids = Sequence()
+        # Records every change to the book before it is applied
+        assert journal is None or journal.matches(self), \
+            "the journal was written for a book with other settings"
+        self.journal = journal
+        # Publishes every change to the book once it is applied
+        self.feed = None
+        # Held by whatever changes the book from another thread, such as
+        # OrderGateway, and by the reads below, so they see it between
+        # orders
+        self.lock = threading.RLock()
 
-    def insert_bid(self, buyer_id: int, price: float,
-                   volume: int) -> list[Trade]:
-        assert price >= 0
-        assert volume > 0
-        bid = Order(Order.TYPE_BID, buyer_id, price, volume)
-        if self.get_bids_at_price(bid.price):
-            self._insert_bid_no_trade(bid)
-            return []
+    @property
+    def total_bid_volume(self) -> int:
+        return self.total_volumes[Order.TYPE_BID]
+
+    @total_bid_volume.setter
+    def total_bid_volume(self, volume: int) -> None:
+        self.total_volumes[Order.TYPE_BID] = volume
+
+    @property
+    def total_ask_volume(self) -> int:
+        return self.total_volumes[Order.TYPE_ASK]
+
+    @total_ask_volume.setter
+    def total_ask_volume(self, volume: int) -> None:
+        self.total_volumes[Order.TYPE_ASK] = volume
+
+    def to_ticks(self, price: float) -> int:
+        """
+        Returns a price as a whole number of ticks. Prices within a millionth
+        of a tick of each other, such as 100.1 and 100.10000001 with a tick
+        size of 0.1, are the same price.
+        """
+        if price == math.inf:
+            # The price of market bids, which never rest
+            return price
+        ticks = price / self.tick_size
+        rounded = round(ticks)
+        assert abs(ticks - rounded) < 1e-6, \
+            f"price {price} is not a multiple of the tick size {self.tick_size}"
+        return rounded
+
+    def _check_range(self, ticks: int) -> None:
+        # Market bids are the only orders priced above every level
+        assert ticks < self.num_ticks or ticks == math.inf, \
+            f"prices in this book go up to {self.max_price}"
+
+    def to_price(self, ticks: int) -> float:
+        if self.ticks_per_unit is not None:
+            return ticks / self.ticks_per_unit
+        return ticks * self.tick_size
+
+    def insert(self, side: int, user: int, price: float, volume: int,
+               time_in_force=Order.GOOD_TILL_CANCEL) -> list[Trade]:
+        """
+        Inserts an order on either side, where side is Order.TYPE_BID or
+        Order.TYPE_ASK, and returns the trades it caused.
+        """
+        order = self._new_order(side, user, price, volume)
         trades = []
-        while bid.volume and self.total_ask_volume:
-            ask = self.best_ask()
-            assert ask is not None
-            if ask.price > bid.price:
+        if self.journal is not None:
+            self.journal.log_order(order, time_in_force)
+        self._insert(order, trades, time_in_force)
+        if self.journal is not None:
+            self.journal.log_trades(trades)
+        if self.feed is not None:
+            self.feed.order_inserted(order, trades)
+        return trades
+
+    def insert_bid(self, buyer_id: int, price: float, volume: int,
+                   time_in_force=Order.GOOD_TILL_CANCEL) -> list[Trade]:
+        return self.insert(Order.TYPE_BID, buyer_id, price, volume,
+                           time_in_force)
+
+    def insert_ask(self, seller: int, price: float, volume: int,
+                   time_in_force=Order.GOOD_TILL_CANCEL) -> list[Trade]:
+        return self.insert(Order.TYPE_ASK, seller, price, volume,
+                           time_in_force)
+
+    def _insert(self, order: Order, trades: list[Trade],
+                time_in_force=Order.GOOD_TILL_CANCEL) -> None:
+        """
+        Matches an order against the other side of the book and rests what
+        is left of it, for either side.
+        """
+        side = order.type
+        # sign * (ticks - order.ticks) is positive when a price on the other
+        # side is worse than the order's, so the order does not cross it
+        sign = Order.SIGNS[side]
+        user = self.get_user(order.user_id)
+        # The order may trade up to the limit, older orders on its side make
+        # room for the rest of it
+        room = user.position_limit - sign * user.position
+        if time_in_force == Order.FILL_OR_KILL and \
+                (order.volume > room or not self._can_fill(order)):
+            return
+        order.updated_at = self.order_updates.next()
+        if order.volume > room:
+            order.reduce_volume(order.volume - max(room, 0))
+            order.updated_at = self.order_updates.next()
+            if not order.volume:
+                return
+        ticks = self.ladders[side ^ 1].best()
+        if ticks is not None and sign * (ticks - order.ticks) <= 0:
+            self._match(order, user, trades)
+        if order.volume and time_in_force == Order.GOOD_TILL_CANCEL:
+            self._rest(order, user)
+        # Trades moved the position towards the limit, so the user's orders
+        # on this side may now exceed it whether or not the order rests.
+        # Trimming is only needed, and only entered, when they do.
+        if user.volumes[side] > user.position_limit - sign * user.position:
+            self._trim_excess(user, side)
+
+    def _match(self, order: Order, user: UserData, trades: list[Trade]) -> None:
+        """
+        Trades an order against the other side of the book.
+        """
+        side = order.type
+        opposite = side ^ 1
+        best = self.ladders[opposite].best
+        levels = self.levels[opposite]
+        total_volumes = self.total_volumes
+        users = self.users
+        next_trade_id = self.trade_ids.next
+        next_update = self.order_updates.next
+        feed = self.feed
+        prevent = self.self_trade_mode
+        taker_id = order.user_id
+        limit = order.ticks
+        sign = Order.SIGNS[side]
+        while order.volume:
+            ticks = best()
+            if ticks is None or sign * (ticks - limit) > 0:
+                break
+            level = levels[ticks]
+            if feed is not None:
+                feed.changed.add((opposite, ticks))
+            # Trade through the level, which is discarded once it is empty
+            while order.volume and level.head is not None:
+                resting = level.head
+                if resting.user_id == taker_id and prevent:
+                    self._prevent_self_trade(order, resting)
+                    continue
+                trade_volume = resting.volume if resting.volume < order.volume \
+                    else order.volume
+                if side == Order.TYPE_BID:
+                    trade = Trade(taker_id, resting.user_id, resting.price,
+                                  trade_volume, next_trade_id())
+                else:
+                    trade = Trade(resting.user_id, taker_id, resting.price,
+                                  trade_volume, next_trade_id())
+                trades.append(trade)
+                total_volumes[opposite] -= trade_volume
+                # The order is in no level yet, its update is registered
+                # once matching is done
+                order.volume -= trade_volume
+                resting.reduce_volume(trade_volume)
+                resting.updated_at = next_update()
+                maker = users[resting.user_id]
+                maker.volumes[opposite] -= trade_volume
+                user.register_trade(trade)
+                # register_trade accounts for both sides of a self-trade at
+                # once
+                if maker is not user:
+                    maker.register_trade(trade)
+                if resting.volume == 0:
+                    self._discard_order(resting)
+        order.updated_at = next_update()
+
+    def _prevent_self_trade(self, order: Order, resting: Order) -> None:
+        """
+        Keeps an order from trading with a resting order of the same user.
+        """
+        if self.self_trade_mode == Orderbook.SELF_TRADE_CANCEL_OLDEST:
+            self._remove_order(resting)
+            return
+        if self.self_trade_mode == Orderbook.SELF_TRADE_CANCEL_NEWEST:
+            volume = order.volume
+        else:
+            volume = min(order.volume, resting.volume)
+            if volume < resting.volume:
+                self._reduce_order(resting, volume)
+            else:
+                self._remove_order(resting)
+        # The order is in no level yet
+        order.volume -= volume
+
+    def _can_fill(self, order: Order) -> bool:
+        """
+        Tells from the level volumes alone whether an order would be filled
+        completely, without touching any order.
+        """
+        opposite = order.type ^ 1
+        levels = self.levels[opposite]
+        sign = Order.SIGNS[order.type]
+        volume = order.volume
+        own_volumes, first_own = self._own_crossing(order)
+        for ticks in self.ladders[opposite]:
+            if sign * (ticks - order.ticks) > 0:
                 break
-            trade_volume = min(ask.volume, bid.volume)
-            trade = Trade(bid.user_id, ask.user_id, ask.price, trade_volume)
-            trades.append(trade)
-            self.total_ask_volume -= trade_volume
-            bid.reduce_volume(trade_volume)
-            ask.reduce_volume(trade_volume)
-            self.get_user(bid.user_id).register_trade(trade)
-            self.get_user(ask.user_id).register_trade(trade)
-            if ask.volume == 0:
-                self._remove_empty_bids(ask.price)
-        if bid.volume:
-            self._insert_bid_no_trade(bid)
+            if first_own is not None and ticks == first_own.ticks:
+                # Only the orders queued ahead of it count
+                resting = levels[ticks].head
+                while resting is not first_own:
+                    volume -= resting.volume
+                    resting = resting.next
+                return volume <= 0
+            volume -= levels[ticks].volume - own_volumes.get(ticks, 0)
+            if volume <= 0:
+                return True
+        return False
+
+    def _own_crossing(self, order: Order) -> tuple[dict, Order]:
+        """
+        Finds the resting orders of an order's user that it crosses, which
+        it cannot trade with. With cancel-oldest they are cancelled on the
+        way and their volume by price is returned. Otherwise the first one
+        reached stops the order and is returned.
+        """
+        own_volumes = dict()
+        first_own = None
+        if not self.self_trade_mode:
+            return own_volumes, first_own
+        sign = Order.SIGNS[order.type]
+        own = self.users[order.user_id].resting[order.type ^ 1]
+        for resting in own.values():
+            if sign * (resting.ticks - order.ticks) > 0:
+                continue
+            if self.self_trade_mode == Orderbook.SELF_TRADE_CANCEL_OLDEST:
+                own_volumes[resting.ticks] = \
+                    own_volumes.get(resting.ticks, 0) + resting.volume
+            elif first_own is None or \
+                    sign * (resting.ticks - first_own.ticks) < 0:
+                # Own orders are in arrival order, so the first one at the
+                # best price is the one reached first
+                first_own = resting
+        return own_volumes, first_own
+
+    def _rest(self, order: Order, user: UserData) -> None:
+        """
+        Adds an order to its side of the book.
+        """
+        side = order.type
+        levels = self.levels[side]
+        level = levels.get(order.ticks, None)
+        if level is None:
+            level = self._new_level(side, order.ticks)
+        level.append(order)
+        self.orders[order.id] = order
+        user.resting[side][order.id] = order
+        user.volumes[side] += order.volume
+        self.total_volumes[side] += order.volume
+        if self.feed is not None:
+            self.feed.changed.add((side, order.ticks))
+
+    def _trim_excess(self, user: UserData, side: int) -> None:
+        """
+        Trims a user's oldest orders on a side until their volume is within
+        the user's limit.
+        """
+        self.total_volumes[side] -= user.remove_excess(
+            side, self._discard_order, self.order_updates)
+        # Trimmed orders that are gone were discarded, only the oldest one
+        # left can have been trimmed without being discarded
+        if self.feed is not None and user.resting[side]:
+            oldest = next(iter(user.resting[side].values()))
+            self.feed.changed.add((side, oldest.ticks))
+
+    def _new_level(self, side: int, ticks: int) -> PriceLevel:
+        if self.dense_levels is None:
+            level = PriceLevel()
+        else:
+            level = self.dense_levels[side][ticks]
+        self.levels[side][ticks] = level
+        self.ladders[side].add(ticks)
+        return level
+
+    def market_bid(self, buyer_id: int, volume: int,
+                   time_in_force=Order.IMMEDIATE_OR_CANCEL) -> list[Trade]:
+        """
+        Buys up to volume at any price. Nothing is left in the book, and
+        with Order.FILL_OR_KILL nothing trades unless all of it can.
+        """
+        assert time_in_force != Order.GOOD_TILL_CANCEL
+        return self.insert(Order.TYPE_BID, buyer_id, math.inf, volume,
+                           time_in_force)
+
+    def market_ask(self, seller: int, volume: int,
+                   time_in_force=Order.IMMEDIATE_OR_CANCEL) -> list[Trade]:
+        assert time_in_force != Order.GOOD_TILL_CANCEL
+        return self.insert(Order.TYPE_ASK, seller, 0, volume, time_in_force)
+
+    def submit_batch(self, orders) -> list[Trade]:
+        """
+        Inserts an iterable of (side, user, price, volume) tuples in order,
+        where side is Order.TYPE_BID or Order.TYPE_ASK, and returns the
+        trades of all of them.
+
+        An order refused for its user's limit ends the batch with
+        LimitExceeded. The orders before it stay matched, and the exception
+        holds their trades and the index of the refused order.
+        """
+        trades = []
+        new_order = self._new_order
+        insert = self._insert
+        journal = self.journal
+        feed = self.feed
+        first_id = self.order_ids.value
+        try:
+            if journal is None and feed is None:
+                # Nothing needs the trades of each order on its own
+                for side, user, price, volume in orders:
+                    insert(new_order(side, user, price, volume), trades)
+                return trades
+            for side, user, price, volume in orders:
+                order = new_order(side, user, price, volume)
+                if journal is not None:
+                    journal.log_order(order)
+                num_trades = len(trades)
+                insert(order, trades)
+                if journal is not None:
+                    journal.log_trades(trades[num_trades:])
+                if feed is not None:
+                    feed.order_inserted(order, trades[num_trades:])
+        except LimitExceeded as error:
+            # Every order before the refused one took an id, it took none
+            error.trades = trades
+            error.index = self.order_ids.value - first_id
+            raise
         return trades
 
+    def _check_limit(self, side: int, user_id: int, volume: int,
+                     released=0) -> None:
+        """
+        Raises LimitExceeded if an order could take its user over the
+        position limit, counting released volume of the user's resting
+        orders on that side as already gone.
+        """
+        user = self.get_user(user_id)
+        room = user.limit(side) - user.volumes[side] + released
+        if volume > room:
+            raise LimitExceeded(f"user {user_id} has room for {room}, "
+                                f"not {volume}")
+
     def get_user(self, user: int) -> UserData:
-        # avoids constructing the object when not required
-        user_maker = lambda: UserData(user, position_limit=self.position_limit)
-        return self._get_or_set_default(self.users, user, user_maker)
-
-    def get_bids_at_price(self, price: int) -> deque[Order]:
-        return self._get_or_set_default(self.bids, price, deque)
-
-    def get_asks_at_price(self, price: int) -> deque[Order]:
-        return self._get_or_set_default(self.asks, price, deque)
-
-    def _get_or_set_default(self, table, key, default_maker):
-        assert table is not None
-        if key not in table:
-            table[key] = default_maker()
-        return table[key]
-
-    def _insert_bid_no_trade(self, bid: Order) -> None:
-        bids_at_price = self.get_bids_at_price(bid.price)
-        bids_at_price.append(bid)
-        user = self.get_user(bid.user_id)
-        user.bids.append(bid)
-        user.bid_volume += bid.volume
-        # We want to sort bid prices in descending order so we need
-        # to store their additive inverses
-        self.bid_prices.put(-bid.price)
-
-        self.total_bid_volume += bid.volume - user.remove_excess_bids()
-
-    def insert_ask(self, seller: int, price: float,
-                   volume: int) -> list[Trade]:
+        user_data = self.users.get(user, None)
+        if user_data is None:
+            user_data = UserData(user, position_limit=self.position_limit,
+                                 leaderboards=self.leaderboards)
+            self.users[user] = user_data
+            for leaderboard in self.leaderboards.values():
+                leaderboard.update(user_data)
+        return user_data
+
+    def leaderboard(self, metric: str) -> Leaderboard:
+        """
+        Returns the ranking of all users by a UserData attribute such as
+        position, realized_pnl, cash or traded_volume. It is built on first
+        use and from then on updated whenever a user trades.
+        """
+        with self.lock:
+            leaderboard = self.leaderboards.get(metric, None)
+            if leaderboard is None:
+                leaderboard = Leaderboard(metric, self.users.values(),
+                                          self.lock)
+                self.leaderboards[metric] = leaderboard
+            return leaderboard
+
+    def get_bids_at_price(self, price: float) -> PriceLevel:
+        # Reading a price without orders must not leave an empty level behind
+        return self.bids.get(self.to_ticks(price), None) or PriceLevel()
+
+    def get_asks_at_price(self, price: float) -> PriceLevel:
+        return self.asks.get(self.to_ticks(price), None) or PriceLevel()
+
+    def _new_order(self, order_type, user, price, volume, order_id=None,
+                   released=0) -> Order:
+        """
+        Checks an order and makes it with the next order id, or with
+        order_id when it replaces a resting order, whose released volume
+        goes with it.
+        """
+        assert order_type == Order.TYPE_BID or order_type == Order.TYPE_ASK
         assert price >= 0
         assert volume > 0
-        ask = Order(Order.TYPE_ASK, seller, price, volume)
-        if self.asks.get(ask.price, None):
-            self._insert_ask_no_trade(ask)
+        # Whole prices are their own ticks with the default tick size
+        if type(price) is not int or self.tick_size != 1:
+            ticks = self.to_ticks(price)
+            price = self.to_price(ticks)
+        else:
+            ticks = price
+        if self.num_ticks is not None:
+            self._check_range(ticks)
+        if self.limit_mode == Orderbook.LIMIT_REJECT:
+            self._check_limit(order_type, user, volume, released)
+        if order_id is None:
+            order_id = self.order_ids.next()
+        return Order(order_type, user, price, volume, order_id, ticks=ticks)
+
+    def cancel(self, order_id: int) -> bool:
+        order = self.orders.get(order_id, None)
+        if order is None:
+            return False
+        if self.journal is not None:
+            self.journal.log_cancel(order_id)
+        self._remove_order(order)
+        if self.feed is not None:
+            self.feed.order_cancelled(order)
+        return True
+
+    def amend(self, order_id: int, price: float, volume: int) -> list[Trade]:
+        """
+        Changes the price and volume of a resting order. The order keeps its
+        place in the queue if only its volume is reduced, otherwise it is
+        reinserted, possibly trading, at the back of the new price level.
+        """
+        order = self.orders.get(order_id, None)
+        assert order is not None
+        amended = self._new_order(order.type, order.user_id, price, volume,
+                                  order.id, order.volume)
+        if self.journal is not None:
+            self.journal.log_amend(order_id, price, volume)
+        if amended.ticks == order.ticks and volume <= order.volume:
+            if volume < order.volume:
+                self._reduce_order(order, order.volume - volume)
+            if self.feed is not None:
+                self.feed.order_amended(order, [])
             return []
+        self._remove_order(order)
         trades = []
-        while ask.volume and self.total_bid_volume:
-            bid = self.best_bid()
-            assert bid is not None
-            if ask.price > bid.price:
-                break
-            trade_volume = min(ask.volume, bid.volume)
-            trade = Trade(bid.user_id, ask.user_id, bid.price, trade_volume)
-            trades.append(trade)
-            self.total_bid_volume -= trade_volume
-            bid.reduce_volume(trade_volume)
-            ask.reduce_volume(trade_volume)
-            self.get_user(bid.user_id).register_trade(trade)
-            self.get_user(ask.user_id).register_trade(trade)
-            if bid.volume == 0:
-                self._remove_empty_asks(bid.price)
-        if ask.volume:
-            self._insert_ask_no_trade(ask)
+        self._insert(amended, trades)
+        if self.journal is not None:
+            self.journal.log_trades(trades)
+        if self.feed is not None:
+            self.feed.order_amended(amended, trades)
         return trades
 
-    def _remove_empty_bids(self, price: int) -> None:
-        bids_at_price = self.get_bids_at_price(price)
-        while bids_at_price and bids_at_price[0].volume == 0:
-            bids_at_price.popleft()
+    def _reduce_order(self, order: Order, volume_delta: int) -> None:
+        if self.feed is not None:
+            self.feed.changed.add((order.type, order.ticks))
+        order.reduce_volume(volume_delta)
+        order.updated_at = self.order_updates.next()
+        self.total_volumes[order.type] -= volume_delta
+        self.users[order.user_id].volumes[order.type] -= volume_delta
 
-    def _remove_empty_asks(self, price: int) -> None:
-        asks_at_price = self.get_asks_at_price(price)
-        while asks_at_price and asks_at_price[0].volume == 0:
-            asks_at_price.popleft()
+    def _remove_order(self, order: Order) -> None:
+        self._reduce_order(order, order.volume)
+        self._discard_order(order)
 
-    def _insert_ask_no_trade(self, ask: Order) -> None:
-        asks_at_price = self.get_asks_at_price(ask.price)
-        asks_at_price.append(ask)
-        user = self.get_user(ask.user_id)
-        user.asks.append(ask)
-        user.ask_volume += ask.volume
-        self.ask_prices.put(ask.price)
+    def _discard_order(self, order: Order) -> None:
+        """
+        Drops every reference the book holds to an order that has no volume
+        left, and the order's price level if it is now empty.
+        """
+        assert order.volume == 0
+        if self.feed is not None:
+            self.feed.changed.add((order.type, order.ticks))
+        self.users[order.user_id].resting[order.type].pop(order.id, None)
+        del self.orders[order.id]
+        orders_at_price = order.level
+        orders_at_price.remove(order)
+        if not orders_at_price:
+            del self.levels[order.type][order.ticks]
+            self.ladders[order.type].remove(order.ticks)
 
-        self.total_ask_volume += ask.volume - user.remove_excess_asks()
+    def _restore_order(self, order: Order) -> None:
+        """
+        Puts an order read from a snapshot back at the end of its level and
+        of its user's orders. Volumes and limits are restored separately.
+        """
+        order.ticks = self.to_ticks(order.price)
+        self.get_user(order.user_id).resting[order.type][order.id] = order
+        level = self.levels[order.type].get(order.ticks, None)
+        if level is None:
+            level = self._new_level(order.type, order.ticks)
+        level.append(order)
+        self.orders[order.id] = order
 
     def best_ask(self) -> Order:
-        while (price := self._peek_ask_prices()) is not None:
-            asks_at_price = self.asks.get(price, deque())
-            while asks_at_price and not asks_at_price[0].volume:
-                asks_at_price.popleft()
-            if asks_at_price:
-                return asks_at_price[0]
-            else:
-                self.ask_prices.get()
-        return None
-
-    def _peek_ask_prices(self) -> float:
-        try:
-            with self.ask_prices.mutex:
-                return self.ask_prices.queue[0]
-        except IndexError:
+        price = self.ask_prices.best()
+        if price is None:
             return None
+        return self.asks[price].head
 
     def best_bid(self) -> Order:
-        while (price := self._peek_bid_prices()) is not None:
-            bids_at_price = self.bids.get(price, deque())
-            while bids_at_price and not bids_at_price[0].volume:
-                bids_at_price.popleft()
-            if bids_at_price:
-                return bids_at_price[0]
-            else:
-                self.bid_prices.get()
-        return None
-
-    def _peek_bid_prices(self) -> float:
-        try:
-            with self.bid_prices.mutex:
-                return -self.bid_prices.queue[0]
-        except IndexError:
+        price = self.bid_prices.best()
+        if price is None:
             return None
+        return self.bids[price].head
+
+    def depth(self, n=None) -> tuple[list[tuple], list[tuple]]:
+        """
+        Returns the best n price levels, or all of them, on each side as
+        (price, volume, number of orders) tuples, best first.
+        """
+        with self.lock:
+            return (self._depth(self.bid_prices, self.bids, n),
+                    self._depth(self.ask_prices, self.asks, n))
+
+    def _depth(self, prices: PriceLadder, levels: dict, n) -> list[tuple]:
+        depth = []
+        for ticks in prices:
+            if n is not None and len(depth) >= n:
+                break
+            level = levels[ticks]
+            depth.append((self.to_price(ticks), level.volume,
+                          level.num_orders))
+        return depth
 
     def find_orders_per_price(self, orders: dict) -> list[tuple]:
-        prices = orders.keys()
-        raw_orders = map(lambda x: orders.get(x, deque()), prices)
-        raw_volumes = []
-        for order_list in raw_orders:
-            raw_volumes.append(sum(map(lambda ord: ord.volume, order_list)))
-        return list(filter(lambda x: x[1], zip(prices, raw_volumes)))
+        return [(self.to_price(ticks), level.volume)
+                for ticks, level in orders.items()]
 
     def __str__(self) -> str:
-        bids_per_price = sorted(self.find_orders_per_price(self.bids),
-                                reverse=True)
-        asks_per_price = sorted(self.find_orders_per_price(self.asks))
+        bids_per_price, asks_per_price = self.depth()
         price_volume_to_string = lambda x: f"{x[1]}@{x[0]}"
         return f"ASK: {', '.join(map(price_volume_to_string, asks_per_price))}\n" \
-            f"BID: {', '.join(map(price_volume_to_string, bids_per_price))}"
\ No newline at end of file
+            f"BID: {', '.join(map(price_volume_to_string, bids_per_price))}"
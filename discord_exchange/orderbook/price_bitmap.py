@@ -0,0 +1,66 @@
+class PriceBitmap:
+    """
+    The distinct prices at which one side of a book has resting orders, for
+    prices that are whole numbers of ticks in a fixed range from 0.
+
+    Every price is a set bit of a single integer, so adding and removing a
+    price flips a bit and the best price is the highest or lowest set bit,
+    each O(range / word size). The best price is kept so that reading it is
+    O(1) and it is only searched for when it is removed. Walking the top n
+    prices is O(n) searches. It offers the same operations as PriceLadder.
+    """
+
+    def __init__(self, num_ticks: int, descending: bool = False) -> None:
+        self.num_ticks = num_ticks
+        self._descending = descending
+        self._bits = 0
+        self._best = None
+
+    def add(self, ticks: int) -> None:
+        assert 0 <= ticks < self.num_ticks
+        self._bits |= 1 << ticks
+        best = self._best
+        if best is None or \
+                (ticks > best if self._descending else ticks < best):
+            self._best = ticks
+
+    def remove(self, ticks: int) -> None:
+        self._bits &= ~(1 << ticks)
+        if ticks == self._best:
+            self._best = self._search(self._bits)
+
+    def _search(self, bits: int):
+        if not bits:
+            return None
+        if self._descending:
+            return bits.bit_length() - 1
+        # The lowest set bit is all that is left of bits & -bits
+        return (bits & -bits).bit_length() - 1
+
+    def best(self):
+        return self._best
+
+    def top(self, n=None):
+        """
+        Iterates over the best n prices, or all of them, best first.
+        """
+        bits = self._bits
+        count = 0
+        while bits and (n is None or count < n):
+            ticks = self._search(bits)
+            yield ticks
+            bits ^= 1 << ticks
+            count += 1
+
+    def empty(self) -> bool:
+        return not self._bits
+
+    def __contains__(self, ticks) -> bool:
+        return 0 <= ticks < self.num_ticks and bool(self._bits >> ticks & 1)
+
+    def __len__(self) -> int:
+        # int.bit_count needs Python 3.10
+        return bin(self._bits).count("1")
+
+    def __iter__(self):
+        return self.top()
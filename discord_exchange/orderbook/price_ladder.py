@@ -0,0 +1,61 @@
+from bisect import bisect_left, insort
+
+
+class PriceLadder:
+    """
+    The distinct prices at which one side of the book has resting orders.
+
+    Every price is held once in a sorted array with the best price at the
+    end, so reading the best price is O(1), walking the top n prices is
+    O(n) and prices are located in O(log n). Levels come and go close to
+    the top of the book, where inserting and removing shifts few entries.
+    """
+
+    def __init__(self, descending: bool = False) -> None:
+        # Keys are sorted in ascending order and the best price must come
+        # last, so ascending ladders store additive inverses
+        self._sign = 1 if descending else -1
+        self._keys = []
+        self._prices = set()
+
+    def add(self, price) -> None:
+        if price in self._prices:
+            return
+        self._prices.add(price)
+        insort(self._keys, self._sign * price)
+
+    def remove(self, price) -> None:
+        if price not in self._prices:
+            return
+        self._prices.remove(price)
+        key = self._sign * price
+        if self._keys[-1] == key:
+            self._keys.pop()
+        else:
+            del self._keys[bisect_left(self._keys, key)]
+
+    def best(self):
+        if not self._keys:
+            return None
+        return self._sign * self._keys[-1]
+
+    def top(self, n=None):
+        """
+        Iterates over the best n prices, or all of them, best first.
+        """
+        keys = self._keys
+        stop = -1 if n is None else max(len(keys) - n, 0) - 1
+        for i in range(len(keys) - 1, stop, -1):
+            yield self._sign * keys[i]
+
+    def empty(self) -> bool:
+        return not self._prices
+
+    def __contains__(self, price) -> bool:
+        return price in self._prices
+
+    def __len__(self) -> int:
+        return len(self._prices)
+
+    def __iter__(self):
+        return self.top()
@@ -0,0 +1,67 @@
+class PriceLevel:
+    """
+    The resting orders at a single price in time priority.
+
+    Orders carry links to their neighbours, so an order can be removed from
+    anywhere in the level in O(1) without scanning it. The level also keeps
+    the total volume and number of its unfilled orders up to date as the
+    orders change.
+    """
+    __slots__ = ("head", "tail", "size", "volume", "num_orders")
+
+    def __init__(self) -> None:
+        self.head = None
+        self.tail = None
+        self.size = 0
+        self.volume = 0
+        self.num_orders = 0
+
+    def append(self, order) -> None:
+        order.level = self
+        if order.volume:
+            self.volume += order.volume
+            self.num_orders += 1
+        order.prev = self.tail
+        order.next = None
+        if self.tail is None:
+            self.head = order
+        else:
+            self.tail.next = order
+        self.tail = order
+        self.size += 1
+
+    def remove(self, order) -> None:
+        if order.volume:
+            self.volume -= order.volume
+            self.num_orders -= 1
+        order.level = None
+        if order.prev is None:
+            self.head = order.next
+        else:
+            order.prev.next = order.next
+        if order.next is None:
+            self.tail = order.prev
+        else:
+            order.next.prev = order.prev
+        order.prev = None
+        order.next = None
+        self.size -= 1
+
+    def reduce_volume(self, order, volume_delta) -> None:
+        self.volume -= volume_delta
+        if order.volume == 0:
+            self.num_orders -= 1
+
+    def popleft(self):
+        order = self.head
+        self.remove(order)
+        return order
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        order = self.head
+        while order is not None:
+            yield order
+            order = order.next
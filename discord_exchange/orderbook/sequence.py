@@ -0,0 +1,14 @@
+class Sequence:
+    """
+    Hands out consecutive sequence numbers. Every order book owns its own
+    sequences, so books never share or interleave numbers.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, start: int = 0) -> None:
+        self.value = start
+
+    def next(self) -> int:
+        value = self.value
+        self.value = value + 1
+        return value
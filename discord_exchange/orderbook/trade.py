@@ -1,14 +1,13 @@
 class Trade:
-    num_trades = 0
+    __slots__ = ("buyer", "seller", "price", "volume", "id")
 
-    def __init__(self, buyer, seller, price, volume) -> None:
+    def __init__(self, buyer, seller, price, volume, trade_id=None) -> None:
         assert volume > 0
         self.buyer = buyer
         self.seller = seller
         self.price = price
         self.volume = volume
-        self.id = Trade.num_trades
-        Trade.num_trades += 1
+        self.id = trade_id
 
     def binary_value(self, theo):
         if self.price > theo:
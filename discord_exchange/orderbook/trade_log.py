@@ -0,0 +1,48 @@
+from array import array
+from discord_exchange.orderbook.trade import Trade
+
+
+class TradeLog:
+    """
+    A trade history stored column by column in typed arrays rather than as
+    one object per trade. Trade objects are only created when trades are
+    read back.
+    """
+
+    def __init__(self, trades=()) -> None:
+        self.ids = array("q")
+        self.buyers = array("q")
+        self.sellers = array("q")
+        self.prices = array("d")
+        self.volumes = array("q")
+        self.extend(trades)
+
+    def append(self, trade: Trade) -> None:
+        self.ids.append(trade.id)
+        self.buyers.append(trade.buyer)
+        self.sellers.append(trade.seller)
+        self.prices.append(trade.price)
+        self.volumes.append(trade.volume)
+
+    def extend(self, trades) -> None:
+        for trade in trades:
+            self.append(trade)
+
+    def _trade(self, index: int) -> Trade:
+        return Trade(self.buyers[index], self.sellers[index],
+                     self.prices[index], self.volumes[index],
+                     trade_id=self.ids[index])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._trade(i) for i in range(*index.indices(len(self)))]
+        return self._trade(index)
+
+    def __iter__(self):
+        columns = zip(self.buyers, self.sellers, self.prices, self.volumes,
+                      self.ids)
+        for buyer, seller, price, volume, trade_id in columns:
+            yield Trade(buyer, seller, price, volume, trade_id=trade_id)
+
+    def __len__(self) -> int:
+        return len(self.ids)
@@ -1,22 +1,60 @@
-from collections import deque
+from collections import OrderedDict
+from discord_exchange.orderbook.order import Order
 from discord_exchange.orderbook.trade import Trade
 
 
 class UserData:
-    def __init__(self, identifier, position_limit=10) -> None:
+    def __init__(self, identifier, position_limit=10,
+                 leaderboards=None) -> None:
         self.identifier = identifier
-        self.bids = deque()
-        self.asks = deque()
-        self.bid_volume = 0
-        self.ask_volume = 0
+        # Resting orders by id, oldest first
+        self.bids = OrderedDict()
+        self.asks = OrderedDict()
+        # Resting orders and their volume, indexed by order type
+        self.resting = (self.bids, self.asks)
+        self.volumes = [0, 0]
         self.position = 0
         self.position_limit = position_limit
+        # Running trade statistics, all updated in O(1) per trade
+        self.num_trades = 0
+        self.traded_volume = 0
+        self.traded_notional = 0
+        # Money received for sales less money paid for purchases
+        self.cash = 0
+        # Average price at which the current position was entered
+        self.average_price = 0
+        self.realized_pnl = 0
+        # Leaderboards by metric that rank this user, shared with the book
+        self.leaderboards = dict() if leaderboards is None else leaderboards
+
+    @property
+    def bid_volume(self) -> int:
+        return self.volumes[Order.TYPE_BID]
+
+    @bid_volume.setter
+    def bid_volume(self, volume: int) -> None:
+        self.volumes[Order.TYPE_BID] = volume
+
+    @property
+    def ask_volume(self) -> int:
+        return self.volumes[Order.TYPE_ASK]
+
+    @ask_volume.setter
+    def ask_volume(self, volume: int) -> None:
+        self.volumes[Order.TYPE_ASK] = volume
+
+    def limit(self, side: int) -> int:
+        """
+        Volume the user may still trade on a side without going over the
+        position limit.
+        """
+        return self.position_limit - Order.SIGNS[side] * self.position
 
     def bid_limit(self) -> int:
-        return self.position_limit - self.position
+        return self.limit(Order.TYPE_BID)
 
     def ask_limit(self) -> int:
-        return self.position_limit + self.position
+        return self.limit(Order.TYPE_ASK)
 
     def bid_volume_delta(self):
         return self.bid_volume - self.bid_limit()
@@ -24,34 +62,87 @@ class UserData:
     def ask_volume_delta(self):
         return self.ask_volume - self.ask_limit()
 
-    def remove_excess_bids(self):
-        assert self.bids
+    def remove_excess(self, side: int, discard=None, updates=None):
+        """
+        Trims the oldest orders on a side until their volume is within the
+        limit. Orders without volume left are passed to discard, and trimmed
+        orders take their update numbers from the updates sequence, if given.
+        """
+        orders = self.resting[side]
+        volumes = self.volumes
+        assert orders
+        limit = self.limit(side)
         total_volume_delta = 0
-        while self.bid_volume > self.bid_limit():
-            volume_delta = min(self.bids[0].volume, self.bid_volume_delta())
-            self.bid_volume -= volume_delta
-            self.bids[0].reduce_volume(volume_delta)
+        while volumes[side] > limit:
+            oldest = next(iter(orders.values()))
+            volume_delta = min(oldest.volume, volumes[side] - limit)
+            volumes[side] -= volume_delta
+            oldest.reduce_volume(volume_delta)
+            if updates is not None:
+                oldest.updated_at = updates.next()
             total_volume_delta += volume_delta
-            if self.bids[0].volume == 0:
-                self.bids.popleft()
+            if oldest.volume == 0:
+                orders.popitem(last=False)
+                if discard is not None:
+                    discard(oldest)
         return total_volume_delta
 
-    def remove_excess_asks(self):
-        assert self.asks
-        total_volume_delta = 0
-        while self.ask_volume > self.ask_limit():
-            volume_delta = min(self.asks[0].volume, self.ask_volume_delta())
-            self.ask_volume -= volume_delta
-            self.asks[0].reduce_volume(volume_delta)
-            total_volume_delta += volume_delta
-            if self.asks[0].volume == 0:
-                self.asks.popleft()
-        return total_volume_delta
+    def remove_excess_bids(self, discard=None):
+        return self.remove_excess(Order.TYPE_BID, discard)
+
+    def remove_excess_asks(self, discard=None):
+        return self.remove_excess(Order.TYPE_ASK, discard)
 
     def register_trade(self, trade: Trade):
+        # Resting volume is reduced by the book, which knows whether the
+        # user's side of the trade was resting
         if trade.seller == self.identifier:
-            self.position -= trade.volume
-            self.ask_volume -= trade.volume
+            self._register_fill(-trade.volume, trade.price)
         if trade.buyer == self.identifier:
-            self.position += trade.volume
-            self.bid_volume -= trade.volume
\ No newline at end of file
+            self._register_fill(trade.volume, trade.price)
+        for leaderboard in self.leaderboards.values():
+            leaderboard.update(self)
+
+    def _register_fill(self, position_delta, price):
+        volume = abs(position_delta)
+        self.num_trades += 1
+        self.traded_volume += volume
+        self.traded_notional += volume * price
+        self.cash -= position_delta * price
+        position = self.position
+        new_position = position + position_delta
+        if position == 0 or (position > 0) == (position_delta > 0):
+            # Opening or adding to a position moves its average price
+            self.average_price = (self.average_price * abs(position)
+                                  + price * volume) / abs(new_position)
+        else:
+            closed = min(volume, abs(position))
+            direction = 1 if position > 0 else -1
+            self.realized_pnl += direction * closed * (price - self.average_price)
+            if new_position == 0:
+                self.average_price = 0
+            elif (new_position > 0) != (position > 0):
+                # The rest of the fill opens a position on the other side
+                self.average_price = price
+        self.position = new_position
+
+    def vwap(self) -> float:
+        """
+        Volume-weighted average price of all of the user's trades.
+        """
+        if not self.traded_volume:
+            return 0
+        return self.traded_notional / self.traded_volume
+
+    def unrealized_pnl(self, mark) -> float:
+        return self.position * (mark - self.average_price)
+
+    def pnl(self, mark) -> float:
+        """
+        Total PnL with the open position valued at mark, which equals
+        realized_pnl + unrealized_pnl(mark).
+        """
+        return self.cash + self.position * mark
+
+    def exposure(self, mark) -> float:
+        return abs(self.position) * mark
\ No newline at end of file
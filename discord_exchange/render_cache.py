@@ -0,0 +1,104 @@
+import asyncio
+import time
+from discord_exchange.orderbook import Orderbook
+
+
+def render(depth: tuple[list[tuple], list[tuple]]) -> str:
+    """
+    Formats levels as returned by Orderbook.depth as a Discord code block,
+    asks above bids with the best prices of both in the middle.
+    """
+    bids, asks = depth
+    lines = [f"{'':3} {'price':>10} {'volume':>8} {'orders':>6}"]
+    lines.extend(f"{'ASK':3} {price:>10} {volume:>8} {num_orders:>6}"
+                 for price, volume, num_orders in reversed(asks))
+    lines.extend(f"{'BID':3} {price:>10} {volume:>8} {num_orders:>6}"
+                 for price, volume, num_orders in bids)
+    return "```\n" + "\n".join(lines) + "\n```"
+
+
+class RenderCache:
+    """
+    The rendered top levels of a book, shared by every viewer.
+
+    The text is keyed by the book's order update sequence number, so reading
+    it while the book is unchanged costs one comparison. Once the book has
+    changed, the top levels are read again and only re-rendered if they are
+    different, and at most once per interval seconds: changes within an
+    interval of the last render are coalesced into the next one, and until
+    then viewers get the previous text.
+    """
+
+    def __init__(self, orderbook: Orderbook, depth=5, interval=2.0,
+                 clock=time.monotonic) -> None:
+        self.orderbook = orderbook
+        self.depth = depth
+        self.interval = interval
+        self.clock = clock
+        # Update sequence number the text was last checked against
+        self.sequence = None
+        self.levels = None
+        self.text = None
+        self.rendered_at = None
+        self.num_renders = 0
+
+    def get(self) -> str:
+        orderbook = self.orderbook
+        sequence = orderbook.order_updates.value
+        if sequence == self.sequence:
+            return self.text
+        now = self.clock()
+        if self.rendered_at is not None and \
+                now - self.rendered_at < self.interval:
+            return self.text
+        # The levels must be those of the update they are keyed by
+        with orderbook.lock:
+            sequence = orderbook.order_updates.value
+            levels = orderbook.depth(self.depth)
+        self.sequence = sequence
+        if levels != self.levels:
+            self.levels = levels
+            self.text = render(levels)
+            self.rendered_at = now
+            self.num_renders += 1
+        return self.text
+
+    def stale(self) -> bool:
+        """
+        Tells whether the book changed since the text was last checked.
+        """
+        return self.orderbook.order_updates.value != self.sequence
+
+
+class BookMessage:
+    """
+    Keeps a single Discord message showing a book up to date by editing it,
+    at most once per interval of its cache and only when the text changed.
+
+    The channel only needs an async send(content) returning a message with
+    an async edit(content=...), as in discord.py.
+    """
+
+    def __init__(self, cache: RenderCache, channel) -> None:
+        self.cache = cache
+        self.channel = channel
+        self.message = None
+        self.content = None
+
+    async def refresh(self) -> None:
+        content = self.cache.get()
+        if content == self.content:
+            return
+        if self.message is None:
+            self.message = await self.channel.send(content)
+        else:
+            await self.message.edit(content=content)
+        self.content = content
+
+    async def run(self) -> None:
+        """
+        Refreshes the message every interval until cancelled.
+        """
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.cache.interval)
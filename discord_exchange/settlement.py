@@ -0,0 +1,64 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from discord_exchange.orderbook import TradeLog
+
+
+class Settlement:
+    """
+    Settles a trade history for every user at once against one or many
+    candidate theoretical values, using NumPy on the columns of a TradeLog.
+
+    Every trade is split into a buying and a selling leg, and the legs are
+    grouped by user. The true value of a leg, volume * (theo - price), is
+    linear in theo, so per-user positions and costs are reduced once and
+    any number of theos are then settled in O(users). Binary values take a
+    grouped reduction over the legs per theo.
+    """
+
+    def __init__(self, trades: TradeLog) -> None:
+        if np is None:
+            raise ImportError("Settlement requires numpy")
+        buyers = np.array(trades.buyers, dtype=np.int64)
+        sellers = np.array(trades.sellers, dtype=np.int64)
+        prices = np.array(trades.prices, dtype=np.float64)
+        volumes = np.array(trades.volumes, dtype=np.int64)
+        # Users in ascending order of id and the user of every leg
+        self.users, self.legs = np.unique(np.concatenate((buyers, sellers)),
+                                          return_inverse=True)
+        self.prices = np.concatenate((prices, prices))
+        # Sellers give up what buyers receive
+        self.volumes = np.concatenate((volumes, -volumes))
+        self.positions = self._by_user(self.volumes)
+        self.costs = self._by_user(self.volumes * self.prices)
+
+    def _by_user(self, values):
+        return np.bincount(self.legs, weights=values, minlength=len(self.users))
+
+    def true_pnl(self, theo):
+        """
+        Returns every user's true PnL for a theo, or for each of an array of
+        theos, with users along the last axis in the order of self.users.
+        """
+        theo = np.asarray(theo, dtype=np.float64)
+        return np.multiply.outer(theo, self.positions) - self.costs
+
+    def binary_pnl(self, theo):
+        """
+        Returns every user's binary PnL, shaped like true_pnl.
+        """
+        theo = np.asarray(theo, dtype=np.float64)
+        pnl = np.empty((theo.size, len(self.users)), dtype=np.int64)
+        for i, value in enumerate(theo.flat):
+            legs = np.sign(value - self.prices).astype(np.int64) * self.volumes
+            pnl[i] = np.bincount(self.legs, weights=legs,
+                                 minlength=len(self.users))
+        return pnl.reshape(theo.shape + (len(self.users),))
+
+    def by_user(self, pnl) -> dict:
+        """
+        Maps user ids to their entries of a PnL vector for a single theo.
+        """
+        return dict(zip(self.users.tolist(), np.asarray(pnl).tolist()))
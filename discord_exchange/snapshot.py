@@ -0,0 +1,236 @@
+import math
+import os
+import re
+import struct
+import threading
+from discord_exchange.orderbook import Orderbook, Order, TradeLog
+from discord_exchange.journal import Journal, whole
+
+MAGIC = b"DXS1"
+VERSION = 5
+# magic, version, self-trade mode, limit mode, position limit, tick size, max
+# price or NaN for none, order id, order update and trade id sequences, total
+# bid and ask volume, number of users and orders
+HEADER = struct.Struct("<4sHBBqddqqqqqqq")
+# identifier, position, bid volume, ask volume, number of trades, traded
+# volume, traded notional, cash, average price, realized PnL
+USER = struct.Struct("<qqqqqqdddd")
+# id, type, user, price, volume, updated at
+ORDER = struct.Struct("<qBxxxxxxqdqq")
+
+
+def encode(orderbook: Orderbook) -> bytes:
+    """
+    Serializes the full state of an order book. Resting orders are written
+    in the order they were inserted, which is their order both within their
+    price level and among their user's orders.
+    """
+    parts = [HEADER.pack(MAGIC, VERSION, orderbook.self_trade_mode,
+                         orderbook.limit_mode, orderbook.position_limit,
+                         orderbook.tick_size,
+                         math.nan if orderbook.max_price is None
+                         else orderbook.max_price,
+                         orderbook.order_ids.value,
+                         orderbook.order_updates.value,
+                         orderbook.trade_ids.value,
+                         orderbook.total_bid_volume,
+                         orderbook.total_ask_volume,
+                         len(orderbook.users), len(orderbook.orders))]
+    parts.extend(USER.pack(user.identifier, user.position, user.bid_volume,
+                           user.ask_volume, user.num_trades,
+                           user.traded_volume, user.traded_notional,
+                           user.cash, user.average_price, user.realized_pnl)
+                 for user in orderbook.users.values())
+    parts.extend(ORDER.pack(order.id, order.type, order.user_id, order.price,
+                            order.volume, order.updated_at)
+                 for order in orderbook.orders.values())
+    return b"".join(parts)
+
+
+def decode(data: bytes) -> Orderbook:
+    (magic, version, self_trade_mode, limit_mode, position_limit, tick_size,
+     max_price, order_ids, order_updates, trade_ids, total_bid_volume,
+     total_ask_volume, num_users, num_orders) = HEADER.unpack_from(data)
+    assert magic == MAGIC and version == VERSION
+    orderbook = Orderbook(
+        position_limit=position_limit, tick_size=whole(tick_size),
+        max_price=None if math.isnan(max_price) else whole(max_price),
+        self_trade_mode=self_trade_mode, limit_mode=limit_mode)
+    offset = HEADER.size
+    for (identifier, position, bid_volume, ask_volume, num_trades,
+         traded_volume, traded_notional, cash, average_price, realized_pnl) in \
+            USER.iter_unpack(data[offset:offset + num_users * USER.size]):
+        user = orderbook.get_user(identifier)
+        user.position = position
+        user.bid_volume = bid_volume
+        user.ask_volume = ask_volume
+        user.num_trades = num_trades
+        user.traded_volume = traded_volume
+        user.traded_notional = traded_notional
+        user.cash = cash
+        user.average_price = average_price
+        user.realized_pnl = realized_pnl
+    offset += num_users * USER.size
+    for order_id, order_type, user, price, volume, updated_at in \
+            ORDER.iter_unpack(data[offset:offset + num_orders * ORDER.size]):
+        order = Order(order_type, user, price, volume, order_id, updated_at)
+        orderbook._restore_order(order)
+    orderbook.total_bid_volume = total_bid_volume
+    orderbook.total_ask_volume = total_ask_volume
+    orderbook.order_ids.value = order_ids
+    orderbook.order_updates.value = order_updates
+    orderbook.trade_ids.value = trade_ids
+    return orderbook
+
+
+def write_snapshot(path, data: bytes) -> None:
+    # Written under a temporary name and renamed, so a snapshot file is
+    # either complete or absent
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+    directory = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+def read_snapshot(path) -> Orderbook:
+    with open(path, "rb") as file:
+        return decode(file.read())
+
+
+class SnapshotStore:
+    """
+    Keeps an order book durable in a directory of snapshots and journal
+    segments. Journal segment n holds every change made after snapshot n,
+    so starting up loads the latest snapshot and replays only the segments
+    from its generation on.
+
+    Taking a snapshot starts a new journal segment and writes the snapshot
+    in the background, either from a forked child, which sees a copy-on-write
+    image of the book, or from a thread that writes a serialized copy. Once
+    the snapshot is on disk, older snapshots and segments are deleted.
+    """
+
+    FILE_NAME = re.compile(r"(snapshot|journal)-(\d+)\.(snap|log)$")
+
+    def __init__(self, directory, position_limit=10, fsync=Journal.FSYNC_GROUP,
+                 fork=hasattr(os, "fork"), tick_size=1, max_price=None,
+                 self_trade_mode=Orderbook.SELF_TRADE_ALLOW,
+                 limit_mode=Orderbook.LIMIT_TRIM) -> None:
+        self.directory = directory
+        self.fsync = fsync
+        self.fork = fork
+        self.pending = None
+        os.makedirs(directory, exist_ok=True)
+
+        snapshots, journals = self._generations()
+        if snapshots:
+            self.generation = snapshots[-1]
+            self.orderbook = read_snapshot(self._snapshot_path(self.generation))
+        else:
+            self.generation = journals[0] if journals else 0
+            if journals:
+                # The book keeps the settings it was journalled with
+                (position_limit, tick_size, max_price, self_trade_mode,
+                 limit_mode) = Journal.read_header(
+                    self._journal_path(self.generation))
+            self.orderbook = Orderbook(position_limit=position_limit,
+                                       tick_size=tick_size,
+                                       max_price=max_price,
+                                       self_trade_mode=self_trade_mode,
+                                       limit_mode=limit_mode)
+        # Trades replayed from the journal since the snapshot
+        self.trades = TradeLog()
+        for generation in journals:
+            if generation >= self.generation:
+                Journal.replay(self._journal_path(generation), self.orderbook,
+                               self.trades)
+                self.generation = generation
+        self.orderbook.journal = self._open_journal()
+
+    def _generations(self) -> tuple[list[int], list[int]]:
+        snapshots, journals = [], []
+        for name in os.listdir(self.directory):
+            match = SnapshotStore.FILE_NAME.match(name)
+            if match:
+                kind = snapshots if match.group(1) == "snapshot" else journals
+                kind.append(int(match.group(2)))
+        return sorted(snapshots), sorted(journals)
+
+    def _snapshot_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"snapshot-{generation:010d}.snap")
+
+    def _journal_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"journal-{generation:010d}.log")
+
+    def _open_journal(self) -> Journal:
+        return Journal(self._journal_path(self.generation),
+                       position_limit=self.orderbook.position_limit,
+                       fsync=self.fsync, tick_size=self.orderbook.tick_size,
+                       max_price=self.orderbook.max_price,
+                       self_trade_mode=self.orderbook.self_trade_mode,
+                       limit_mode=self.orderbook.limit_mode)
+
+    def snapshot(self) -> None:
+        """
+        Starts writing a snapshot of the current state and returns without
+        waiting for it to reach the disk.
+        """
+        self.wait()
+        self.orderbook.journal.close()
+        self.generation += 1
+        self.orderbook.journal = self._open_journal()
+        path = self._snapshot_path(self.generation)
+        if self.fork:
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    write_snapshot(path, encode(self.orderbook))
+                finally:
+                    os._exit(0 if os.path.exists(path) else 1)
+            self.pending = (self.generation, pid)
+        else:
+            # Serializing copies the state, the slow part happens in the thread
+            thread = threading.Thread(target=write_snapshot,
+                                      args=(path, encode(self.orderbook)))
+            thread.start()
+            self.pending = (self.generation, thread)
+
+    def wait(self) -> None:
+        """
+        Waits for the snapshot being written, if any, and removes the files
+        it makes obsolete.
+        """
+        if self.pending is None:
+            return
+        generation, writer = self.pending
+        self.pending = None
+        if isinstance(writer, threading.Thread):
+            writer.join()
+        else:
+            os.waitpid(writer, 0)
+        if not os.path.exists(self._snapshot_path(generation)):
+            return
+        snapshots, journals = self._generations()
+        for old in snapshots:
+            if old < generation:
+                os.remove(self._snapshot_path(old))
+        for old in journals:
+            if old < generation:
+                os.remove(self._journal_path(old))
+
+    def close(self) -> None:
+        self.wait()
+        self.orderbook.journal.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
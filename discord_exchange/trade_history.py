@@ -0,0 +1,279 @@
+import bisect
+import mmap
+import os
+import struct
+import time
+from array import array
+from discord_exchange.orderbook import Trade
+
+
+class _Column:
+    """
+    One column of a TradeHistory as a read-only sequence, so that it can be
+    searched with bisect one value at a time.
+    """
+
+    def __init__(self, history, name: str) -> None:
+        self.history = history
+        self.name = name
+
+    def __getitem__(self, index: int):
+        return self.history._value(self.name, index)
+
+    def __len__(self) -> int:
+        return len(self.history)
+
+
+class TradeHistory:
+    """
+    A trade history of any length that only keeps its latest trades in
+    memory.
+
+    Trades are held column by column like in a TradeLog, together with the
+    time they were appended. Once block_size trades are in memory they are
+    written to the end of a file as one block, a column after another, and
+    from then on read from a memory map of the file. Reading and searching
+    the history only touches the blocks it needs, and trades are searched
+    by id and time with binary search, so trades must be appended in the
+    order of their ids, as books hand them out.
+
+    The file starts with a header holding the block size, which a file
+    opened again keeps, and the number of trades. Closing the history writes
+    the trades still in memory as a last block, which is read back into
+    memory when the file is opened again.
+    """
+
+    MAGIC = b"DXT1"
+    VERSION = 1
+    # magic, version, trades per block, number of trades
+    HEADER = struct.Struct("<4sHxxqq")
+    # Columns of a block in the order they are written, all 8 bytes wide
+    COLUMNS = (("ids", "q"), ("buyers", "q"), ("sellers", "q"),
+               ("prices", "d"), ("volumes", "q"), ("times", "d"))
+    TYPECODES = dict(COLUMNS)
+    OFFSETS = {name: i for i, (name, _) in enumerate(COLUMNS)}
+
+    def __init__(self, path, block_size=65536, clock=time.time) -> None:
+        self.path = path
+        self.clock = clock
+        self.tail = {name: array(typecode) for name, typecode in
+                     TradeHistory.COLUMNS}
+        # The same arrays in the order of COLUMNS, for appending
+        self.tail_columns = tuple(self.tail.values())
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self.file = open(path, "r+b" if exists else "w+b")
+        if exists:
+            magic, version, block_size, num_trades = \
+                TradeHistory.HEADER.unpack(
+                    self.file.read(TradeHistory.HEADER.size))
+            assert magic == TradeHistory.MAGIC and \
+                version == TradeHistory.VERSION
+        else:
+            num_trades = 0
+        self.block_size = block_size
+        self.block_bytes = 8 * block_size * len(TradeHistory.COLUMNS)
+        self.num_blocks = num_trades // block_size
+        if num_trades % block_size:
+            self._read_tail(num_trades % block_size)
+        self._write_header()
+        self.map = None
+        self._map()
+        self.last_id = self._value("ids", -1) if num_trades else -1
+        self.last_time = self._value("times", -1) if num_trades else 0.0
+
+    def _write_header(self) -> None:
+        self.file.seek(0)
+        self.file.write(TradeHistory.HEADER.pack(
+            TradeHistory.MAGIC, TradeHistory.VERSION, self.block_size,
+            self.num_blocks * self.block_size + len(self.tail["ids"])))
+        self.file.truncate(TradeHistory.HEADER.size
+                           + self.num_blocks * self.block_bytes)
+        self.file.flush()
+
+    def _read_tail(self, num_trades: int) -> None:
+        # The last block was only partly filled
+        start = TradeHistory.HEADER.size + self.num_blocks * self.block_bytes
+        for name, _ in TradeHistory.COLUMNS:
+            self.file.seek(self._column_offset(start, name))
+            self.tail[name].frombytes(self.file.read(8 * num_trades))
+
+    def _column_offset(self, block_start: int, name: str) -> int:
+        return block_start + 8 * self.block_size * TradeHistory.OFFSETS[name]
+
+    def _map(self) -> None:
+        self._close_map()
+        if self.num_blocks:
+            self.map = mmap.mmap(self.file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+
+    def _close_map(self) -> None:
+        if self.map is None:
+            return
+        try:
+            self.map.close()
+        except BufferError:
+            # Views of the map are still being read, such as by an
+            # unfinished iteration, and it is closed once they are gone
+            pass
+        self.map = None
+
+    def append(self, trade: Trade) -> None:
+        assert trade.id > self.last_id, "trades must be appended by id"
+        ids, buyers, sellers, prices, volumes, times = self.tail_columns
+        ids.append(trade.id)
+        buyers.append(trade.buyer)
+        sellers.append(trade.seller)
+        prices.append(trade.price)
+        volumes.append(trade.volume)
+        # Times never go backwards, so they can be searched
+        now = self.clock()
+        if now > self.last_time:
+            self.last_time = now
+        times.append(self.last_time)
+        self.last_id = trade.id
+        if len(ids) == self.block_size:
+            self._spill()
+
+    def extend(self, trades) -> None:
+        for trade in trades:
+            self.append(trade)
+
+    def _spill(self) -> None:
+        self.file.seek(0, os.SEEK_END)
+        for name, _ in TradeHistory.COLUMNS:
+            self.tail[name].tofile(self.file)
+        self.num_blocks += 1
+        for column in self.tail.values():
+            del column[:]
+        self._write_header()
+        self._map()
+
+    def _block_column(self, block: int, name: str) -> memoryview:
+        start = TradeHistory.HEADER.size + block * self.block_bytes
+        offset = self._column_offset(start, name)
+        return memoryview(self.map)[offset:offset + 8 * self.block_size] \
+            .cast(TradeHistory.TYPECODES[name])
+
+    def _value(self, name: str, index: int):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("trade index out of range")
+        spilled = self.num_blocks * self.block_size
+        if index >= spilled:
+            return self.tail[name][index - spilled]
+        block, row = divmod(index, self.block_size)
+        start = TradeHistory.HEADER.size + block * self.block_bytes
+        offset = self._column_offset(start, name) + 8 * row
+        return struct.unpack_from(TradeHistory.TYPECODES[name], self.map,
+                                  offset)[0]
+
+    def _trades(self, start=0, stop=None):
+        """
+        Iterates over the trades from index start up to stop.
+        """
+        stop = len(self) if stop is None else stop
+        spilled = self.num_blocks * self.block_size
+        names = ("buyers", "sellers", "prices", "volumes", "ids")
+        while start < min(stop, spilled):
+            block, row = divmod(start, self.block_size)
+            end = min(stop - block * self.block_size, self.block_size)
+            columns = [self._block_column(block, name)[row:end]
+                       for name in names]
+            for buyer, seller, price, volume, trade_id in zip(*columns):
+                yield Trade(buyer, seller, price, volume, trade_id=trade_id)
+            start += end - row
+        if stop > spilled:
+            columns = [self.tail[name][max(start - spilled, 0):stop - spilled]
+                       for name in names]
+            for buyer, seller, price, volume, trade_id in zip(*columns):
+                yield Trade(buyer, seller, price, volume, trade_id=trade_id)
+
+    def between_ids(self, start: int, stop: int):
+        """
+        Iterates over the trades with ids from start up to stop.
+        """
+        ids = _Column(self, "ids")
+        return self._trades(bisect.bisect_left(ids, start),
+                            bisect.bisect_left(ids, stop))
+
+    def between_times(self, start: float, stop: float):
+        """
+        Iterates over the trades appended from time start up to stop.
+        """
+        times = _Column(self, "times")
+        return self._trades(bisect.bisect_left(times, start),
+                            bisect.bisect_left(times, stop))
+
+    def of_user(self, user: int):
+        """
+        Iterates over the trades in which user bought or sold.
+        """
+        names = ("buyers", "sellers", "prices", "volumes", "ids")
+        blocks = [[self._block_column(block, name) for name in names]
+                  for block in range(self.num_blocks)]
+        blocks.append([self.tail[name] for name in names])
+        for columns in blocks:
+            buyers, sellers = columns[0], columns[1]
+            for row in range(len(buyers)):
+                if buyers[row] == user or sellers[row] == user:
+                    yield Trade(*(column[row] for column in columns[:4]),
+                                trade_id=columns[4][row])
+
+    def column(self, name: str) -> array:
+        """
+        Returns a whole column, such as "prices", as one array in memory.
+        """
+        values = array(TradeHistory.TYPECODES[name])
+        for block in range(self.num_blocks):
+            values.frombytes(self._block_column(block, name).cast("B"))
+        values.extend(self.tail[name])
+        return values
+
+    # The columns Settlement reads
+    ids = property(lambda self: self.column("ids"))
+    buyers = property(lambda self: self.column("buyers"))
+    sellers = property(lambda self: self.column("sellers"))
+    prices = property(lambda self: self.column("prices"))
+    volumes = property(lambda self: self.column("volumes"))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("trade index out of range")
+        return next(self._trades(index, index + 1))
+
+    def __iter__(self):
+        return self._trades()
+
+    def __len__(self) -> int:
+        return self.num_blocks * self.block_size + len(self.tail["ids"])
+
+    def close(self) -> None:
+        """
+        Writes the trades still in memory as a last, partly filled block.
+        """
+        if self.file.closed:
+            return
+        num_trades = len(self.tail["ids"])
+        if num_trades:
+            self.file.seek(0, os.SEEK_END)
+            padding = bytes(8 * (self.block_size - num_trades))
+            for name, _ in TradeHistory.COLUMNS:
+                self.tail[name].tofile(self.file)
+                self.file.write(padding)
+        self.file.seek(0)
+        self.file.write(TradeHistory.HEADER.pack(
+            TradeHistory.MAGIC, TradeHistory.VERSION, self.block_size,
+            len(self)))
+        self._close_map()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
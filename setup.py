@@ -10,6 +10,7 @@ setup(
     license='Apache License 2.0',
     packages=['discord_exchange'],
     install_requires=[],
+    extras_require={'settlement': ['numpy']},
     classifiers=[
         'Development Status :: 1 - Planning',
         'Intended Audience :: Science/Research',
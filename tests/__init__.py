@@ -1,3 +1,19 @@
 from tests.order_test import OrderTest
 from tests.trade_test import TradeTest
-from tests.orderbook_test import OrderbookTest
\ No newline at end of file
+from tests.orderbook_test import OrderbookTest, DenseOrderbookTest
+from tests.price_ladder_test import PriceLadderTest
+from tests.price_bitmap_test import PriceBitmapTest
+from tests.price_level_test import PriceLevelTest
+from tests.trade_log_test import TradeLogTest
+from tests.exchange_test import ExchangeTest, ShardedExchangeTest
+from tests.gateway_test import OrderGatewayTest
+from tests.journal_test import JournalTest
+from tests.snapshot_test import SnapshotTest
+from tests.settlement_test import SettlementTest
+from tests.user_data_test import UserDataTest
+from tests.leaderboard_test import LeaderboardTest
+from tests.matching_test import MatchingTest
+from tests.market_data_test import MarketDataTest, MarketDataAsyncTest
+from tests.render_cache_test import RenderCacheTest, BookMessageTest
+from tests.instrumentation_test import InstrumentationTest
+from tests.trade_history_test import TradeHistoryTest
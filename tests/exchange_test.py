@@ -0,0 +1,126 @@
+import random
+import unittest
+from discord_exchange import Exchange, ShardedExchange, Order, Orderbook
+from discord_exchange.orderbook import LimitExceeded
+
+
+def random_orders(seed, n):
+    rng = random.Random(seed)
+    return [(rng.choice((Order.TYPE_BID, Order.TYPE_ASK)), rng.randrange(5),
+             rng.randint(3, 7), rng.randint(1, 3)) for _ in range(n)]
+
+
+def trade_tuples(trades):
+    return [(t.id, t.buyer, t.seller, t.price, t.volume) for t in trades]
+
+
+class ExchangeTest(unittest.TestCase):
+    def test_independent_markets(self):
+        ex = Exchange()
+        ex.insert_bid("a", 0, 5, 2)
+        trades = ex.insert_ask("b", 1, 5, 2)
+
+        self.assertListEqual(trades, [])
+        self.assertEqual(ex.market("a").total_bid_volume, 2)
+        self.assertEqual(ex.market("b").total_ask_volume, 2)
+
+        trades = ex.insert_ask("a", 1, 5, 2)
+        self.assertEqual(len(trades), 1)
+        self.assertEqual(trades[0].id, 0)
+        self.assertEqual(ex.market("b").total_ask_volume, 2)
+
+    def test_position_limit(self):
+        ex = Exchange(position_limit=3)
+        ex.insert_bid("a", 0, 5, 10)
+        self.assertEqual(ex.market("a").total_bid_volume, 3)
+
+    def test_limit_mode(self):
+        ex = Exchange(position_limit=3, limit_mode=Orderbook.LIMIT_REJECT)
+        with self.assertRaises(LimitExceeded):
+            ex.insert_bid("a", 0, 5, 10)
+
+    def test_self_trade_mode(self):
+        ex = Exchange(self_trade_mode=Orderbook.SELF_TRADE_CANCEL_NEWEST)
+        ex.insert_bid("a", 0, 5, 2)
+        self.assertListEqual(ex.insert_ask("a", 0, 5, 2), [])
+        self.assertEqual(ex.market("a").total_bid_volume, 2)
+
+
+class ShardedExchangeTest(unittest.TestCase):
+    def test_matches_in_process_exchange(self):
+        markets = [f"market-{i}" for i in range(6)]
+        batches = [(markets[i % len(markets)], random_orders(i, 50))
+                   for i in range(24)]
+
+        reference = Exchange()
+        expected = [reference.submit_batch(name, orders)
+                    for name, orders in batches]
+
+        with ShardedExchange(3) as ex:
+            # Send everything before receiving anything so markets on
+            # different workers interleave
+            request_ids = [ex.send(name, orders) for name, orders in batches]
+            received = [ex.receive(request_id)
+                        for request_id in reversed(request_ids)][::-1]
+
+        for trades, expected_trades in zip(received, expected):
+            self.assertListEqual(trade_tuples(trades),
+                                 trade_tuples(expected_trades))
+
+    def test_single_orders(self):
+        with ShardedExchange(2) as ex:
+            self.assertListEqual(ex.insert_bid("a", 0, 5, 2), [])
+            trades = ex.insert_ask("a", 1, 5, 2)
+        self.assertListEqual(trade_tuples(trades), [(0, 0, 1, 5, 2)])
+
+    def test_stable_routing(self):
+        with ShardedExchange(4) as ex:
+            workers = {ex.worker_of(f"market-{i}") for i in range(32)}
+            self.assertEqual(ex.worker_of("a"), ex.worker_of("a"))
+        self.assertGreater(len(workers), 1)
+
+    def test_settings(self):
+        mode = Orderbook.SELF_TRADE_CANCEL_NEWEST
+        with ShardedExchange(2, position_limit=3, tick_size=0.5,
+                             max_price=50, self_trade_mode=mode,
+                             limit_mode=Orderbook.LIMIT_REJECT) as ex:
+            self.assertListEqual(ex.insert_bid("a", 0, 5.5, 2), [])
+            # The order would cross its user's own bid
+            self.assertListEqual(ex.insert_ask("a", 0, 5.5, 1), [])
+            with self.assertRaises(LimitExceeded):
+                ex.insert_bid("a", 0, 5, 2)
+            with self.assertRaises(AssertionError):
+                ex.insert_ask("a", 1, 5.2, 1)
+            with self.assertRaises(AssertionError):
+                ex.insert_ask("a", 1, 51, 1)
+            trades = ex.insert_ask("a", 1, 5, 3)
+            self.assertListEqual(trade_tuples(trades), [(0, 0, 1, 5.5, 2)])
+
+    def test_time_in_force(self):
+        with ShardedExchange(2) as ex:
+            ex.insert_bid("a", 0, 5, 2)
+            trades = ex.insert_ask("a", 1, 5, 3, Order.IMMEDIATE_OR_CANCEL)
+            self.assertListEqual(trade_tuples(trades), [(0, 0, 1, 5, 2)])
+            # Nothing was left resting
+            self.assertListEqual(ex.insert_bid("a", 2, 5, 1), [])
+            self.assertListEqual(
+                ex.submit_batch("a", [(Order.TYPE_ASK, 1, 5, 2)],
+                                Order.FILL_OR_KILL), [])
+
+    def test_refused_order_in_batch(self):
+        with ShardedExchange(1, limit_mode=Orderbook.LIMIT_REJECT) as ex:
+            orders = [(Order.TYPE_BID, 0, 5, 5), (Order.TYPE_BID, 0, 5, 20)]
+            for time_in_force in (Order.GOOD_TILL_CANCEL,
+                                  Order.IMMEDIATE_OR_CANCEL):
+                ex.insert_ask("a", 1, 5, 5)
+                with self.assertRaises(LimitExceeded) as raised:
+                    ex.submit_batch("a", orders, time_in_force)
+                self.assertEqual(raised.exception.index, 1)
+            self.assertEqual(trade_tuples(raised.exception.trades),
+                             [(1, 0, 1, 5, 5)])
+
+    def test_errors_are_raised(self):
+        with ShardedExchange(1) as ex:
+            with self.assertRaises(AssertionError):
+                ex.insert_bid("a", 0, 5, 0)
+            self.assertListEqual(ex.insert_bid("a", 0, 5, 1), [])
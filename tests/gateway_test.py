@@ -0,0 +1,127 @@
+import asyncio
+import unittest
+from discord_exchange import Exchange, OrderGateway, LoadClient, Order
+
+
+class OrderGatewayTest(unittest.IsolatedAsyncioTestCase):
+    async def test_awaitable_fills(self):
+        async with OrderGateway() as gateway:
+            self.assertListEqual(await gateway.insert_bid("a", 0, 5, 2), [])
+            trades = await gateway.insert_ask("a", 1, 5, 3)
+
+        self.assertEqual(len(trades), 1)
+        self.assertEqual(trades[0].buyer, 0)
+        self.assertEqual(trades[0].seller, 1)
+        self.assertEqual(trades[0].volume, 2)
+
+    async def test_market_orders(self):
+        exchange = Exchange()
+        async with OrderGateway(exchange) as gateway:
+            await gateway.insert_ask("a", 0, 5, 2)
+            trades = await gateway.market_bid("a", 1, 3)
+            self.assertEqual([t.volume for t in trades], [2])
+            self.assertEqual(await gateway.market_ask("a", 1, 1,
+                                                      Order.FILL_OR_KILL), [])
+        self.assertEqual(exchange.market("a").total_bid_volume, 0)
+
+    async def test_orders_in_one_tick_are_batched(self):
+        exchange = Exchange()
+        async with OrderGateway(exchange) as gateway:
+            results = await asyncio.gather(
+                gateway.insert_bid("a", 0, 5, 1),
+                gateway.insert_bid("a", 1, 5, 1),
+                gateway.insert_ask("a", 2, 5, 2))
+
+        self.assertListEqual(results[0], [])
+        self.assertListEqual(results[1], [])
+        self.assertListEqual([t.buyer for t in results[2]], [0, 1])
+        self.assertEqual(exchange.market("a").total_bid_volume, 0)
+
+    async def test_markets_are_independent(self):
+        exchange = Exchange()
+        async with OrderGateway(exchange) as gateway:
+            await gateway.insert_bid("a", 0, 5, 1)
+            self.assertListEqual(await gateway.insert_ask("b", 1, 5, 1), [])
+        self.assertEqual(exchange.market("a").total_bid_volume, 1)
+        self.assertEqual(exchange.market("b").total_ask_volume, 1)
+
+    async def test_backpressure(self):
+        async with OrderGateway(max_queue_size=2) as gateway:
+            submissions = [asyncio.create_task(gateway.insert_bid("a", 0, 5, 1))
+                           for _ in range(5)]
+            # Let the submitters run until the queue is full
+            await asyncio.sleep(0)
+            self.assertTrue(gateway.queues["a"].full())
+            await asyncio.gather(*submissions)
+            await gateway.drain()
+            self.assertTrue(gateway.queues["a"].empty())
+
+    async def test_close_cancels_pending_orders(self):
+        gateway = OrderGateway(max_queue_size=1)
+        submissions = [asyncio.create_task(gateway.insert_bid("a", 0, 5, 1))
+                       for _ in range(3)]
+        # The first order is queued and the others wait for room
+        await asyncio.sleep(0)
+        await asyncio.wait_for(gateway.close(), 1)
+        self.assertTrue(all(submission.done() for submission in submissions))
+        # Orders matched before the gateway closed keep their fills
+        self.assertTrue(submissions[-1].cancelled())
+        self.assertEqual(gateway.fills, set())
+
+    async def test_reads_while_matching_off_the_loop(self):
+        exchange = Exchange(position_limit=1000)
+        book = exchange.market("a")
+        for i in range(2000):
+            book.insert_ask(i % 20, 1 + i % 100, 1)
+        positions = book.leaderboard("position")
+        reads = 0
+
+        async def read():
+            nonlocal reads
+            while True:
+                bids, asks = book.depth()
+                self.assertTrue(all(volume > 0 for _, volume, _ in asks))
+                # Every trade moves two positions, so they only add up to
+                # 0 between orders
+                self.assertEqual(sum(value for _, value in
+                                     positions.top(1000)), 0)
+                reads += 1
+                await asyncio.sleep(0)
+
+        async with OrderGateway(exchange) as gateway:
+            reader = asyncio.create_task(read())
+            await asyncio.gather(*(gateway.market_bid("a", 100 + user, 50)
+                                   for user in range(40)))
+            reader.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await reader
+        self.assertGreater(reads, 0)
+        self.assertEqual(book.total_ask_volume, 0)
+
+    async def test_invalid_order(self):
+        async with OrderGateway() as gateway:
+            with self.assertRaises(AssertionError):
+                await gateway.insert_bid("a", 0, 5, 0)
+            self.assertListEqual(await gateway.insert_bid("a", 0, 5, 1), [])
+
+    async def test_load_client(self):
+        exchange = Exchange()
+        async with OrderGateway(exchange) as gateway:
+            client = LoadClient(gateway, markets=("a", "b"), num_users=10)
+            stats = await client.run(500, concurrency=20)
+
+        self.assertEqual(stats["orders"], 500)
+        self.assertGreater(stats["trades"], 0)
+        ob = exchange.market("a")
+        best_bid, best_ask = ob.best_bid(), ob.best_ask()
+        if best_bid is not None and best_ask is not None:
+            self.assertLess(best_bid.price, best_ask.price)
+
+    async def test_load_client_is_deterministic(self):
+        async def session():
+            async with OrderGateway() as gateway:
+                return await LoadClient(gateway, seed=3).run(200, 1)
+
+        first = await session()
+        second = await session()
+        self.assertEqual(first["trades"], second["trades"])
@@ -0,0 +1,110 @@
+import unittest
+from discord_exchange import Orderbook
+from discord_exchange.instrumentation import Instrumentation, Histogram
+from tests.journal_test import random_session, book_state
+
+
+class FakeClock:
+    """
+    Advances by a fixed number of nanoseconds whenever it is read.
+    """
+
+    def __init__(self, step) -> None:
+        self.now = 0
+        self.step = step
+
+    def __call__(self) -> int:
+        self.now += self.step
+        return self.now
+
+
+class InstrumentationTest(unittest.TestCase):
+    def test_histogram(self):
+        histogram = Histogram()
+        for ns in (0, 1, 3, 3, 100, 1000):
+            histogram.observe(ns)
+        self.assertEqual(histogram.count, 6)
+        self.assertEqual(histogram.sum, 1107)
+        self.assertEqual(histogram.buckets[:3], [1, 1, 2])
+        self.assertEqual(histogram.quantile(0.5), 4)
+        self.assertEqual(histogram.quantile(1.0), 1024)
+        self.assertEqual(Histogram().quantile(0.5), 0)
+
+    def test_does_not_change_the_book(self):
+        plain = Orderbook(position_limit=3)
+        instrumented = Orderbook(position_limit=3)
+        Instrumentation(instrumented)
+        random_session(plain, 0, 500)
+        random_session(instrumented, 0, 500)
+        self.assertEqual(book_state(plain), book_state(instrumented))
+
+    def test_counters(self):
+        ob = Orderbook(position_limit=3)
+        instrumentation = Instrumentation(ob)
+        trades = random_session(ob, 1, 500)
+        counters = instrumentation.as_dict()["counters"]
+        self.assertEqual(counters["trades"], len(trades))
+        self.assertEqual(counters["levels_created"]
+                         - counters["levels_removed"],
+                         len(ob.bids) + len(ob.asks))
+        self.assertGreater(counters["levels_removed"], 0)
+        self.assertGreater(counters["volume_trimmed"], 0)
+        self.assertEqual(counters["users_created"], len(ob.users))
+
+    def test_trimming(self):
+        ob = Orderbook(position_limit=5)
+        instrumentation = Instrumentation(ob)
+        ob.insert_bid(0, 5, 3)
+        ob.insert_bid(0, 4, 2)
+        ob.insert_bid(0, 6, 4)
+        operations = instrumentation.as_dict()["operations"]
+        self.assertEqual(operations["trim"]["count"], 1)
+        self.assertEqual(instrumentation.counters["volume_trimmed"], 4)
+        # The level at 5 went, the one at 4 only shrank
+        self.assertEqual(instrumentation.counters["levels_removed"], 1)
+        self.assertEqual(ob.depth(), ([(6, 4, 1), (4, 1, 1)], []))
+
+    def test_timing(self):
+        ob = Orderbook()
+        instrumentation = Instrumentation(ob, clock=FakeClock(10))
+        ob.insert_bid(0, 5, 1)
+        operations = instrumentation.as_dict()["operations"]
+        # The clock is read for get_user, new_level and rest within insert
+        self.assertEqual(operations["get_user"]["sum_ns"], 10)
+        self.assertEqual(operations["insert"]["count"], 1)
+        self.assertEqual(operations["insert"]["sum_ns"], 70)
+        self.assertEqual(operations["cancel"]["count"], 0)
+
+    def test_detach(self):
+        ob = Orderbook()
+        instrumentation = Instrumentation(ob)
+        ob.insert_bid(0, 5, 1)
+        instrumentation.detach()
+        self.assertEqual(vars(ob).keys(), vars(Orderbook()).keys())
+        ob.insert_bid(0, 5, 1)
+        self.assertEqual(instrumentation.histograms["insert"].count, 1)
+        # A detached book can be instrumented again
+        Instrumentation(ob)
+        with self.assertRaises(AssertionError):
+            Instrumentation(ob)
+
+    def test_prometheus(self):
+        ob = Orderbook()
+        instrumentation = Instrumentation(ob, clock=FakeClock(1000))
+        ob.insert_bid(0, 5, 1)
+        ob.insert_ask(1, 5, 1)
+        lines = instrumentation.prometheus().splitlines()
+        self.assertIn("# TYPE orderbook_operation_seconds histogram", lines)
+        # Matching read the clock twice more, for the discarded order
+        self.assertIn('orderbook_operation_seconds_bucket{operation="match",'
+                      'le="2.048e-06"} 0', lines)
+        self.assertIn('orderbook_operation_seconds_bucket{operation="match",'
+                      'le="4.096e-06"} 1', lines)
+        self.assertIn('orderbook_operation_seconds_bucket{operation="match",'
+                      'le="+Inf"} 1', lines)
+        self.assertIn('orderbook_operation_seconds_count{operation="insert"}'
+                      ' 2', lines)
+        self.assertIn("# TYPE orderbook_trades_total counter", lines)
+        self.assertIn("orderbook_trades_total 1", lines)
+        self.assertIn("exchange_trades_total 1",
+                      instrumentation.prometheus("exchange").splitlines())
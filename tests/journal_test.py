@@ -0,0 +1,217 @@
+import os
+import random
+import tempfile
+import unittest
+from discord_exchange import Orderbook, Order
+from discord_exchange.orderbook import LimitExceeded
+from discord_exchange.journal import Journal, recover
+
+
+def random_session(ob, seed, n):
+    rng = random.Random(seed)
+    trades = []
+    for _ in range(n):
+        action = rng.random()
+        if action < 0.1 and ob.orders:
+            ob.cancel(rng.choice(list(ob.orders)))
+        elif action < 0.2 and ob.orders:
+            trades += ob.amend(rng.choice(list(ob.orders)),
+                               rng.randint(3, 7), rng.randint(1, 3))
+        elif action < 0.6:
+            trades += ob.insert_bid(rng.randrange(5), rng.randint(3, 7),
+                                    rng.randint(1, 3))
+        else:
+            trades += ob.insert_ask(rng.randrange(5), rng.randint(3, 7),
+                                    rng.randint(1, 3))
+    return trades
+
+
+def book_state(ob):
+    users = {user: (data.position, data.bid_volume, data.ask_volume,
+                    list(data.bids), list(data.asks), data.num_trades,
+                    data.traded_volume, data.traded_notional, data.cash,
+                    data.average_price, data.realized_pnl)
+             for user, data in ob.users.items()}
+    orders = {order_id: (o.type, o.user_id, o.price, o.volume, o.updated_at)
+              for order_id, o in ob.orders.items()}
+    return (ob.depth(), users, orders, ob.total_bid_volume,
+            ob.total_ask_volume, ob.order_ids.value,
+            ob.order_updates.value, ob.trade_ids.value)
+
+
+def trade_tuples(trades):
+    return [(t.id, t.buyer, t.seller, t.price, t.volume) for t in trades]
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "book.journal")
+
+    def test_recover(self):
+        with Journal(self.path, position_limit=4) as journal:
+            ob = Orderbook(position_limit=4, journal=journal)
+            trades = random_session(ob, 0, 500)
+
+        recovered, recovered_trades = recover(self.path)
+        recovered.journal.close()
+        self.assertEqual(recovered.position_limit, 4)
+        self.assertEqual(book_state(recovered), book_state(ob))
+        self.assertListEqual(trade_tuples(recovered_trades),
+                             trade_tuples(trades))
+
+    def test_settings_must_match(self):
+        with Journal(self.path) as journal:
+            with self.assertRaises(AssertionError):
+                Orderbook(position_limit=3, journal=journal)
+            with self.assertRaises(AssertionError):
+                Orderbook(limit_mode=Orderbook.LIMIT_REJECT, journal=journal)
+        # An existing journal keeps the settings in its header
+        with Journal(self.path, position_limit=3) as journal:
+            self.assertEqual(journal.position_limit, 10)
+            self.assertTrue(journal.matches(Orderbook()))
+
+    def test_continue_after_recovery(self):
+        with Journal(self.path) as journal:
+            ob = Orderbook(journal=journal)
+            random_session(ob, 1, 200)
+
+        recovered, _ = recover(self.path)
+        random_session(recovered, 2, 200)
+        recovered.journal.close()
+
+        reference = Orderbook()
+        random_session(reference, 1, 200)
+        random_session(reference, 2, 200)
+        again, _ = recover(self.path)
+        again.journal.close()
+        self.assertEqual(book_state(again), book_state(reference))
+
+    def test_torn_record(self):
+        with Journal(self.path) as journal:
+            ob = Orderbook(journal=journal)
+            ob.insert_bid(0, 5, 2)
+            ob.insert_ask(1, 6, 2)
+        with open(self.path, "ab") as file:
+            file.write(b"\x00" * (Journal.RECORD.size // 2))
+
+        recovered, _ = recover(self.path)
+        self.assertEqual(book_state(recovered), book_state(ob))
+        recovered.insert_ask(2, 5, 1)
+        recovered.journal.close()
+
+        again, trades = recover(self.path)
+        again.journal.close()
+        self.assertEqual(len(trades), 1)
+        self.assertEqual(again.total_bid_volume, 1)
+
+    def test_record_kinds(self):
+        with Journal(self.path) as journal:
+            ob = Orderbook(journal=journal)
+            ob.insert_bid(0, 5, 2)
+            ob.amend(0, 5, 1)
+            ob.insert_ask(1, 5, 1)
+            ob.insert_ask(1, 6, 1)
+            ob.cancel(2)
+            ob.cancel(2)
+
+        kinds = [record[0] for record in Journal.records(self.path)]
+        self.assertListEqual(kinds, [
+            Journal.KIND_ORDER, Journal.KIND_AMEND, Journal.KIND_ORDER,
+            Journal.KIND_TRADE, Journal.KIND_ORDER, Journal.KIND_CANCEL])
+        self.assertEqual(os.path.getsize(self.path),
+                         Journal.HEADER.size + 6 * Journal.RECORD.size)
+
+    def test_submit_batch(self):
+        orders = [(Order.TYPE_BID, 0, 5, 1), (Order.TYPE_ASK, 1, 5, 2),
+                  (Order.TYPE_BID, 2, 5, 1)]
+        with Journal(self.path) as journal:
+            ob = Orderbook(journal=journal)
+            trades = ob.submit_batch(orders)
+
+        recovered, recovered_trades = recover(self.path)
+        recovered.journal.close()
+        self.assertEqual(book_state(recovered), book_state(ob))
+        self.assertListEqual(trade_tuples(recovered_trades),
+                             trade_tuples(trades))
+
+    def test_time_in_force(self):
+        with Journal(self.path) as journal:
+            ob = Orderbook(journal=journal)
+            ob.insert_ask(0, 5, 2)
+            ob.insert_bid(1, 6, 3, Order.IMMEDIATE_OR_CANCEL)
+            ob.insert_ask(0, 5, 2)
+            ob.insert_bid(2, 5, 3, Order.FILL_OR_KILL)
+            ob.market_bid(3, 1)
+
+        recovered, _ = recover(self.path)
+        recovered.journal.close()
+        self.assertEqual(book_state(recovered), book_state(ob))
+        self.assertEqual(recovered.total_ask_volume, 1)
+
+    def test_fsync_policies(self):
+        for fsync in (Journal.FSYNC_ALWAYS, Journal.FSYNC_GROUP,
+                      Journal.FSYNC_NEVER):
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            journal = Journal(self.path, fsync=fsync, group_size=4)
+            ob = Orderbook(journal=journal)
+            for i in range(3):
+                ob.insert_bid(i, 5, 1)
+            if fsync == Journal.FSYNC_ALWAYS:
+                self.assertEqual(journal.pending, 0)
+            else:
+                self.assertEqual(journal.pending, 3)
+            ob.insert_bid(3, 5, 1)
+            if fsync == Journal.FSYNC_GROUP:
+                self.assertEqual(journal.pending, 0)
+            journal.close()
+            self.assertEqual(len(list(Journal.records(self.path))), 4)
+
+    def test_tick_size(self):
+        with Journal(self.path, tick_size=0.25) as journal:
+            ob = Orderbook(journal=journal, tick_size=0.25)
+            ob.insert_ask(0, 5.25, 2)
+            ob.insert_bid(1, 5.5, 1)
+            ob.insert_bid(1, 4.75, 1)
+            ob.amend(2, 5.0, 2)
+
+        recovered, _ = recover(self.path)
+        recovered.journal.close()
+        self.assertEqual(recovered.tick_size, 0.25)
+        self.assertEqual(book_state(recovered), book_state(ob))
+
+    def test_max_price(self):
+        with Journal(self.path, max_price=100) as journal:
+            ob = Orderbook(journal=journal, max_price=100)
+            random_session(ob, 3, 200)
+
+        recovered, _ = recover(self.path)
+        recovered.journal.close()
+        self.assertEqual(recovered.max_price, 100)
+        self.assertEqual(book_state(recovered), book_state(ob))
+
+    def test_self_trade_mode(self):
+        mode = Orderbook.SELF_TRADE_DECREMENT_BOTH
+        with Journal(self.path, self_trade_mode=mode) as journal:
+            ob = Orderbook(journal=journal, self_trade_mode=mode)
+            random_session(ob, 4, 300)
+
+        recovered, _ = recover(self.path)
+        recovered.journal.close()
+        self.assertEqual(recovered.self_trade_mode, mode)
+        self.assertEqual(book_state(recovered), book_state(ob))
+
+    def test_limit_mode(self):
+        with Journal(self.path, position_limit=3,
+                     limit_mode=Orderbook.LIMIT_REJECT) as journal:
+            ob = Orderbook(position_limit=3, journal=journal,
+                           limit_mode=Orderbook.LIMIT_REJECT)
+            ob.insert_bid(0, 5, 2)
+
+        recovered, _ = recover(self.path)
+        recovered.journal.close()
+        self.assertEqual(recovered.limit_mode, Orderbook.LIMIT_REJECT)
+        with self.assertRaises(LimitExceeded):
+            recovered.insert_bid(0, 5, 2)
@@ -0,0 +1,99 @@
+import random
+import unittest
+from discord_exchange import Orderbook, Trade
+from discord_exchange.orderbook import Leaderboard, UserData
+
+
+class LeaderboardTest(unittest.TestCase):
+    def sorted_users(self, ob, metric):
+        return sorted(((user.identifier, getattr(user, metric))
+                       for user in ob.users.values()),
+                      key=lambda entry: (-entry[1], entry[0]))
+
+    def test_empty(self):
+        leaderboard = Leaderboard("position")
+        self.assertEqual(len(leaderboard), 0)
+        self.assertEqual(leaderboard.top(3), [])
+
+    def test_ranking(self):
+        users = [UserData(i) for i in range(4)]
+        for user, position in zip(users, (3, -1, 5, 3)):
+            user.position = position
+        leaderboard = Leaderboard("position", users)
+
+        self.assertEqual(leaderboard.top(3), [(2, 5), (0, 3), (3, 3)])
+        self.assertEqual(leaderboard.rank(1), 3)
+        self.assertEqual(leaderboard.at(1), (0, 3))
+        self.assertEqual(len(leaderboard), 4)
+
+        users[1].position = 10
+        leaderboard.update(users[1])
+        self.assertEqual(leaderboard.rank(1), 0)
+        self.assertEqual(leaderboard.rank(3), 3)
+        self.assertEqual(len(leaderboard), 4)
+
+    def test_updated_by_trades(self):
+        ob = Orderbook()
+        ob.insert_ask(0, 10, 3)
+        leaderboard = ob.leaderboard("position")
+        ob.insert_bid(1, 10, 2)
+        ob.insert_bid(2, 10, 1)
+
+        self.assertEqual(leaderboard.top(3), [(1, 2), (2, 1), (0, -3)])
+        self.assertEqual(leaderboard.rank(0), 2)
+        self.assertIs(ob.leaderboard("position"), leaderboard)
+
+    def test_new_users_are_ranked(self):
+        ob = Orderbook()
+        leaderboard = ob.leaderboard("traded_volume")
+        ob.insert_bid(5, 10, 1)
+        self.assertIn(5, leaderboard)
+        self.assertEqual(leaderboard.top(1), [(5, 0)])
+
+    def test_matches_sorting(self):
+        rng = random.Random(0)
+        ob = Orderbook(position_limit=20)
+        metrics = ("position", "realized_pnl", "traded_volume", "cash")
+        for metric in metrics:
+            ob.leaderboard(metric)
+        for _ in range(2000):
+            user = rng.randrange(50)
+            price = rng.randint(40, 60)
+            volume = rng.randint(1, 5)
+            if rng.random() < 0.5:
+                ob.insert_bid(user, price, volume)
+            else:
+                ob.insert_ask(user, price, volume)
+        for metric in metrics:
+            leaderboard = ob.leaderboard(metric)
+            expected = self.sorted_users(ob, metric)
+            self.assertEqual(leaderboard.top(len(expected)), expected)
+            for rank, (user_id, _) in enumerate(expected):
+                self.assertEqual(leaderboard.rank(user_id), rank)
+                self.assertEqual(leaderboard.at(rank)[0], user_id)
+
+    def test_standalone_user(self):
+        user = UserData(0)
+        leaderboard = Leaderboard("cash", [user])
+        user.leaderboards["cash"] = leaderboard
+        user.register_trade(Trade(1, 0, 10, 2))
+        self.assertEqual(leaderboard.top(1), [(0, 20)])
+
+    def test_many_buckets(self):
+        rng = random.Random(1)
+        users = [UserData(i) for i in range(5 * Leaderboard.LOAD)]
+        leaderboard = Leaderboard("cash", users[:Leaderboard.LOAD])
+        for _ in range(20000):
+            user = rng.choice(users)
+            user.cash = rng.randint(-100, 100)
+            leaderboard.update(user)
+        expected = sorted(((user.identifier, user.cash)
+                           for user in users if user.identifier in leaderboard),
+                          key=lambda entry: (-entry[1], entry[0]))
+        self.assertEqual(len(leaderboard), len(expected))
+        self.assertEqual(leaderboard.top(len(expected) + 1), expected)
+        for rank in range(0, len(expected), 97):
+            user_id = expected[rank][0]
+            self.assertEqual(leaderboard.rank(user_id), rank)
+            self.assertEqual(leaderboard.at(rank), expected[rank])
+        self.assertEqual(leaderboard.top(0), [])
@@ -0,0 +1,169 @@
+import asyncio
+import unittest
+from discord_exchange import Orderbook, Order, Exchange, OrderGateway
+from discord_exchange.market_data import (MarketDataFeed, LevelUpdate,
+                                          TradeUpdate, OrderAck, Subscription,
+                                          BookMirror)
+from tests.journal_test import random_session
+
+
+def describe(events):
+    described = []
+    for event in events:
+        if isinstance(event, LevelUpdate):
+            described.append(("level", event.side, event.price, event.volume,
+                              event.num_orders))
+        elif isinstance(event, TradeUpdate):
+            described.append(("trade", event.trade.buyer, event.trade.seller,
+                              event.trade.price, event.trade.volume))
+        else:
+            described.append(("ack", event.status, event.order_id,
+                              event.filled, event.resting))
+    return described
+
+
+class MarketDataTest(unittest.TestCase):
+    def test_insert_events(self):
+        ob = Orderbook()
+        feed = MarketDataFeed(ob)
+        published = []
+        feed.subscribe(published.append)
+
+        ob.insert_bid(0, 5, 2)
+        ob.insert_bid(1, 4, 1)
+        ob.insert_ask(2, 4, 4)
+        self.assertListEqual(describe(published[0]), [
+            ("ack", OrderAck.NEW, 0, 0, 2),
+            ("level", Order.TYPE_BID, 5, 2, 1)])
+        self.assertListEqual(describe(published[2]), [
+            ("ack", OrderAck.NEW, 2, 3, 1),
+            ("trade", 0, 2, 5, 2),
+            ("trade", 1, 2, 4, 1),
+            ("level", Order.TYPE_BID, 4, 0, 0),
+            ("level", Order.TYPE_BID, 5, 0, 0),
+            ("level", Order.TYPE_ASK, 4, 1, 1)])
+        sequences = [event.sequence for events in published
+                     for event in events]
+        self.assertListEqual(sequences, list(range(len(sequences))))
+
+    def test_cancel_and_amend_events(self):
+        ob = Orderbook()
+        feed = MarketDataFeed(ob)
+        published = []
+        feed.subscribe(published.append)
+        ob.insert_ask(0, 6, 3)
+        ob.amend(0, 6, 2)
+        ob.amend(0, 6, 2)
+        ob.amend(0, 7, 2)
+        ob.cancel(0)
+        self.assertListEqual(describe(published[1]), [
+            ("ack", OrderAck.AMENDED, 0, 0, 2),
+            ("level", Order.TYPE_ASK, 6, 2, 1)])
+        # Nothing about the level changed
+        self.assertListEqual(describe(published[2]), [
+            ("ack", OrderAck.AMENDED, 0, 0, 2)])
+        self.assertListEqual(describe(published[3]), [
+            ("ack", OrderAck.AMENDED, 0, 0, 2),
+            ("level", Order.TYPE_ASK, 6, 0, 0),
+            ("level", Order.TYPE_ASK, 7, 2, 1)])
+        self.assertListEqual(describe(published[4]), [
+            ("ack", OrderAck.CANCELLED, 0, 0, 0),
+            ("level", Order.TYPE_ASK, 7, 0, 0)])
+
+    def check_mirror(self, ob, seed):
+        feed = MarketDataFeed(ob)
+        mirror = BookMirror()
+
+        def apply(events):
+            mirror(events)
+            self.assertEqual(mirror.depth(), ob.depth())
+
+        feed.subscribe(apply)
+        trades = random_session(ob, seed, 500)
+        self.assertEqual([t.id for t in mirror.trades], [t.id for t in trades])
+
+    def test_mirror_follows_book(self):
+        for seed in range(5):
+            with self.subTest(seed=seed):
+                # A low limit makes resting orders get trimmed
+                self.check_mirror(Orderbook(position_limit=3), seed)
+                self.check_mirror(Orderbook(max_price=10), seed)
+
+    def test_late_subscriber(self):
+        ob = Orderbook()
+        random_session(ob, 0, 200)
+        feed = MarketDataFeed(ob)
+        random_session(ob, 1, 200)
+
+        mirror = BookMirror()
+        feed.subscribe(mirror)
+        self.assertEqual(mirror.depth(), ob.depth())
+        random_session(ob, 2, 200)
+        self.assertEqual(mirror.depth(), ob.depth())
+
+    def test_subscription_conflates(self):
+        ob = Orderbook(position_limit=1000)
+        feed = MarketDataFeed(ob)
+        subscription = Subscription(capacity=4)
+        feed.subscribe(subscription)
+        for user in range(10):
+            ob.insert_bid(user, 5, 1)
+        ob.insert_bid(0, 4, 1)
+
+        events = subscription.poll()
+        self.assertEqual(subscription.dropped, 7)
+        self.assertEqual(subscription.conflated, 9)
+        self.assertListEqual(describe(events), [
+            ("ack", OrderAck.NEW, 7, 0, 1),
+            ("ack", OrderAck.NEW, 8, 0, 1),
+            ("ack", OrderAck.NEW, 9, 0, 1),
+            ("ack", OrderAck.NEW, 10, 0, 1),
+            ("level", Order.TYPE_BID, 5, 10, 10),
+            ("level", Order.TYPE_BID, 4, 1, 1)])
+        self.assertListEqual(subscription.poll(), [])
+
+        mirror = BookMirror()
+        mirror(events)
+        self.assertEqual(mirror.depth(), ob.depth())
+
+
+    def test_subscription_made_before_its_loop_runs(self):
+        ob = Orderbook()
+        loop = asyncio.new_event_loop()
+        try:
+            subscription = Subscription(loop=loop)
+            MarketDataFeed(ob).subscribe(subscription)
+            ob.insert_bid(0, 5, 1)
+
+            async def first_events():
+                async for events in subscription:
+                    return events
+
+            events = loop.run_until_complete(first_events())
+        finally:
+            loop.close()
+        self.assertListEqual(describe(events), [
+            ("ack", OrderAck.NEW, 0, 0, 1),
+            ("level", Order.TYPE_BID, 5, 1, 1)])
+
+
+class MarketDataAsyncTest(unittest.IsolatedAsyncioTestCase):
+    async def test_async_iteration(self):
+        exchange = Exchange()
+        feed = MarketDataFeed(exchange.market("a"))
+        subscription = Subscription(loop=asyncio.get_running_loop())
+        feed.subscribe(subscription)
+        mirror = BookMirror()
+
+        async with OrderGateway(exchange) as gateway:
+            # Matched in the default executor, off the event loop thread
+            await gateway.insert_bid("a", 0, 5, 2)
+            await gateway.insert_ask("a", 1, 6, 2)
+            await gateway.insert_ask("a", 2, 5, 1)
+            async for events in subscription:
+                mirror(events)
+                if len(mirror.trades) == 1:
+                    break
+
+        self.assertEqual(mirror.depth(), exchange.market("a").depth())
+        self.assertEqual(mirror.depth(), ([(5, 1, 1)], [(6, 2, 1)]))
@@ -0,0 +1,227 @@
+import copy
+import math
+import random
+import unittest
+from discord_exchange import Orderbook, Order
+
+
+class ReferenceBook:
+    """
+    A deliberately naive matcher with the same rules as Orderbook: price
+    then time priority, trades at the resting price, positions limited by
+    capping incoming orders and trimming a user's oldest resting orders
+    after every order.
+    """
+
+    def __init__(self, position_limit,
+                 self_trade_mode=Orderbook.SELF_TRADE_ALLOW) -> None:
+        self.position_limit = position_limit
+        self.self_trade_mode = self_trade_mode
+        # Resting orders as [id, user, price, volume, arrival] per side
+        self.orders = ([], [])
+        self.positions = dict()
+        self.arrivals = 0
+        self.next_id = 0
+
+    def room(self, side, user):
+        return self.position_limit \
+            - Order.SIGNS[side] * self.positions.get(user, 0)
+
+    def resting_volume(self, side, user):
+        return sum(o[3] for o in self.orders[side] if o[1] == user)
+
+    def crosses(self, side, price, resting_price):
+        if side == Order.TYPE_BID:
+            return resting_price <= price
+        return resting_price >= price
+
+    def best(self, side, price):
+        candidates = [o for o in self.orders[side ^ 1]
+                      if self.crosses(side, price, o[2])]
+        if not candidates:
+            return None
+        sign = Order.SIGNS[side ^ 1]
+        return min(candidates, key=lambda o: (-sign * o[2], o[4]))
+
+    def insert(self, side, user, price, volume, time_in_force,
+               order_id=None):
+        if order_id is None:
+            order_id = self.next_id
+            self.next_id += 1
+        room = self.room(side, user)
+        if time_in_force == Order.FILL_OR_KILL and \
+                (volume > room or not self.fills(side, user, price, volume)):
+            return []
+        volume = min(volume, max(room, 0))
+        trades = []
+        while volume:
+            resting = self.best(side, price)
+            if resting is None:
+                break
+            if resting[1] == user and \
+                    self.self_trade_mode != Orderbook.SELF_TRADE_ALLOW:
+                volume = self.prevent_self_trade(side, volume, resting)
+                continue
+            traded = min(volume, resting[3])
+            trades.append(self.trade(side, user, resting, traded))
+            volume -= traded
+            resting[3] -= traded
+            if resting[3] == 0:
+                self.orders[side ^ 1].remove(resting)
+        if volume and time_in_force == Order.GOOD_TILL_CANCEL:
+            self.orders[side].append([order_id, user, price, volume,
+                                      self.arrivals])
+            self.arrivals += 1
+        # Trading may have left the user's older orders over the limit,
+        # whether or not the order rests
+        self.trim(side, user)
+        return trades
+
+    def prevent_self_trade(self, side, volume, resting):
+        # Returns the volume left of the incoming order
+        if self.self_trade_mode == Orderbook.SELF_TRADE_CANCEL_NEWEST:
+            return 0
+        reduced = resting[3]
+        if self.self_trade_mode == Orderbook.SELF_TRADE_DECREMENT_BOTH:
+            reduced = min(volume, resting[3])
+            volume -= reduced
+        resting[3] -= reduced
+        if resting[3] == 0:
+            self.orders[side ^ 1].remove(resting)
+        return volume
+
+    def fills(self, side, user, price, volume):
+        # Tried out as immediate-or-cancel on a copy of the book
+        trial = copy.deepcopy(self)
+        return sum(trade[3] for trade in trial.insert(
+            side, user, price, volume, Order.IMMEDIATE_OR_CANCEL)) == volume
+
+    def trade(self, side, user, resting, traded):
+        if side == Order.TYPE_BID:
+            buyer, seller = user, resting[1]
+        else:
+            buyer, seller = resting[1], user
+        self.positions[buyer] = self.positions.get(buyer, 0) + traded
+        self.positions[seller] = self.positions.get(seller, 0) - traded
+        return buyer, seller, resting[2], traded
+
+    def trim(self, side, user):
+        excess = self.resting_volume(side, user) - self.room(side, user)
+        while excess > 0:
+            oldest = min((o for o in self.orders[side] if o[1] == user),
+                         key=lambda o: o[4])
+            reduced = min(excess, oldest[3])
+            oldest[3] -= reduced
+            excess -= reduced
+            if oldest[3] == 0:
+                self.orders[side].remove(oldest)
+
+    def find(self, order_id):
+        for side in (Order.TYPE_BID, Order.TYPE_ASK):
+            for order in self.orders[side]:
+                if order[0] == order_id:
+                    return side, order
+        return None, None
+
+    def cancel(self, order_id):
+        side, order = self.find(order_id)
+        if order is not None:
+            self.orders[side].remove(order)
+
+    def amend(self, order_id, price, volume):
+        side, order = self.find(order_id)
+        if price == order[2] and volume <= order[3]:
+            order[3] = volume
+            return []
+        self.orders[side].remove(order)
+        return self.insert(side, order[1], price, volume,
+                           Order.GOOD_TILL_CANCEL, order_id)
+
+    def depth(self, side):
+        levels = dict()
+        for order in self.orders[side]:
+            volume, count = levels.get(order[2], (0, 0))
+            levels[order[2]] = (volume + order[3], count + 1)
+        sign = Order.SIGNS[side]
+        return [(price, volume, count) for price, (volume, count)
+                in sorted(levels.items(), key=lambda level: -sign * level[0])]
+
+
+class MatchingTest(unittest.TestCase):
+    def assertSameState(self, ob, reference):
+        bids, asks = ob.depth()
+        self.assertEqual(bids, reference.depth(Order.TYPE_BID))
+        self.assertEqual(asks, reference.depth(Order.TYPE_ASK))
+        if bids and asks:
+            self.assertLess(bids[0][0], asks[0][0])
+        for user, data in ob.users.items():
+            self.assertEqual(data.position, reference.positions.get(user, 0))
+            self.assertEqual(data.bid_volume,
+                             reference.resting_volume(Order.TYPE_BID, user))
+            self.assertEqual(data.ask_volume,
+                             reference.resting_volume(Order.TYPE_ASK, user))
+        self.assertEqual(ob.total_bid_volume, sum(v for _, v, _ in bids))
+        self.assertEqual(ob.total_ask_volume, sum(v for _, v, _ in asks))
+
+    def run_session(self, seed, num_actions=400, position_limit=8,
+                    max_price=None, self_trade_mode=Orderbook.SELF_TRADE_ALLOW):
+        rng = random.Random(seed)
+        ob = Orderbook(position_limit=position_limit, max_price=max_price,
+                       self_trade_mode=self_trade_mode)
+        reference = ReferenceBook(position_limit, self_trade_mode)
+        for _ in range(num_actions):
+            action = rng.random()
+            if action < 0.1 and ob.orders:
+                order_id = rng.choice(list(ob.orders))
+                ob.cancel(order_id)
+                reference.cancel(order_id)
+                trades, expected = [], []
+            elif action < 0.2 and ob.orders:
+                order_id = rng.choice(list(ob.orders))
+                price, volume = rng.randint(3, 9), rng.randint(1, 4)
+                trades = ob.amend(order_id, price, volume)
+                expected = reference.amend(order_id, price, volume)
+            else:
+                side = rng.choice((Order.TYPE_BID, Order.TYPE_ASK))
+                user, volume = rng.randrange(6), rng.randint(1, 6)
+                time_in_force = rng.choice((Order.GOOD_TILL_CANCEL,
+                                            Order.GOOD_TILL_CANCEL,
+                                            Order.IMMEDIATE_OR_CANCEL,
+                                            Order.FILL_OR_KILL))
+                if time_in_force != Order.GOOD_TILL_CANCEL and \
+                        rng.random() < 0.2:
+                    price = math.inf if side == Order.TYPE_BID else 0
+                else:
+                    price = rng.randint(3, 9)
+                trades = ob.insert(side, user, price, volume, time_in_force)
+                expected = reference.insert(side, user, price, volume,
+                                            time_in_force)
+            self.assertEqual([(t.buyer, t.seller, t.price, t.volume)
+                              for t in trades], expected)
+            if self_trade_mode != Orderbook.SELF_TRADE_ALLOW:
+                self.assertTrue(all(t.buyer != t.seller for t in trades))
+            self.assertSameState(ob, reference)
+
+    def test_matches_reference(self):
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                self.run_session(seed)
+
+    def test_matches_reference_without_limit(self):
+        for seed in range(5):
+            with self.subTest(seed=seed):
+                self.run_session(seed, position_limit=1_000_000)
+
+    def test_matches_reference_dense(self):
+        for seed in range(10):
+            with self.subTest(seed=seed):
+                self.run_session(seed, max_price=9)
+
+    def test_matches_reference_with_self_trade_prevention(self):
+        for mode in (Orderbook.SELF_TRADE_CANCEL_NEWEST,
+                     Orderbook.SELF_TRADE_CANCEL_OLDEST,
+                     Orderbook.SELF_TRADE_DECREMENT_BOTH):
+            for seed in range(10):
+                with self.subTest(mode=mode, seed=seed):
+                    self.run_session(seed, self_trade_mode=mode)
+                    self.run_session(seed, max_price=9, self_trade_mode=mode)
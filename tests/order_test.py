@@ -74,4 +74,16 @@ class OrderTest(unittest.TestCase):
         self.assertEqual(order.price, 5)
         self.assertEqual(order.volume, 10)
 
-        order.reduce_volume(-10)
\ No newline at end of file
+        order.reduce_volume(-10)
+
+    def test_no_instance_dict(self):
+        order = Order(Order.TYPE_BID, 0, 5, 10)
+        self.assertFalse(hasattr(order, "__dict__"))
+
+    def test_updated_at(self):
+        self.assertEqual(Order(Order.TYPE_BID, 0, 5, 10).updated_at, 0)
+        order = Order(Order.TYPE_BID, 0, 5, 10, 0, 7)
+        self.assertEqual(order.updated_at, 7)
+        # Update numbers come from the book the order is in
+        order.reduce_volume(1)
+        self.assertEqual(order.updated_at, 7)
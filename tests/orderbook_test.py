@@ -1,5 +1,8 @@
+import random
 import unittest
+from unittest import mock
 from discord_exchange import Orderbook, Order
+from discord_exchange.orderbook import LimitExceeded
 
 
 class OrderbookTest(unittest.TestCase):
@@ -398,5 +401,623 @@ class OrderbookTest(unittest.TestCase):
 
         self.assertEqual(ob.total_bid_volume, 10)
         self.assertEqual(u.bid_volume, 10)
-        self.assertEqual(len(ob.get_bids_at_price(5)), 2)
+        # The first bid is trimmed completely and reclaimed
+        self.assertEqual(len(ob.get_bids_at_price(5)), 1)
         self.assertEqual(len(ob.get_bids_at_price(6)), 1)
+        self.assertEqual(len(u.bids), 2)
+        self.assertEqual(len(ob.orders), 2)
+
+    def test_aggressor_volume_accounting(self):
+        ob = Orderbook(position_limit=10)
+        ob.insert_bid(0, 5, 3)
+        ob.insert_ask(1, 4, 5)
+
+        buyer, seller = ob.get_user(0), ob.get_user(1)
+        self.assertEqual(buyer.bid_volume, 0)
+        self.assertEqual(seller.ask_volume, 2)
+        self.assertEqual(seller.position, -3)
+        self.assertEqual(ob.total_ask_volume, 2)
+
+    def test_aggressive_order_capped_at_limit(self):
+        ob = Orderbook(position_limit=10)
+        ob.insert_ask(1, 5, 8)
+        ob.insert_bid(0, 5, 8)
+        trades = ob.insert_bid(0, 6, 5)
+
+        u = ob.get_user(0)
+        self.assertEqual(sum(trade.volume for trade in trades), 0)
+        self.assertEqual(u.position, 8)
+        self.assertEqual(u.bid_volume, 2)
+        self.assertEqual(ob.total_bid_volume, 2)
+
+        ob.insert_ask(2, 6, 10)
+        self.assertEqual(u.position, 10)
+        self.assertEqual(ob.insert_bid(0, 6, 1), [])
+        self.assertEqual(u.bid_volume, 0)
+        self.assertEqual(ob.total_bid_volume, 0)
+
+    def test_filled_order_trims_resting_orders(self):
+        ob = Orderbook(position_limit=10)
+        ob.insert_bid(0, 5, 10)
+        ob.insert_ask(1, 6, 10)
+        ob.insert_bid(0, 6, 10)
+        # The bid filled completely, and the one resting at 5 would now
+        # take the user past the limit
+        u = ob.get_user(0)
+        self.assertEqual(u.position, 10)
+        self.assertEqual(u.bid_volume, 0)
+        self.assertEqual(ob.total_bid_volume, 0)
+        self.assertEqual(ob.insert_ask(2, 5, 10), [])
+        self.assertEqual(u.position, 10)
+
+        # The same for orders that never rest
+        ob.insert_ask(0, 7, 20)
+        ob.insert_bid(1, 4, 5)
+        ob.insert_ask(0, 4, 5, Order.IMMEDIATE_OR_CANCEL)
+        self.assertEqual(u.position, 5)
+        self.assertEqual(u.ask_volume, 15)
+        self.assertEqual(ob.depth()[1], [(5, 10, 1), (7, 15, 1)])
+
+    def test_reject_over_limit(self):
+        ob = Orderbook(position_limit=10, limit_mode=Orderbook.LIMIT_REJECT)
+        ob.insert_bid(0, 5, 6)
+        with self.assertRaises(LimitExceeded):
+            ob.insert_bid(0, 6, 5)
+        ob.insert_bid(0, 6, 4)
+
+        u = ob.get_user(0)
+        self.assertEqual(u.bid_volume, 10)
+        self.assertEqual(len(u.bids), 2)
+        self.assertEqual(ob.total_bid_volume, 10)
+        # Refused orders take no id
+        self.assertEqual(ob.order_ids.value, 2)
+
+    def test_reject_after_trades(self):
+        ob = Orderbook(position_limit=10, limit_mode=Orderbook.LIMIT_REJECT)
+        ob.insert_ask(1, 5, 8)
+        ob.insert_bid(0, 5, 8)
+        with self.assertRaises(LimitExceeded):
+            ob.insert_bid(0, 5, 3)
+        ob.insert_bid(0, 5, 2)
+        # Selling is limited by the position plus the limit
+        with self.assertRaises(LimitExceeded):
+            ob.insert_ask(0, 9, 19)
+        ob.insert_ask(0, 9, 18)
+
+    def test_reject_amend(self):
+        ob = Orderbook(position_limit=10, limit_mode=Orderbook.LIMIT_REJECT)
+        ob.insert_ask(0, 5, 4)
+        ob.insert_ask(0, 6, 4)
+        order = next(iter(ob.get_user(0).asks.values()))
+        with self.assertRaises(LimitExceeded):
+            ob.amend(order.id, 5, 7)
+        ob.amend(order.id, 5, 6)
+        self.assertEqual(ob.get_user(0).ask_volume, 10)
+
+    def test_reject_in_batch(self):
+        ob = Orderbook(position_limit=10, limit_mode=Orderbook.LIMIT_REJECT)
+        with self.assertRaises(LimitExceeded) as raised:
+            ob.submit_batch([(Order.TYPE_BID, 0, 5, 6),
+                             (Order.TYPE_BID, 0, 5, 6)])
+        self.assertEqual(ob.get_user(0).bid_volume, 6)
+        self.assertEqual(raised.exception.index, 1)
+        self.assertEqual(raised.exception.trades, [])
+
+        # Trades of the orders before the refused one are not lost
+        ob = Orderbook(position_limit=10, limit_mode=Orderbook.LIMIT_REJECT)
+        ob.insert_ask(1, 5, 5)
+        with self.assertRaises(LimitExceeded) as raised:
+            ob.submit_batch([(Order.TYPE_BID, 0, 5, 5),
+                             (Order.TYPE_BID, 0, 5, 20),
+                             (Order.TYPE_BID, 0, 5, 1)])
+        self.assertEqual(raised.exception.index, 1)
+        self.assertEqual([(t.id, t.buyer, t.volume)
+                          for t in raised.exception.trades], [(0, 0, 5)])
+        self.assertEqual(ob.get_user(0).position, 5)
+        self.assertEqual(ob.total_bid_volume, 0)
+
+    def test_immediate_or_cancel(self):
+        ob = Orderbook()
+        ob.insert_ask(1, 5, 2)
+        ob.insert_ask(1, 7, 2)
+        trades = ob.insert_bid(0, 6, 3, Order.IMMEDIATE_OR_CANCEL)
+
+        self.assertEqual([(t.price, t.volume) for t in trades], [(5, 2)])
+        self.assertEqual(ob.total_bid_volume, 0)
+        self.assertEqual(ob.get_user(0).bid_volume, 0)
+        self.assertEqual(ob.depth(), ([], [(7, 2, 1)]))
+
+    def test_immediate_or_cancel_at_resting_price(self):
+        ob = Orderbook()
+        ob.insert_bid(1, 5, 1)
+        self.assertEqual(ob.insert_bid(0, 5, 1, Order.IMMEDIATE_OR_CANCEL), [])
+        self.assertEqual(ob.insert_ask(0, 6, 1, Order.IMMEDIATE_OR_CANCEL), [])
+        self.assertEqual(ob.depth(), ([(5, 1, 1)], []))
+
+    def test_fill_or_kill_killed(self):
+        ob = Orderbook()
+        ob.insert_bid(1, 6, 2)
+        ob.insert_bid(2, 5, 2)
+        ob.insert_bid(3, 4, 2)
+        updates = [o.updated_at for o in ob.orders.values()]
+        num_updates = ob.order_updates.value
+        trades = ob.insert_ask(0, 5, 5, Order.FILL_OR_KILL)
+
+        self.assertEqual(trades, [])
+        self.assertEqual([o.updated_at for o in ob.orders.values()], updates)
+        # The killed order still has an id, for its acknowledgement and
+        # journal record, but no update was made
+        self.assertEqual(ob.order_updates.value, num_updates)
+        self.assertEqual(ob.order_ids.value, 4)
+        self.assertEqual(ob.depth(), ([(6, 2, 1), (5, 2, 1), (4, 2, 1)], []))
+        self.assertEqual(ob.get_user(0).ask_volume, 0)
+
+    def test_fill_or_kill_filled(self):
+        ob = Orderbook()
+        ob.insert_bid(1, 6, 2)
+        ob.insert_bid(2, 5, 2)
+        trades = ob.insert_ask(0, 5, 3, Order.FILL_OR_KILL)
+
+        self.assertEqual([(t.price, t.volume) for t in trades], [(6, 2), (5, 1)])
+        self.assertEqual(ob.depth(), ([(5, 1, 1)], []))
+
+    def test_fill_or_kill_over_limit(self):
+        ob = Orderbook(position_limit=2)
+        ob.insert_ask(1, 5, 2)
+        ob.insert_ask(2, 5, 2)
+        self.assertEqual(ob.insert_bid(0, 5, 3, Order.FILL_OR_KILL), [])
+        self.assertEqual(ob.total_ask_volume, 4)
+
+    def test_market_orders(self):
+        ob = Orderbook()
+        ob.insert_ask(1, 5, 1)
+        ob.insert_ask(1, 90, 1)
+        trades = ob.market_bid(0, 3)
+        self.assertEqual([(t.price, t.volume) for t in trades], [(5, 1), (90, 1)])
+        self.assertEqual(ob.total_bid_volume, 0)
+
+        ob.insert_bid(2, 3, 2)
+        self.assertEqual(ob.market_ask(0, 3, Order.FILL_OR_KILL), [])
+        trades = ob.market_ask(0, 2, Order.FILL_OR_KILL)
+        self.assertEqual([(t.price, t.volume) for t in trades], [(3, 2)])
+        self.assertEqual(ob.get_user(0).position, 0)
+
+    def test_order_types_session(self):
+        rng = random.Random(0)
+        ob = Orderbook(position_limit=20)
+        resting_ids = set()
+        for _ in range(5000):
+            time_in_force = rng.choice((Order.GOOD_TILL_CANCEL,
+                                        Order.IMMEDIATE_OR_CANCEL,
+                                        Order.FILL_OR_KILL))
+            user, volume = rng.randrange(10), rng.randint(1, 5)
+            if rng.random() < 0.1:
+                market = ob.market_bid if rng.random() < 0.5 else ob.market_ask
+                market(user, volume, rng.choice((Order.IMMEDIATE_OR_CANCEL,
+                                                 Order.FILL_OR_KILL)))
+                continue
+            order_id = ob.order_ids.value
+            if rng.random() < 0.5:
+                trades = ob.insert_bid(user, rng.randint(40, 60), volume,
+                                       time_in_force)
+            else:
+                trades = ob.insert_ask(user, rng.randint(40, 60), volume,
+                                       time_in_force)
+            if time_in_force == Order.FILL_OR_KILL:
+                self.assertIn(sum(t.volume for t in trades), (0, volume))
+            if time_in_force == Order.GOOD_TILL_CANCEL:
+                resting_ids.add(order_id)
+
+        self.assertLessEqual(set(ob.orders), resting_ids)
+        bids, asks = ob.depth()
+        if bids and asks:
+            self.assertLess(bids[0][0], asks[0][0])
+        self.assertEqual(ob.total_bid_volume, sum(v for _, v, _ in bids))
+        self.assertEqual(ob.total_ask_volume, sum(v for _, v, _ in asks))
+
+    def test_cancel(self):
+        ob = Orderbook()
+        ob.insert_bid(0, 5, 2)
+        ob.insert_bid(1, 5, 3)
+        order = next(iter(ob.get_user(0).bids.values()))
+
+        self.assertTrue(ob.cancel(order.id))
+        self.assertEqual(order.volume, 0)
+        self.assertNotIn(order.id, ob.orders)
+        self.assertEqual(ob.total_bid_volume, 3)
+        self.assertEqual(ob.get_user(0).bid_volume, 0)
+        self.assertEqual(len(ob.get_bids_at_price(5)), 1)
+        self.assertEqual(ob.best_bid().user_id, 1)
+
+        self.assertFalse(ob.cancel(order.id))
+
+    def test_cancel_last_order_at_price(self):
+        ob = Orderbook()
+        ob.insert_ask(0, 5, 2)
+        ob.insert_ask(1, 6, 3)
+        order = ob.best_ask()
+
+        self.assertTrue(ob.cancel(order.id))
+        self.assertNotIn(5, ob.asks)
+        self.assertEqual(ob.best_ask().price, 6)
+        self.assertEqual(ob.total_ask_volume, 3)
+
+    def test_cancel_middle_of_level(self):
+        ob = Orderbook()
+        for user in range(3):
+            ob.insert_bid(user, 5, 1)
+        middle = next(iter(ob.get_user(1).bids.values()))
+
+        ob.cancel(middle.id)
+        trades = ob.insert_ask(3, 5, 2)
+
+        self.assertListEqual([t.buyer for t in trades], [0, 2])
+
+    def test_amend_reduce_volume_keeps_priority(self):
+        ob = Orderbook()
+        ob.insert_bid(0, 5, 3)
+        ob.insert_bid(1, 5, 3)
+        order = next(iter(ob.get_user(0).bids.values()))
+
+        self.assertListEqual(ob.amend(order.id, 5, 1), [])
+        self.assertEqual(order.volume, 1)
+        self.assertEqual(ob.total_bid_volume, 4)
+        self.assertEqual(ob.get_user(0).bid_volume, 1)
+        self.assertIs(ob.best_bid(), order)
+
+    def test_amend_increase_volume_loses_priority(self):
+        ob = Orderbook()
+        ob.insert_bid(0, 5, 1)
+        ob.insert_bid(1, 5, 1)
+        order_id = next(iter(ob.get_user(0).bids.values())).id
+
+        ob.amend(order_id, 5, 2)
+        self.assertEqual(ob.best_bid().user_id, 1)
+        self.assertEqual(ob.orders[order_id].volume, 2)
+        self.assertEqual(ob.total_bid_volume, 3)
+
+    def test_amend_price_loses_priority(self):
+        ob = Orderbook()
+        ob.insert_ask(0, 5, 1)
+        ob.insert_ask(1, 6, 1)
+        order_id = ob.best_ask().id
+
+        self.assertListEqual(ob.amend(order_id, 6, 1), [])
+        self.assertNotIn(5, ob.asks)
+        self.assertEqual(ob.best_ask().user_id, 1)
+        self.assertEqual(len(ob.get_asks_at_price(6)), 2)
+
+    def test_amend_crossing(self):
+        ob = Orderbook()
+        ob.insert_bid(0, 5, 2)
+        ob.insert_ask(1, 6, 2)
+        order_id = ob.best_ask().id
+
+        trades = ob.amend(order_id, 5, 2)
+        self.assertEqual(len(trades), 1)
+        self.assertEqual(trades[0].buyer, 0)
+        self.assertEqual(trades[0].seller, 1)
+        self.assertEqual(trades[0].price, 5)
+        self.assertEqual(ob.total_bid_volume, 0)
+        self.assertEqual(ob.total_ask_volume, 0)
+        self.assertNotIn(order_id, ob.orders)
+
+    def test_filled_orders_do_not_block_limit(self):
+        ob = Orderbook(position_limit=10)
+        ob.insert_bid(0, 5, 2)
+        ob.insert_ask(1, 5, 2)
+        ob.insert_bid(0, 4, 10)
+
+        self.assertEqual(ob.get_user(0).bid_volume, 8)
+        self.assertEqual(ob.total_bid_volume, 8)
+
+    def test_submit_batch(self):
+        orders = [(Order.TYPE_BID, 0, 5, 1),
+                  (Order.TYPE_BID, 1, 5, 1),
+                  (Order.TYPE_BID, 2, 6, 2),
+                  (Order.TYPE_ASK, 3, 5, 3),
+                  (Order.TYPE_ASK, 4, 7, 1)]
+        ob = Orderbook()
+        trades = ob.submit_batch(orders)
+
+        self.assertEqual(len(trades), 2)
+        self.assertEqual(trades[0].buyer, 2)
+        self.assertEqual(trades[0].volume, 2)
+        self.assertEqual(trades[1].buyer, 0)
+        self.assertEqual(trades[1].volume, 1)
+        self.assertEqual(ob.total_bid_volume, 1)
+        self.assertEqual(ob.total_ask_volume, 1)
+
+        individual = Orderbook()
+        individual_trades = []
+        for side, user, price, volume in orders:
+            if side == Order.TYPE_BID:
+                individual_trades.extend(individual.insert_bid(user, price, volume))
+            else:
+                individual_trades.extend(individual.insert_ask(user, price, volume))
+        self.assertEqual(str(ob), str(individual))
+        self.assertListEqual(
+            [(t.buyer, t.seller, t.price, t.volume) for t in trades],
+            [(t.buyer, t.seller, t.price, t.volume) for t in individual_trades])
+
+    def test_submit_empty_batch(self):
+        ob = Orderbook()
+        self.assertListEqual(ob.submit_batch([]), [])
+        self.assertEqual(ob.order_ids.value, 0)
+
+    def test_depth(self):
+        ob = Orderbook()
+        ob.insert_bid(0, 5, 2)
+        ob.insert_bid(1, 5, 3)
+        ob.insert_bid(2, 4, 1)
+        ob.insert_bid(3, 3, 1)
+        ob.insert_ask(4, 7, 2)
+        ob.insert_ask(5, 8, 1)
+
+        bids, asks = ob.depth(2)
+        self.assertListEqual(bids, [(5, 5, 2), (4, 1, 1)])
+        self.assertListEqual(asks, [(7, 2, 1), (8, 1, 1)])
+
+        bids, asks = ob.depth()
+        self.assertListEqual(bids, [(5, 5, 2), (4, 1, 1), (3, 1, 1)])
+        self.assertListEqual(asks, [(7, 2, 1), (8, 1, 1)])
+
+    def test_depth_after_trades(self):
+        ob = Orderbook()
+        ob.insert_bid(0, 5, 2)
+        ob.insert_bid(1, 5, 3)
+        ob.insert_bid(2, 4, 1)
+        ob.insert_ask(3, 5, 3)
+
+        bids, asks = ob.depth()
+        self.assertListEqual(bids, [(5, 2, 1), (4, 1, 1)])
+        self.assertListEqual(asks, [])
+
+        ob.insert_ask(3, 4, 3)
+        bids, asks = ob.depth()
+        self.assertListEqual(bids, [])
+        self.assertListEqual(asks, [])
+        self.assertEqual(str(ob), "ASK: \nBID: ")
+
+    def test_depth_after_trimming(self):
+        ob = Orderbook(position_limit=10)
+        ob.insert_bid(0, 5, 2)
+        ob.insert_bid(0, 6, 7)
+        ob.insert_bid(0, 5, 5)
+
+        bids, _ = ob.depth()
+        self.assertListEqual(bids, [(6, 5, 1), (5, 5, 1)])
+
+    def test_depth_after_cancel(self):
+        ob = Orderbook()
+        ob.insert_ask(0, 5, 2)
+        ob.insert_ask(1, 5, 3)
+        ob.cancel(ob.best_ask().id)
+
+        _, asks = ob.depth()
+        self.assertListEqual(asks, [(5, 3, 1)])
+
+    def test_str(self):
+        ob = Orderbook()
+        ob.insert_bid(0, 5, 2)
+        ob.insert_bid(1, 4, 1)
+        ob.insert_ask(2, 7, 2)
+        ob.insert_ask(3, 6, 1)
+        self.assertEqual(str(ob), "ASK: 1@6, 2@7\nBID: 2@5, 1@4")
+
+    def test_filled_orders_are_reclaimed(self):
+        ob = Orderbook()
+        ob.insert_bid(0, 5, 2)
+        ob.insert_bid(1, 4, 2)
+        ob.insert_ask(2, 4, 3)
+
+        self.assertNotIn(5, ob.bids)
+        self.assertEqual(len(ob.bid_prices), 1)
+        self.assertEqual(len(ob.orders), 1)
+        self.assertEqual(len(ob.get_user(0).bids), 0)
+        self.assertEqual(len(ob.get_user(1).bids), 1)
+        self.assertEqual(ob.get_bids_at_price(4).volume, 1)
+
+    def test_reading_empty_price_creates_no_level(self):
+        ob = Orderbook()
+        self.assertEqual(len(ob.get_bids_at_price(5)), 0)
+        self.assertEqual(len(ob.get_asks_at_price(5)), 0)
+        self.assertDictEqual(ob.bids, {})
+        self.assertDictEqual(ob.asks, {})
+        self.assertListEqual(ob.insert_bid(0, 5, 1), [])
+        self.assertEqual(len(ob.bids), 1)
+
+    def test_per_book_sequences(self):
+        """
+        Books never share ids or update numbers, so the same orders yield
+        the same ids in every book however the books are interleaved.
+        """
+        def run(ob):
+            trades = ob.insert_bid(0, 5, 2)
+            trades += ob.insert_ask(1, 5, 1)
+            trades += ob.insert_ask(2, 5, 1)
+            return trades
+
+        ob1 = Orderbook()
+        ob2 = Orderbook()
+        ob1.insert_bid(3, 1, 1)
+        trades1 = run(ob1)
+        Orderbook().insert_ask(3, 1, 1)
+        trades2 = run(ob2)
+
+        self.assertListEqual([t.id for t in trades1], [0, 1])
+        self.assertListEqual([t.id for t in trades2], [0, 1])
+        self.assertEqual(ob1.order_ids.value, 4)
+        self.assertEqual(ob2.order_ids.value, 3)
+        self.assertEqual(ob1.best_bid().id, 0)
+        self.assertEqual(ob1.best_bid().updated_at, 0)
+        self.assertEqual(ob2.order_updates.value, ob1.order_updates.value - 1)
+
+    def test_self_trade_accounting(self):
+        ob = Orderbook()
+        ob.insert_bid(0, 5, 2)
+        ob.insert_bid(0, 4, 1)
+        ob.insert_ask(0, 5, 2)
+
+        user = ob.get_user(0)
+        self.assertEqual(user.position, 0)
+        self.assertEqual(user.bid_volume, 1)
+        self.assertEqual(user.num_trades, 2)
+
+    def test_self_trade_cancel_newest(self):
+        ob = Orderbook(self_trade_mode=Orderbook.SELF_TRADE_CANCEL_NEWEST)
+        ob.insert_bid(1, 6, 1)
+        ob.insert_bid(0, 5, 2)
+        ob.insert_bid(1, 4, 1)
+        trades = ob.insert_ask(0, 4, 4)
+        self.assertEqual([(t.buyer, t.seller, t.volume) for t in trades],
+                         [(1, 0, 1)])
+        # The rest of the ask was cancelled, the resting bid is untouched
+        self.assertEqual(ob.depth(), ([(5, 2, 1), (4, 1, 1)], []))
+        self.assertEqual(ob.get_user(0).position, -1)
+
+    def test_self_trade_cancel_oldest(self):
+        ob = Orderbook(self_trade_mode=Orderbook.SELF_TRADE_CANCEL_OLDEST)
+        ob.insert_bid(0, 5, 2)
+        ob.insert_bid(0, 5, 1)
+        ob.insert_bid(1, 5, 1)
+        trades = ob.insert_ask(0, 5, 2)
+        self.assertEqual([(t.buyer, t.seller, t.volume) for t in trades],
+                         [(1, 0, 1)])
+        self.assertEqual(ob.depth(), ([], [(5, 1, 1)]))
+        self.assertEqual(ob.get_user(0).bid_volume, 0)
+        self.assertEqual(ob.total_bid_volume, 0)
+        self.assertEqual(len(ob.orders), 1)
+
+    def test_self_trade_decrement_both(self):
+        ob = Orderbook(self_trade_mode=Orderbook.SELF_TRADE_DECREMENT_BOTH)
+        ob.insert_bid(0, 5, 3)
+        ob.insert_bid(1, 5, 2)
+        trades = ob.insert_ask(0, 5, 4)
+        self.assertEqual([(t.buyer, t.seller, t.volume) for t in trades],
+                         [(1, 0, 1)])
+        self.assertEqual(ob.depth(), ([(5, 1, 1)], []))
+        self.assertEqual(ob.get_user(0).position, -1)
+        self.assertEqual(ob.get_user(0).bid_volume, 0)
+
+        # The resting order keeps its place when only reduced
+        ob.cancel(ob.best_bid().id)
+        ob.insert_bid(2, 5, 3)
+        ob.insert_bid(1, 5, 1)
+        self.assertEqual(ob.insert_ask(2, 5, 2), [])
+        self.assertEqual(ob.best_bid().user_id, 2)
+        self.assertEqual(ob.depth(), ([(5, 2, 2)], []))
+
+    def test_self_trade_fill_or_kill(self):
+        for mode, filled in ((Orderbook.SELF_TRADE_CANCEL_NEWEST, False),
+                             (Orderbook.SELF_TRADE_CANCEL_OLDEST, True),
+                             (Orderbook.SELF_TRADE_DECREMENT_BOTH, False)):
+            with self.subTest(mode=mode):
+                ob = Orderbook(self_trade_mode=mode)
+                ob.insert_bid(0, 6, 1)
+                ob.insert_bid(1, 5, 2)
+                trades = ob.insert_ask(0, 5, 2, Order.FILL_OR_KILL)
+                self.assertEqual(sum(t.volume for t in trades),
+                                 2 if filled else 0)
+                # Own volume does not count towards filling it
+                self.assertEqual(ob.insert_ask(0, 5, 3, Order.FILL_OR_KILL),
+                                 [])
+
+    def test_self_trade_fill_or_kill_ahead_of_own_order(self):
+        for mode in (Orderbook.SELF_TRADE_CANCEL_NEWEST,
+                     Orderbook.SELF_TRADE_CANCEL_OLDEST,
+                     Orderbook.SELF_TRADE_DECREMENT_BOTH):
+            with self.subTest(mode=mode):
+                # Other users' orders ahead of the user's own fill it
+                ob = Orderbook(self_trade_mode=mode)
+                ob.insert_ask(1, 5, 10)
+                ob.insert_ask(0, 10, 5)
+                trades = ob.insert_bid(0, 10, 5, Order.FILL_OR_KILL)
+                self.assertEqual([(t.price, t.volume) for t in trades],
+                                 [(5, 5)])
+                # The same holds within a level. Unless the user's own
+                # order is cancelled on the way, orders behind it do not
+                # count.
+                ob = Orderbook(self_trade_mode=mode)
+                ob.insert_ask(1, 5, 2)
+                ob.insert_ask(0, 5, 5)
+                ob.insert_ask(2, 5, 2)
+                trades = ob.insert_bid(0, 5, 3, Order.FILL_OR_KILL)
+                if mode == Orderbook.SELF_TRADE_CANCEL_OLDEST:
+                    self.assertEqual([t.seller for t in trades], [1, 2])
+                else:
+                    self.assertEqual(trades, [])
+                    trades = ob.insert_bid(0, 5, 2, Order.FILL_OR_KILL)
+                    self.assertEqual([t.seller for t in trades], [1])
+
+    def test_tick_size(self):
+        ob = Orderbook(tick_size=0.1)
+        ob.insert_bid(0, 100.1, 1)
+        ob.insert_bid(1, 100.10000001, 2)
+        ob.insert_bid(2, 0.3, 1)
+        self.assertEqual(ob.depth(), ([(100.1, 3, 2), (0.3, 1, 1)], []))
+        self.assertEqual(ob.get_bids_at_price(100.1).volume, 3)
+        self.assertEqual(ob.best_bid().price, 100.1)
+        self.assertEqual(ob.best_bid().ticks, 1001)
+
+        trades = ob.insert_ask(3, 0.1 + 0.2, 4)
+        self.assertEqual([(t.buyer, t.price, t.volume) for t in trades],
+                         [(0, 100.1, 1), (1, 100.1, 2), (2, 0.3, 1)])
+        self.assertEqual(str(ob), "ASK: \nBID: ")
+
+    def test_prices_off_the_tick_size(self):
+        ob = Orderbook(tick_size=0.05)
+        ob.insert_ask(0, 2.35, 1)
+        with self.assertRaises(AssertionError):
+            ob.insert_bid(1, 2.32, 1)
+        with self.assertRaises(AssertionError):
+            ob.amend(0, 2.32, 1)
+        self.assertEqual(ob.depth(), ([], [(2.35, 1, 1)]))
+
+        # A new price equal to the old one up to the tick keeps priority
+        ob.insert_ask(1, 2.35, 1)
+        ob.amend(0, 2.3500000001, 1)
+        self.assertEqual(ob.best_ask().id, 0)
+        trades = ob.market_bid(2, 3)
+        self.assertEqual([t.price for t in trades], [2.35, 2.35])
+
+    def test_whole_tick_size(self):
+        ob = Orderbook(tick_size=5)
+        ob.insert_bid(0, 10, 1)
+        ob.insert_ask(1, 25, 1)
+        with self.assertRaises(AssertionError):
+            ob.insert_ask(1, 12, 1)
+        self.assertEqual(ob.depth(), ([(10, 1, 1)], [(25, 1, 1)]))
+        self.assertEqual(str(ob), "ASK: 1@25\nBID: 1@10")
+
+    def test_max_price(self):
+        ob = Orderbook(max_price=100)
+        ob.insert_bid(0, 100, 1)
+        ob.insert_ask(1, 0, 2)
+        with self.assertRaises(AssertionError):
+            ob.insert_ask(1, 101, 1)
+        with self.assertRaises(AssertionError):
+            ob.amend(1, 101, 1)
+        self.assertEqual(ob.depth(), ([], [(0, 1, 1)]))
+        # Refused orders take no id
+        self.assertEqual(ob.order_ids.value, 2)
+        ob.market_bid(2, 1)
+        self.assertEqual(ob.depth(), ([], []))
+        self.assertEqual(len(ob.get_bids_at_price(1000)), 0)
+
+
+class DenseOrderbook(Orderbook):
+    def __init__(self, *args, max_price=200, **kwargs) -> None:
+        super().__init__(*args, max_price=max_price, **kwargs)
+
+
+class DenseOrderbookTest(OrderbookTest):
+    """
+    Runs every test of OrderbookTest against books that keep their levels
+    in arrays.
+    """
+
+    def setUp(self):
+        patcher = mock.patch(f"{__name__}.Orderbook", DenseOrderbook)
+        patcher.start()
+        self.addCleanup(patcher.stop)
@@ -0,0 +1,56 @@
+import random
+import unittest
+from discord_exchange.orderbook import PriceBitmap, PriceLadder
+
+
+class PriceBitmapTest(unittest.TestCase):
+    def test_initial_status(self):
+        bitmap = PriceBitmap(101)
+        self.assertTrue(bitmap.empty())
+        self.assertEqual(len(bitmap), 0)
+        self.assertIsNone(bitmap.best())
+        self.assertListEqual(list(bitmap), [])
+
+    def test_best(self):
+        asks = PriceBitmap(101)
+        bids = PriceBitmap(101, descending=True)
+        for ticks in [5, 0, 100, 7]:
+            asks.add(ticks)
+            bids.add(ticks)
+        self.assertEqual(asks.best(), 0)
+        self.assertEqual(bids.best(), 100)
+        self.assertListEqual(list(asks), [0, 5, 7, 100])
+        self.assertListEqual(list(bids), [100, 7, 5, 0])
+        self.assertListEqual(list(bids.top(2)), [100, 7])
+        self.assertListEqual(list(bids.top(0)), [])
+
+    def test_add_and_remove(self):
+        bitmap = PriceBitmap(101)
+        bitmap.add(5)
+        bitmap.add(5)
+        bitmap.remove(6)
+        self.assertEqual(len(bitmap), 1)
+        self.assertIn(5, bitmap)
+        self.assertNotIn(6, bitmap)
+        self.assertNotIn(200, bitmap)
+        bitmap.remove(5)
+        self.assertTrue(bitmap.empty())
+        with self.assertRaises(AssertionError):
+            bitmap.add(101)
+
+    def test_same_as_ladder(self):
+        rng = random.Random(0)
+        for descending in (False, True):
+            bitmap = PriceBitmap(64, descending)
+            ladder = PriceLadder(descending)
+            for _ in range(1000):
+                ticks = rng.randrange(64)
+                if rng.random() < 0.5:
+                    bitmap.add(ticks)
+                    ladder.add(ticks)
+                else:
+                    bitmap.remove(ticks)
+                    ladder.remove(ticks)
+                self.assertEqual(bitmap.best(), ladder.best())
+                self.assertEqual(len(bitmap), len(ladder))
+            self.assertListEqual(list(bitmap), list(ladder))
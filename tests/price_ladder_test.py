@@ -0,0 +1,83 @@
+import unittest
+from discord_exchange.orderbook import PriceLadder
+
+
+class PriceLadderTest(unittest.TestCase):
+    def test_initial_status(self):
+        ladder = PriceLadder()
+        self.assertTrue(ladder.empty())
+        self.assertEqual(len(ladder), 0)
+        self.assertIsNone(ladder.best())
+
+    def test_ascending_best(self):
+        ladder = PriceLadder()
+        ladder.add(5)
+        ladder.add(3)
+        ladder.add(7)
+        self.assertEqual(ladder.best(), 3)
+        self.assertListEqual(list(ladder), [3, 5, 7])
+
+    def test_descending_best(self):
+        ladder = PriceLadder(descending=True)
+        ladder.add(5)
+        ladder.add(3)
+        ladder.add(7)
+        self.assertEqual(ladder.best(), 7)
+        self.assertListEqual(list(ladder), [7, 5, 3])
+
+    def test_duplicate_prices(self):
+        """
+        Adding a price that is already on the ladder must not grow the ladder.
+        """
+        ladder = PriceLadder()
+        for _ in range(100):
+            ladder.add(5)
+            ladder.add(6)
+        self.assertEqual(len(ladder), 2)
+        self.assertEqual(len(ladder._keys), 2)
+
+    def test_remove(self):
+        ladder = PriceLadder()
+        for price in [3, 5, 7]:
+            ladder.add(price)
+
+        ladder.remove(5)
+        self.assertEqual(ladder.best(), 3)
+        self.assertNotIn(5, ladder)
+        self.assertEqual(len(ladder), 2)
+
+        ladder.remove(3)
+        self.assertEqual(ladder.best(), 7)
+
+        ladder.remove(7)
+        self.assertTrue(ladder.empty())
+        self.assertIsNone(ladder.best())
+        self.assertEqual(len(ladder._keys), 0)
+
+    def test_readd_removed_price(self):
+        """
+        A price that was removed below the top and added again must still
+        be held only once.
+        """
+        ladder = PriceLadder()
+        ladder.add(3)
+        ladder.add(5)
+        ladder.remove(5)
+        ladder.add(5)
+        self.assertEqual(len(ladder._keys), 2)
+        ladder.remove(3)
+        self.assertEqual(ladder.best(), 5)
+        self.assertEqual(len(ladder._keys), 1)
+
+    def test_top(self):
+        ladder = PriceLadder()
+        for price in [5, 3, 7, 4]:
+            ladder.add(price)
+        self.assertListEqual(list(ladder.top(2)), [3, 4])
+        self.assertListEqual(list(ladder.top(10)), [3, 4, 5, 7])
+        self.assertListEqual(list(ladder.top(0)), [])
+
+        ladder = PriceLadder(descending=True)
+        for price in [5, 3, 7, 4]:
+            ladder.add(price)
+        self.assertListEqual(list(ladder.top(3)), [7, 5, 4])
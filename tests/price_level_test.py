@@ -0,0 +1,68 @@
+import unittest
+from discord_exchange import Order
+from discord_exchange.orderbook import PriceLevel
+
+
+class PriceLevelTest(unittest.TestCase):
+    def make_level(self, size):
+        level = PriceLevel()
+        orders = [Order(Order.TYPE_BID, i, 5, 1, i) for i in range(size)]
+        for order in orders:
+            level.append(order)
+        return level, orders
+
+    def test_append(self):
+        level, orders = self.make_level(3)
+        self.assertEqual(len(level), 3)
+        self.assertIs(level.head, orders[0])
+        self.assertIs(level.tail, orders[2])
+        self.assertListEqual(list(level), orders)
+
+    def test_remove_middle(self):
+        level, orders = self.make_level(3)
+        level.remove(orders[1])
+        self.assertEqual(len(level), 2)
+        self.assertListEqual(list(level), [orders[0], orders[2]])
+        self.assertIsNone(orders[1].prev)
+        self.assertIsNone(orders[1].next)
+
+    def test_remove_ends(self):
+        level, orders = self.make_level(3)
+        level.remove(orders[2])
+        self.assertIs(level.tail, orders[1])
+        level.remove(orders[0])
+        self.assertIs(level.head, orders[1])
+        self.assertIs(level.tail, orders[1])
+        level.remove(orders[1])
+        self.assertFalse(level)
+        self.assertIsNone(level.head)
+        self.assertIsNone(level.tail)
+
+    def test_popleft(self):
+        level, orders = self.make_level(2)
+        self.assertIs(level.popleft(), orders[0])
+        self.assertIs(level.popleft(), orders[1])
+        self.assertEqual(len(level), 0)
+
+    def test_aggregates(self):
+        level = PriceLevel()
+        orders = [Order(Order.TYPE_ASK, i, 5, i + 1, i) for i in range(3)]
+        for order in orders:
+            level.append(order)
+        self.assertEqual(level.volume, 6)
+        self.assertEqual(level.num_orders, 3)
+
+        orders[2].reduce_volume(1)
+        self.assertEqual(level.volume, 5)
+        self.assertEqual(level.num_orders, 3)
+
+        orders[0].reduce_volume(1)
+        self.assertEqual(level.volume, 4)
+        self.assertEqual(level.num_orders, 2)
+        self.assertEqual(len(level), 3)
+
+        level.remove(orders[0])
+        level.remove(orders[1])
+        self.assertEqual(level.volume, 2)
+        self.assertEqual(level.num_orders, 1)
+        self.assertIsNone(orders[1].level)
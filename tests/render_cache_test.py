@@ -0,0 +1,127 @@
+import asyncio
+import unittest
+from discord_exchange import Orderbook
+from discord_exchange.render_cache import RenderCache, BookMessage, render
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeMessage:
+    def __init__(self, channel, content) -> None:
+        self.channel = channel
+        self.content = content
+
+    async def edit(self, content=None) -> None:
+        self.channel.edits.append(content)
+        self.content = content
+
+
+class FakeChannel:
+    """
+    Stands in for a Discord text channel, recording what is sent and edited.
+    """
+
+    def __init__(self) -> None:
+        self.messages = []
+        self.edits = []
+
+    async def send(self, content) -> FakeMessage:
+        message = FakeMessage(self, content)
+        self.messages.append(message)
+        return message
+
+
+class RenderCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.ob = Orderbook(position_limit=100)
+        self.clock = FakeClock()
+        self.cache = RenderCache(self.ob, depth=2, interval=1.0,
+                                 clock=self.clock)
+
+    def test_render(self):
+        self.ob.insert_bid(0, 5, 2)
+        self.ob.insert_ask(1, 7, 1)
+        self.ob.insert_ask(2, 6, 3)
+        self.assertEqual(self.cache.get(), "\n".join([
+            "```",
+            "         price   volume orders",
+            "ASK          7        1      1",
+            "ASK          6        3      1",
+            "BID          5        2      1",
+            "```"]))
+        self.assertEqual(render(([], [])), "```\n" + " " * 4 +
+                         "     price   volume orders\n```")
+
+    def test_text_is_shared_while_book_is_unchanged(self):
+        self.ob.insert_bid(0, 5, 2)
+        text = self.cache.get()
+        self.clock.now = 10
+        self.assertIs(self.cache.get(), text)
+        self.assertEqual(self.cache.num_renders, 1)
+
+    def test_changes_below_top_levels_do_not_render(self):
+        for price in (5, 4, 3):
+            self.ob.insert_bid(0, price, 1)
+        text = self.cache.get()
+        self.clock.now = 10
+        self.ob.insert_bid(1, 2, 1)
+        self.ob.cancel(2)
+        self.assertTrue(self.cache.stale())
+        self.assertIs(self.cache.get(), text)
+        self.assertFalse(self.cache.stale())
+        self.assertEqual(self.cache.num_renders, 1)
+
+    def test_bursts_are_coalesced(self):
+        self.cache.get()
+        for i in range(10):
+            self.clock.now = i * 0.1
+            self.ob.insert_bid(i, 5, 1)
+            self.cache.get()
+        # Only the first render fell within the first interval
+        self.assertEqual(self.cache.num_renders, 1)
+        self.clock.now = 1.0
+        self.assertIn("BID          5       10     10", self.cache.get())
+        self.assertEqual(self.cache.num_renders, 2)
+
+
+class BookMessageTest(unittest.IsolatedAsyncioTestCase):
+    async def test_edits_one_message(self):
+        ob = Orderbook()
+        clock = FakeClock()
+        channel = FakeChannel()
+        message = BookMessage(RenderCache(ob, interval=1.0, clock=clock),
+                              channel)
+
+        await message.refresh()
+        for step in range(1, 31):
+            clock.now = step * 0.1
+            ob.insert_bid(step % 3, 5, 1)
+            await message.refresh()
+
+        self.assertEqual(len(channel.messages), 1)
+        # One edit for every interval in which the book changed
+        self.assertEqual(len(channel.edits), 3)
+        self.assertEqual(channel.messages[0].content, render(ob.depth(5)))
+
+    async def test_run(self):
+        ob = Orderbook()
+        channel = FakeChannel()
+        message = BookMessage(RenderCache(ob, interval=0.01), channel)
+        task = asyncio.create_task(message.run())
+        await asyncio.sleep(0.005)
+        ob.insert_ask(0, 5, 1)
+        expected = render(ob.depth(5))
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if channel.messages[0].content == expected:
+                break
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        self.assertEqual(channel.messages[0].content, expected)
+        self.assertEqual(len(channel.messages), 1)
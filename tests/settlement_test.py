@@ -0,0 +1,90 @@
+import random
+import unittest
+from discord_exchange import Trade, BinaryExchange
+from discord_exchange.orderbook import TradeLog
+from discord_exchange.settlement import np, Settlement
+
+
+def settle_per_trade(trades, theo):
+    binary, true = {}, {}
+    for trade in trades:
+        for user, sign in ((trade.buyer, 1), (trade.seller, -1)):
+            binary[user] = binary.get(user, 0) + sign * trade.binary_value(theo)
+            true[user] = true.get(user, 0) + sign * trade.true_value(theo)
+    return binary, true
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class SettlementTest(unittest.TestCase):
+    def random_trades(self, n, seed=0):
+        rng = random.Random(seed)
+        trades = TradeLog()
+        for i in range(n):
+            buyer, seller = rng.sample(range(20), 2)
+            trades.append(Trade(buyer, seller, rng.randint(40, 60),
+                                rng.randint(1, 5), i))
+        return trades
+
+    def test_single_trade(self):
+        settlement = Settlement(TradeLog([Trade(0, 1, 5, 10, 0)]))
+        self.assertListEqual(settlement.users.tolist(), [0, 1])
+        self.assertDictEqual(settlement.by_user(settlement.binary_pnl(7)),
+                             {0: 10, 1: -10})
+        self.assertDictEqual(settlement.by_user(settlement.binary_pnl(5)),
+                             {0: 0, 1: 0})
+        self.assertDictEqual(settlement.by_user(settlement.true_pnl(3)),
+                             {0: -20, 1: 20})
+
+    def test_matches_per_trade_settlement(self):
+        trades = self.random_trades(500)
+        settlement = Settlement(trades)
+        for theo in (39, 45, 50, 50.5, 61):
+            binary, true = settle_per_trade(trades, theo)
+            self.assertDictEqual(settlement.by_user(settlement.binary_pnl(theo)),
+                                 binary)
+            for user, pnl in settlement.by_user(settlement.true_pnl(theo)).items():
+                self.assertAlmostEqual(pnl, true[user])
+
+    def test_many_theos(self):
+        trades = self.random_trades(200, seed=1)
+        settlement = Settlement(trades)
+        theos = np.array([45.0, 50.0, 55.0])
+
+        binary = settlement.binary_pnl(theos)
+        true = settlement.true_pnl(theos)
+        self.assertEqual(binary.shape, (3, len(settlement.users)))
+        self.assertEqual(true.shape, (3, len(settlement.users)))
+        for i, theo in enumerate(theos):
+            self.assertListEqual(binary[i].tolist(),
+                                 settlement.binary_pnl(theo).tolist())
+            np.testing.assert_allclose(true[i], settlement.true_pnl(theo))
+
+    def test_zero_sum(self):
+        settlement = Settlement(self.random_trades(300, seed=2))
+        self.assertEqual(settlement.binary_pnl(50).sum(), 0)
+        self.assertAlmostEqual(settlement.true_pnl(50).sum(), 0)
+
+    def test_empty(self):
+        settlement = Settlement(TradeLog())
+        self.assertEqual(len(settlement.users), 0)
+        self.assertEqual(settlement.binary_pnl([1, 2]).shape, (2, 0))
+
+    def test_binary_exchange(self):
+        exchange = BinaryExchange()
+        exchange.trades.extend(exchange.orderbook.insert_bid(0, 40, 2))
+        exchange.trades.extend(exchange.orderbook.insert_ask(1, 40, 2))
+        settlement = exchange.settlement()
+        self.assertDictEqual(settlement.by_user(settlement.binary_pnl(100)),
+                             {0: 2, 1: -2})
+
+    def test_binary_exchange_prevents_self_trades(self):
+        exchange = BinaryExchange()
+        exchange.trades.extend(exchange.orderbook.insert_bid(0, 40, 2))
+        exchange.trades.extend(exchange.orderbook.insert_ask(0, 40, 2))
+        self.assertEqual(len(exchange.trades), 0)
+        self.assertEqual(exchange.orderbook.depth(), ([(40, 2, 1)], []))
+
+    def test_binary_exchange_limit(self):
+        exchange = BinaryExchange(limit=3)
+        exchange.orderbook.insert_bid(0, 40, 5)
+        self.assertEqual(exchange.orderbook.depth(), ([(40, 3, 1)], []))
@@ -0,0 +1,141 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from discord_exchange import Orderbook
+from discord_exchange.snapshot import SnapshotStore, encode, decode
+from tests.journal_test import random_session, book_state, trade_tuples
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_encode_decode(self):
+        ob = Orderbook(position_limit=4)
+        random_session(ob, 0, 500)
+
+        restored = decode(encode(ob))
+        self.assertEqual(restored.position_limit, 4)
+        self.assertEqual(book_state(restored), book_state(ob))
+
+        # The restored book must keep matching exactly like the original
+        trades = random_session(ob, 1, 500)
+        restored_trades = random_session(restored, 1, 500)
+        self.assertListEqual(trade_tuples(restored_trades), trade_tuples(trades))
+        self.assertEqual(book_state(restored), book_state(ob))
+
+    def test_empty_book(self):
+        ob = Orderbook()
+        self.assertEqual(book_state(decode(encode(ob))), book_state(ob))
+
+    def test_tick_size(self):
+        ob = Orderbook(tick_size=0.01)
+        ob.insert_bid(0, 1.07, 3)
+        ob.insert_ask(1, 1.09, 2)
+        ob.insert_ask(2, 1.07, 1)
+
+        restored = decode(encode(ob))
+        self.assertEqual(restored.tick_size, 0.01)
+        self.assertEqual(book_state(restored), book_state(ob))
+        self.assertEqual(restored.get_bids_at_price(1.07).volume, 2)
+
+    def test_max_price(self):
+        ob = Orderbook(max_price=10)
+        random_session(ob, 0, 200)
+
+        restored = decode(encode(ob))
+        self.assertEqual(restored.max_price, 10)
+        self.assertEqual(book_state(restored), book_state(ob))
+        trades = random_session(ob, 1, 200)
+        restored_trades = random_session(restored, 1, 200)
+        self.assertListEqual(trade_tuples(restored_trades), trade_tuples(trades))
+
+    def test_self_trade_mode(self):
+        ob = Orderbook(self_trade_mode=Orderbook.SELF_TRADE_CANCEL_OLDEST)
+        random_session(ob, 0, 200)
+
+        restored = decode(encode(ob))
+        self.assertEqual(restored.self_trade_mode,
+                         Orderbook.SELF_TRADE_CANCEL_OLDEST)
+        trades = random_session(ob, 1, 200)
+        restored_trades = random_session(restored, 1, 200)
+        self.assertListEqual(trade_tuples(restored_trades), trade_tuples(trades))
+
+    def test_limit_mode(self):
+        ob = Orderbook(limit_mode=Orderbook.LIMIT_REJECT)
+        restored = decode(encode(ob))
+        self.assertEqual(restored.limit_mode, Orderbook.LIMIT_REJECT)
+
+        with SnapshotStore(self.directory, fork=False,
+                           limit_mode=Orderbook.LIMIT_REJECT) as store:
+            store.orderbook.insert_bid(0, 5, 1)
+        with SnapshotStore(self.directory, fork=False) as store:
+            self.assertEqual(store.orderbook.limit_mode,
+                             Orderbook.LIMIT_REJECT)
+            store.snapshot()
+        with SnapshotStore(self.directory, fork=False) as store:
+            self.assertEqual(store.orderbook.limit_mode,
+                             Orderbook.LIMIT_REJECT)
+
+    def check_store(self, fork):
+        reference = Orderbook(position_limit=5)
+        with SnapshotStore(self.directory, position_limit=5, fork=fork) as store:
+            random_session(store.orderbook, 0, 300)
+            store.snapshot()
+            random_session(store.orderbook, 1, 300)
+            store.snapshot()
+            tail = random_session(store.orderbook, 2, 100)
+        random_session(reference, 0, 300)
+        random_session(reference, 1, 300)
+        random_session(reference, 2, 100)
+
+        self.assertListEqual(sorted(os.listdir(self.directory)),
+                             ["journal-0000000002.log",
+                              "snapshot-0000000002.snap"])
+        with SnapshotStore(self.directory, fork=fork) as store:
+            self.assertEqual(book_state(store.orderbook), book_state(reference))
+            # Only the journal tail after the snapshot is replayed
+            self.assertListEqual(trade_tuples(store.trades), trade_tuples(tail))
+            random_session(store.orderbook, 3, 100)
+        random_session(reference, 3, 100)
+
+        with SnapshotStore(self.directory, fork=fork) as store:
+            self.assertEqual(book_state(store.orderbook), book_state(reference))
+
+    def test_store_fork(self):
+        if not hasattr(os, "fork"):
+            self.skipTest("fork is not available")
+        self.check_store(fork=True)
+
+    def test_store_thread(self):
+        self.check_store(fork=False)
+
+    def test_interrupted_snapshot(self):
+        """
+        Without a finished snapshot, startup falls back to the previous
+        snapshot and replays every journal segment since.
+        """
+        reference = Orderbook()
+        with SnapshotStore(self.directory, fork=False) as store:
+            random_session(store.orderbook, 0, 200)
+            store.snapshot()
+            store.wait()
+            random_session(store.orderbook, 1, 200)
+            with mock.patch("discord_exchange.snapshot.write_snapshot"):
+                store.snapshot()
+                store.wait()
+            random_session(store.orderbook, 2, 200)
+        random_session(reference, 0, 200)
+        random_session(reference, 1, 200)
+        random_session(reference, 2, 200)
+
+        self.assertListEqual(sorted(os.listdir(self.directory)),
+                             ["journal-0000000001.log",
+                              "journal-0000000002.log",
+                              "snapshot-0000000001.snap"])
+
+        with SnapshotStore(self.directory, fork=False) as store:
+            self.assertEqual(book_state(store.orderbook), book_state(reference))
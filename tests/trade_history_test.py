@@ -0,0 +1,133 @@
+import os
+import random
+import tempfile
+import unittest
+from discord_exchange import Trade, BinaryExchange
+from discord_exchange.trade_history import TradeHistory
+from discord_exchange.settlement import np
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        self.now += 1
+        return self.now
+
+
+def trade_tuples(trades):
+    return [(t.id, t.buyer, t.seller, t.price, t.volume) for t in trades]
+
+
+def random_trades(n, seed=0):
+    rng = random.Random(seed)
+    trades = []
+    for i in range(n):
+        buyer, seller = rng.sample(range(10), 2)
+        trades.append(Trade(buyer, seller, float(rng.randint(1, 99)),
+                            rng.randint(1, 5), 2 * i))
+    return trades
+
+
+class TradeHistoryTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "trades.dat")
+        self.trades = random_trades(103)
+        self.history = TradeHistory(self.path, block_size=10,
+                                    clock=FakeClock())
+        self.addCleanup(self.history.close)
+        self.history.extend(self.trades)
+
+    def test_spills_full_blocks(self):
+        self.assertEqual(len(self.history), 103)
+        self.assertEqual(self.history.num_blocks, 10)
+        self.assertEqual(len(self.history.tail["ids"]), 3)
+        self.assertEqual(os.path.getsize(self.path),
+                         TradeHistory.HEADER.size + 10 * 10 * 6 * 8)
+
+    def test_read(self):
+        self.assertListEqual(trade_tuples(self.history),
+                             trade_tuples(self.trades))
+        self.assertListEqual(trade_tuples(self.history[5:25]),
+                             trade_tuples(self.trades[5:25]))
+        self.assertListEqual(trade_tuples(self.history[95:103]),
+                             trade_tuples(self.trades[95:103]))
+        for index in (0, 9, 10, 99, 100, -1, -4):
+            self.assertEqual(self.history[index].id, self.trades[index].id)
+        with self.assertRaises(IndexError):
+            self.history[103]
+        self.assertListEqual(self.history.prices.tolist(),
+                             [t.price for t in self.trades])
+
+    def test_between_ids(self):
+        self.assertListEqual(trade_tuples(self.history.between_ids(15, 41)),
+                             trade_tuples(self.trades[8:21]))
+        self.assertListEqual(trade_tuples(self.history.between_ids(190, 1000)),
+                             trade_tuples(self.trades[95:]))
+        self.assertListEqual(list(self.history.between_ids(-5, 0)), [])
+
+    def test_between_times(self):
+        # The fake clock gives the n-th trade the time n + 1
+        self.assertListEqual(
+            trade_tuples(self.history.between_times(20, 31.5)),
+            trade_tuples(self.trades[19:31]))
+        self.assertListEqual(list(self.history.between_times(200, 300)), [])
+
+    def test_of_user(self):
+        for user in (0, 3):
+            self.assertListEqual(
+                trade_tuples(self.history.of_user(user)),
+                trade_tuples(t for t in self.trades
+                             if user in (t.buyer, t.seller)))
+
+    def test_ids_must_increase(self):
+        with self.assertRaises(AssertionError):
+            self.history.append(Trade(0, 1, 5, 1, 10))
+
+    def test_reopen(self):
+        self.history.close()
+        history = TradeHistory(self.path, clock=FakeClock())
+        self.addCleanup(history.close)
+        self.assertEqual(history.block_size, 10)
+        self.assertEqual(history.num_blocks, 10)
+        self.assertListEqual(trade_tuples(history), trade_tuples(self.trades))
+        self.assertListEqual(trade_tuples(history.between_times(101, 200)),
+                             trade_tuples(self.trades[100:]))
+
+        more = random_trades(210, seed=1)[103:]
+        history.extend(more)
+        self.assertEqual(len(history), 210)
+        self.assertEqual(history.num_blocks, 21)
+        self.assertListEqual(trade_tuples(history),
+                             trade_tuples(self.trades + more))
+
+    def test_close_with_open_views(self):
+        trades = iter(self.history)
+        next(trades)
+        self.history.close()
+        # The unfinished iteration still reads the block it is in from its
+        # view of the map
+        self.assertListEqual([next(trades).id for _ in range(5)],
+                             [t.id for t in self.trades[1:6]])
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_binary_exchange(self):
+        path = self.path + ".binary"
+        with BinaryExchange(history_path=path) as exchange:
+            for user in range(20):
+                exchange.trades.extend(
+                    exchange.orderbook.insert_bid(user, 40, 1))
+                exchange.trades.extend(
+                    exchange.orderbook.insert_ask(user + 1, 40, 1))
+            self.assertEqual(len(exchange.trades), 20)
+            settlement = exchange.settlement()
+            pnl = settlement.by_user(settlement.binary_pnl(100))
+            self.assertEqual(sum(pnl.values()), 0)
+            self.assertEqual(pnl[0], 1)
+
+        # Closing the exchange wrote out the trades still in memory
+        with TradeHistory(path) as history:
+            self.assertEqual(len(history), 20)
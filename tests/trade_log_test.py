@@ -0,0 +1,49 @@
+import unittest
+from discord_exchange import Trade
+from discord_exchange.orderbook import TradeLog
+
+
+class TradeLogTest(unittest.TestCase):
+    def assertTradeEqual(self, first, second):
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(first.buyer, second.buyer)
+        self.assertEqual(first.seller, second.seller)
+        self.assertEqual(first.price, second.price)
+        self.assertEqual(first.volume, second.volume)
+
+    def test_initial_status(self):
+        log = TradeLog()
+        self.assertEqual(len(log), 0)
+        self.assertListEqual(list(log), [])
+
+    def test_append(self):
+        trades = [Trade(0, 1, 5, 10, 0), Trade(2, 0, 6.5, 3, 1)]
+        log = TradeLog()
+        for trade in trades:
+            log.append(trade)
+
+        self.assertEqual(len(log), 2)
+        self.assertTradeEqual(log[0], trades[0])
+        self.assertTradeEqual(log[1], trades[1])
+        self.assertTradeEqual(log[-1], trades[1])
+        for stored, trade in zip(log, trades):
+            self.assertTradeEqual(stored, trade)
+
+    def test_slice(self):
+        trades = [Trade(i, i + 1, 5, i + 1, i) for i in range(5)]
+        log = TradeLog(trades)
+
+        sliced = log[1:4]
+        self.assertEqual(len(sliced), 3)
+        for stored, trade in zip(sliced, trades[1:4]):
+            self.assertTradeEqual(stored, trade)
+
+    def test_reading_keeps_ids(self):
+        log = TradeLog([Trade(0, 1, 5, 10, 7)])
+        self.assertEqual(log[0].id, 7)
+        self.assertListEqual([t.id for t in log], [7])
+
+    def test_out_of_range(self):
+        log = TradeLog([Trade(0, 1, 5, 10, 0)])
+        with self.assertRaises(IndexError):
+            log[1]
@@ -5,20 +5,19 @@ from discord_exchange import Trade
 class TradeTest(unittest.TestCase):
 
     def test_trade_sequence(self):
-        trade1 = Trade(0, 1, 5, 10)
+        trade1 = Trade(0, 1, 5, 10, 0)
         self.assertEqual(trade1.buyer, 0)
         self.assertEqual(trade1.seller, 1)
         self.assertEqual(trade1.price, 5)
         self.assertEqual(trade1.volume, 10)
+        self.assertEqual(trade1.id, 0)
 
         trade2 = Trade(0, 1, 5, 10)
         self.assertEqual(trade2.buyer, 0)
         self.assertEqual(trade2.seller, 1)
         self.assertEqual(trade2.price, 5)
         self.assertEqual(trade2.volume, 10)
-
-        self.assertLess(trade1.id, trade2.id)
-        self.assertLess(trade2.id, Trade.num_trades)
+        self.assertIsNone(trade2.id)
 
     def test_binary_value(self):
         t = Trade(0, 1, 5, 10)
@@ -49,3 +48,7 @@ class TradeTest(unittest.TestCase):
     @unittest.expectedFailure
     def test_negative_volume(self):
         t = Trade(0, 1, 5, -10)
+
+    def test_no_instance_dict(self):
+        t = Trade(0, 1, 5, 10)
+        self.assertFalse(hasattr(t, "__dict__"))
@@ -0,0 +1,88 @@
+import random
+import unittest
+from discord_exchange import Orderbook, Trade
+from discord_exchange.orderbook import UserData
+
+
+class UserDataTest(unittest.TestCase):
+    def test_initial_status(self):
+        user = UserData(0)
+        self.assertEqual(user.position, 0)
+        self.assertEqual(user.num_trades, 0)
+        self.assertEqual(user.cash, 0)
+        self.assertEqual(user.vwap(), 0)
+        self.assertEqual(user.pnl(50), 0)
+
+    def test_opening_and_adding(self):
+        user = UserData(0)
+        user.register_trade(Trade(0, 1, 10, 2))
+        user.register_trade(Trade(0, 1, 16, 1))
+
+        self.assertEqual(user.position, 3)
+        self.assertEqual(user.num_trades, 2)
+        self.assertEqual(user.traded_volume, 3)
+        self.assertEqual(user.cash, -36)
+        self.assertEqual(user.average_price, 12)
+        self.assertEqual(user.vwap(), 12)
+        self.assertEqual(user.realized_pnl, 0)
+        self.assertEqual(user.unrealized_pnl(15), 9)
+        self.assertEqual(user.pnl(15), 9)
+        self.assertEqual(user.exposure(15), 45)
+
+    def test_reducing(self):
+        user = UserData(0)
+        user.register_trade(Trade(1, 0, 20, 4))
+        user.register_trade(Trade(0, 1, 15, 3))
+
+        self.assertEqual(user.position, -1)
+        self.assertEqual(user.average_price, 20)
+        self.assertEqual(user.realized_pnl, 15)
+        self.assertEqual(user.unrealized_pnl(18), 2)
+        self.assertEqual(user.pnl(18), 17)
+
+    def test_flipping(self):
+        user = UserData(0)
+        user.register_trade(Trade(0, 1, 10, 2))
+        user.register_trade(Trade(1, 0, 13, 5))
+
+        self.assertEqual(user.position, -3)
+        self.assertEqual(user.average_price, 13)
+        self.assertEqual(user.realized_pnl, 6)
+        self.assertEqual(user.pnl(13), 6)
+
+        user.register_trade(Trade(0, 1, 11, 3))
+        self.assertEqual(user.position, 0)
+        self.assertEqual(user.average_price, 0)
+        self.assertEqual(user.realized_pnl, 12)
+        self.assertEqual(user.cash, 12)
+
+    def test_self_trade(self):
+        user = UserData(0)
+        user.register_trade(Trade(0, 0, 10, 2))
+        self.assertEqual(user.position, 0)
+        self.assertEqual(user.cash, 0)
+        self.assertEqual(user.num_trades, 2)
+
+    def test_pnl_matches_trade_history(self):
+        rng = random.Random(0)
+        ob = Orderbook(position_limit=20)
+        trades = []
+        for _ in range(2000):
+            if rng.random() < 0.5:
+                trades += ob.insert_bid(rng.randrange(5), rng.randint(40, 60),
+                                        rng.randint(1, 4))
+            else:
+                trades += ob.insert_ask(rng.randrange(5), rng.randint(40, 60),
+                                        rng.randint(1, 4))
+
+        for identifier, user in ob.users.items():
+            buys = [t for t in trades if t.buyer == identifier]
+            sells = [t for t in trades if t.seller == identifier]
+            self.assertEqual(user.num_trades, len(buys) + len(sells))
+            self.assertEqual(user.position, sum(t.volume for t in buys)
+                             - sum(t.volume for t in sells))
+            self.assertAlmostEqual(user.pnl(50),
+                                   sum(t.true_value(50) for t in buys)
+                                   - sum(t.true_value(50) for t in sells))
+            self.assertAlmostEqual(user.pnl(50),
+                                   user.realized_pnl + user.unrealized_pnl(50))